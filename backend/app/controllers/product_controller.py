@@ -1,11 +1,14 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Tuple
+from typing import AsyncIterator, List, Optional, Tuple, Union
 
 from ..util.models import Product
-from ..util.schemas import ProductInfo, Barcode, ProductError, TokenData
-from ..util.barcode_scanner import get_products_info
+from ..util.schemas import ProductInfo, Barcode, ProductError, TokenData, ProviderHealth, LookupStats, PantryDelta
+from ..util.barcode_scanner import get_products_info, iter_products_info, get_recall_checked_at, product_lookups
+from ..util.provider_registry import provider_registry
 from ..dao.product_dao import ProductDao
 from ..util.dynamo_util import DynamoUtil
+from ..util.config import PRODUCT_BULK_CHUNK_SIZE
 
 class ProductController:
     """
@@ -13,17 +16,62 @@ class ProductController:
     and passing response from model to view
     """
     @staticmethod
-    def upload_products(barcodes: List[Barcode], db: Session, ddb_util: DynamoUtil, token_data: TokenData) -> Tuple[List[ProductInfo], List[ProductError]]:
-        products, invalid_barcodes = get_products_info(barcodes=barcodes, ddb_util=ddb_util, db=db)
+    async def upload_products(barcodes: List[Barcode], db: Session, ddb_util: DynamoUtil, token_data: TokenData) -> Tuple[List[ProductInfo], List[ProductError]]:
+        recall_checked_at = await get_recall_checked_at(ddb_util)
+        products, invalid_barcodes = await get_products_info(barcodes=barcodes, ddb_util=ddb_util, db=db)
         user_id = token_data.user_id
-        return ProductDao.upload_products(products=products, db=db, user_id=user_id), invalid_barcodes
+        stored_products = await run_in_threadpool(ProductDao.upload_products, products=products, db=db, user_id=user_id,
+                                                  recall_checked_at=recall_checked_at)
+        return stored_products, invalid_barcodes
     
     @staticmethod
-    def get_products(db: Session, token_data: TokenData) -> List[ProductInfo]:
+    async def upload_products_stream(codes: List[str], db: Session, ddb_util: DynamoUtil, token_data: TokenData) -> AsyncIterator[Union[ProductInfo, ProductError]]:
+        """
+        Resolve and store barcodes PRODUCT_BULK_CHUNK_SIZE at a time, yielding each result as soon as it resolves.
+        Every chunk is stored in one transaction once resolved, so only one chunk of results is held at a time
+        and the chunks finished before a client disconnects are kept.
+        """
         user_id = token_data.user_id
-        return ProductDao.get_products(db=db, user_id=user_id)
+        for start in range(0, len(codes), PRODUCT_BULK_CHUNK_SIZE):
+            barcodes = [Barcode(code=code) for code in codes[start:start + PRODUCT_BULK_CHUNK_SIZE]]
+            async for result in ProductController._upload_chunk(barcodes, db, ddb_util, user_id):
+                yield result
+
+    @staticmethod
+    async def _upload_chunk(barcodes: List[Barcode], db: Session, ddb_util: DynamoUtil, user_id: int) -> AsyncIterator[Union[ProductInfo, ProductError]]:
+        products: List[ProductInfo] = []
+        recall_checked_at = await get_recall_checked_at(ddb_util)
+        async for _, result in iter_products_info(barcodes=barcodes, ddb_util=ddb_util, db=db):
+            if isinstance(result, ProductInfo):
+                products.append(result)
+            yield result
+        if products:
+            await run_in_threadpool(ProductDao.upload_products, products=products, db=db, user_id=user_id,
+                                    recall_checked_at=recall_checked_at)
+
+    @staticmethod
+    def get_products(db: Session, token_data: TokenData, limit: Optional[int] = None, cursor: Optional[int] = None,
+                     recall: Optional[bool] = None, brand: Optional[str] = None) -> Tuple[List[ProductInfo], Optional[int]]:
+        user_id = token_data.user_id
+        return ProductDao.get_products(db=db, user_id=user_id, limit=limit, cursor=cursor, recall=recall, brand=brand)
     
+    @staticmethod
+    def get_pantry_version(db: Session, token_data: TokenData) -> int:
+        return ProductDao.get_pantry_version(db=db, user_id=token_data.user_id)
+
+    @staticmethod
+    def get_pantry_changes(db: Session, token_data: TokenData, since_version: int, version: int) -> PantryDelta:
+        return ProductDao.get_pantry_changes(db=db, user_id=token_data.user_id, since_version=since_version, version=version)
+
     @staticmethod
     def delete_products(barcodes: List[Barcode], db: Session, token_data: TokenData) -> Tuple[List[ProductInfo], List[ProductError]]:
         user_id = token_data.user_id
-        return ProductDao.delete_products(barcodes=barcodes, db=db, user_id=user_id)
\ No newline at end of file
+        return ProductDao.delete_products(barcodes=barcodes, db=db, user_id=user_id)
+
+    @staticmethod
+    def get_provider_health() -> List[ProviderHealth]:
+        return provider_registry.health()
+
+    @staticmethod
+    def get_lookup_stats() -> LookupStats:
+        return LookupStats(**product_lookups.stats())
@@ -1,8 +1,9 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
 from ..dao.recalls_dao import RecallsDao
+from ..util.barcode_scanner import check_recalls
 from ..util.dynamo_util import DynamoUtil
-from ..util.schemas import RecallTimestamp, RecallsResponse
+from ..util.schemas import Barcode, RecallTimestamp, RecallsResponse
 
 
 class RecallsController:
@@ -25,3 +26,10 @@ class RecallsController:
             latest_timestamp=latest_timestamp_iso,
             total_count=len(recalls),
         )
+
+    @staticmethod
+    def check_recalls(barcodes: List[Barcode], ddb_util: DynamoUtil) -> Dict[str, bool]:
+        """
+        Check the recall status of a batch of barcodes in one round trip.
+        """
+        return check_recalls(barcodes=barcodes, ddb_util=ddb_util)
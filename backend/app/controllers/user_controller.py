@@ -1,7 +1,9 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
-from ..util.schemas import UserCreate, UserResponse, TokenData
+from ..util.schemas import UserCreate, UserPatch, UserResponse, TokenData
 from ..dao.user_dao import UserDao
+from ..util.hash import hash_password_async
 
 
 class UserController:
@@ -10,8 +12,12 @@ class UserController:
     and passing response from model to view
     """
     @staticmethod
-    def create_user(user: UserCreate, db: Session) -> UserResponse:
-        return UserDao.create_user(user, db)
+    async def create_user(user: UserCreate, db: Session) -> UserResponse:
+        # Turn away a taken email before spending a hash on it
+        await run_in_threadpool(UserDao.check_email_available, user.email, db)
+        # Hash in the password hashing pool, the database work in the threadpool
+        user = user.model_copy(update={"password": await hash_password_async(user.password)})
+        return await run_in_threadpool(UserDao.create_user, user, db)
 
     @staticmethod
     def get_users(db: Session) -> List[UserResponse]:
@@ -24,10 +30,21 @@ class UserController:
         return UserDao.get_user(user_id, db)
 
     @staticmethod
-    def update_user(user: UserCreate, db: Session, token_data: TokenData) -> UserResponse:
+    async def update_user(user: UserCreate, db: Session, token_data: TokenData) -> UserResponse:
         # Get the user id from the token
         user_id = token_data.user_id
-        return UserDao.update_user(user, db, user_id)
+        user = user.model_copy(update={"password": await hash_password_async(user.password)})
+        return await run_in_threadpool(UserDao.update_user, user, db, user_id)
+
+    @staticmethod
+    async def patch_user(user: UserPatch, db: Session, token_data: TokenData) -> UserResponse:
+        # Get the user id from the token
+        user_id = token_data.user_id
+        changes = user.model_dump(exclude_unset=True)
+        # Only a new password costs a hash
+        if "password" in changes:
+            changes["password"] = await hash_password_async(changes["password"])
+        return await run_in_threadpool(UserDao.patch_user, changes, db, user_id)
 
     @staticmethod
     def delete_user(db: Session, token_data: TokenData) -> None:
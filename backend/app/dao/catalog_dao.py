@@ -0,0 +1,62 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import mysql, sqlite
+from typing import Dict, Iterable, List, Optional
+from ..util.models import CatalogProduct
+
+# Columns replaced when an imported product already exists
+CATALOG_UPDATE_COLUMNS = ("code", "name", "brand", "allergens", "last_modified")
+
+
+class CatalogDao:
+    """
+    Read and bulk write the local product catalog.
+    The table is created with the rest of the schema by ProductDao.
+    """
+    @staticmethod
+    def get_products(gtins: Iterable[int], db: Session) -> Dict[int, CatalogProduct]:
+        """
+        Get catalog products by GTIN in one query
+        :param gtins: canonical GTIN-14 integers
+        :param db: Session object
+        :return: catalog products keyed by GTIN
+        """
+        gtins = list(set(gtins))
+        if not gtins:
+            return {}
+        products = db.query(CatalogProduct).filter(CatalogProduct.gtin.in_(gtins)).all()
+        return {product.gtin: product for product in products}
+
+    @staticmethod
+    def get_last_modified(db: Session) -> Optional[int]:
+        """
+        Get the newest OpenFoodFacts modification time in the catalog, the starting point of a delta import
+        :param db: Session object
+        :return: last_modified_t of the newest product, None if the catalog is empty
+        """
+        return db.query(func.max(CatalogProduct.last_modified)).scalar()
+
+    @staticmethod
+    def upsert_products(rows: List[Dict], db: Session) -> None:
+        """
+        Insert catalog rows, replacing products that already exist, in one statement
+        :param rows: dicts with the CatalogProduct columns, unique by gtin
+        :param db: Session object
+        :return: None
+        """
+        if not rows:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            stmt = mysql.insert(CatalogProduct).values(rows)
+            stmt = stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in CATALOG_UPDATE_COLUMNS})
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(CatalogProduct).values(rows)
+            stmt = stmt.on_conflict_do_update(index_elements=[CatalogProduct.gtin],
+                                              set_={column: stmt.excluded[column] for column in CATALOG_UPDATE_COLUMNS})
+        else:
+            raise ValueError(f"Catalog upsert is not supported on {dialect}")
+
+        db.execute(stmt)
+        db.commit()
@@ -0,0 +1,28 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import List
+from ..util.models import LoginActivity
+
+
+class LoginActivityDao:
+    """
+    Record login attempts in the login_activities table.
+    The table is created with the rest of the schema by UserDao.
+    """
+    @staticmethod
+    def insert_activities(activities: List[dict], db: Session) -> int:
+        """
+        Insert login events with one multi-row insert
+        :param activities: LoginActivity column values of each event
+        :param db: Session object
+        :return: number of events inserted
+        """
+        if not activities:
+            return 0
+        try:
+            db.execute(insert(LoginActivity), activities)
+            db.commit()
+            return len(activities)
+        except Exception:
+            db.rollback()
+            raise
@@ -0,0 +1,41 @@
+from sqlalchemy import delete, insert, update, select
+from sqlalchemy.orm import Session
+from typing import List
+from fastapi import HTTPException, status
+from ..util.models import PantryChange, User
+from ..util.config import PANTRY_CHANGE_LOG_VERSIONS
+
+
+class PantryDao:
+    """
+    Version users' pantries and log what each version changed.
+    The tables are created with the rest of the schema by ProductDao.
+    """
+    @staticmethod
+    def lock_pantry(db: Session, user_id: int) -> int:
+        """
+        Lock the user's row until the transaction ends, serializing changes to their pantry
+        :return: current pantry version
+        """
+        version = db.execute(
+            select(User.pantry_version).where(User.user_id == user_id).with_for_update()
+        ).scalar_one_or_none()
+        if version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found")
+        return version
+
+    @staticmethod
+    def record_changes(db: Session, user_id: int, version: int, product_ids: List[int], added: bool) -> int:
+        """
+        Bump the pantry version of a user locked by lock_pantry and log the products changed by it.
+        Changes older than PANTRY_CHANGE_LOG_VERSIONS versions are dropped.
+        :return: new pantry version
+        """
+        version += 1
+        db.execute(update(User).where(User.user_id == user_id).values(pantry_version=version))
+        db.execute(insert(PantryChange), [
+            {"user_id": user_id, "version": version, "product_id": product_id, "added": added} for product_id in product_ids
+        ])
+        db.execute(delete(PantryChange).where(PantryChange.user_id == user_id,
+                                              PantryChange.version <= version - PANTRY_CHANGE_LOG_VERSIONS))
+        return version
@@ -1,11 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Tuple
+from sqlalchemy import or_, insert, select, delete
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
-from ..util.schemas import ProductInfo, ProductError, Barcode
-from ..util.models import Base, Product, User
+from ..util.schemas import ProductInfo, ProductError, Barcode, PantryDelta
+from ..util.models import Base, Product, User, PantryChange, user_product_association
 from ..util.database import engine
 from ..util.hash import hash_password
+from ..util.gtin import to_gtin
+from ..util.config import PANTRY_CHANGE_LOG_VERSIONS
+from .pantry_dao import PantryDao
 
 # Bind engine to metadata and create all tables
 Base.metadata.create_all(bind=engine)
@@ -16,101 +19,224 @@ class ProductDao:
     and return the response to the controller
     """
     @staticmethod
-    def upload_products(products: List[ProductInfo], db: Session, user_id: int) -> List[ProductInfo]:
+    def upload_products(products: List[ProductInfo], db: Session, user_id: int,
+                        recall_checked_at: Optional[int] = None) -> List[ProductInfo]:
         """
-        Add products to user entry in the database
+        Add products to user entry in the database.
+        The batch is written set-based in one transaction: one select of the products that
+        already exist, one bulk insert of the missing ones, one select of their new ids,
+        one select of the ones already in the pantry and one insert of the association rows.
+        Products uploaded concurrently by another user are skipped by the insert, and the
+        user's pantry is locked so its version is bumped once per batch that changes it.
         :param products: Product list to upload
         :param db: Session object
         :param user_id: User id
+        :param recall_checked_at: timestamp of the recall run the recall flags of new products reflect, None if unchecked
         :return: response
         """
 
-        # Check ID exists
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found")
-
-        # Report uploaded products
-        stored_products: List[ProductInfo] = []
+        # One row per GTIN, the first occurrence in the batch wins
+        products_by_gtin = {}
         for product in products:
-            # Check duplication in username or email
-            existing_product = db.query(Product).filter(
-                or_(
-                    Product.code == product.code
-                )
-            ).first()
-
-            if not existing_product:
-                # Add product to db and associate to user
-                new_product = Product(**product.model_dump())
-                db.add(new_product)
-                user.products.append(new_product)
-            elif existing_product not in user.products:
-                # Check existing_products list of associated users
-                # If user has already uploaded product do nothing else add user to product and product to user
-                db.refresh(existing_product)
-                user.products.append(existing_product)
+            products_by_gtin.setdefault(to_gtin(product.code), product)
+        products_by_gtin.pop(None, None)
+
+        try:
+            version = PantryDao.lock_pantry(db, user_id)
+            if not products_by_gtin:
+                db.rollback()
+                return products
+
+            product_ids = ProductDao._get_product_ids(list(products_by_gtin), db)
 
+            # Add the products nobody uploaded before
+            missing = [product for gtin, product in products_by_gtin.items() if gtin not in product_ids]
+            if missing:
+                db.execute(ProductDao._insert_ignore(Product.__table__, db), [
+                    {**product.model_dump(), "gtin": to_gtin(product.code), "recall_checked_at": recall_checked_at}
+                    for product in missing
+                ])
+                product_ids.update(ProductDao._get_product_ids([to_gtin(product.code) for product in missing], db))
+
+            # Associate the products the user does not have yet
+            in_pantry = set(db.execute(
+                select(user_product_association.c.product_id)
+                .where(user_product_association.c.user_id == user_id,
+                       user_product_association.c.product_id.in_(list(product_ids.values())))
+            ).scalars())
+            added = [product_id for product_id in dict.fromkeys(product_ids.values()) if product_id not in in_pantry]
+            if added:
+                db.execute(insert(user_product_association),
+                           [{"user_id": user_id, "product_id": product_id} for product_id in added])
+                PantryDao.record_changes(db, user_id, version, added, added=True)
             db.commit()
-            # valid user, create
-            stored_products.append(product)
-        
-        return stored_products
-    
+        except Exception:
+            db.rollback()
+            raise
+
+        # Report uploaded products
+        return products
+
     @staticmethod
-    def get_products(db: Session, user_id: int) -> List[ProductInfo]:
+    def _get_product_ids(gtins: List[int], db: Session) -> Dict[int, int]:
+        """
+        Map GTINs to product ids with one query
         """
-        Get products associated to user
+        rows = db.execute(select(Product.gtin, Product.product_id).where(Product.gtin.in_(gtins)))
+        return {gtin: product_id for gtin, product_id in rows}
+
+    @staticmethod
+    def get_pantry_version(db: Session, user_id: int) -> int:
+        """
+        Get the version of the user's pantry, without reading any product
         :param db: Session object
         :param user_id: User id
-        :return: response
+        :return: pantry version
         """
-
-        # Check ID exists
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
+        version = db.execute(select(User.pantry_version).where(User.user_id == user_id)).scalar_one_or_none()
+        if version is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found")
-        
-        return [ProductInfo(**product.__dict__) for product in user.products]
-    
+        return version
+
+    @staticmethod
+    def get_pantry_changes(db: Session, user_id: int, since_version: int, version: int) -> PantryDelta:
+        """
+        Get the products added to and removed from the user's pantry after a version
+        :param db: Session object
+        :param user_id: User id
+        :param since_version: version the client has
+        :param version: current version, as read before this call
+        :return: net changes, a product both added and removed is reported by its last change
+        """
+        if since_version > version or since_version < version - PANTRY_CHANGE_LOG_VERSIONS:
+            raise HTTPException(status_code=status.HTTP_410_GONE,
+                                detail=f"Changes since pantry version {since_version} are not available")
+
+        rows = db.execute(
+            select(PantryChange.product_id, PantryChange.added, Product.code, Product.name, Product.brand, Product.recall)
+            .join(Product, Product.product_id == PantryChange.product_id)
+            .where(PantryChange.user_id == user_id, PantryChange.version > since_version, PantryChange.version <= version)
+            .order_by(PantryChange.version)
+        ).all()
+        last_changes = {row.product_id: row for row in rows}
+        return PantryDelta(
+            version=version,
+            added=[ProductInfo(code=row.code, name=row.name, brand=row.brand, recall=bool(row.recall))
+                   for row in last_changes.values() if row.added],
+            removed=[row.code for row in last_changes.values() if not row.added],
+        )
+
+    @staticmethod
+    def _insert_ignore(table, db: Session):
+        """
+        INSERT that skips rows conflicting with an existing key, in the dialect of the session
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "mysql":
+            return insert(table).prefix_with("IGNORE")
+        if dialect == "sqlite":
+            return insert(table).prefix_with("OR IGNORE")
+        return insert(table)
+
+    @staticmethod
+    def get_products(db: Session, user_id: int, limit: Optional[int] = None, cursor: Optional[int] = None,
+                     recall: Optional[bool] = None, brand: Optional[str] = None) -> Tuple[List[ProductInfo], Optional[int]]:
+        """
+        Get products associated to user, one page at a time.
+        Pages are keyed on product_id, so each page is one indexed range scan of the user's
+        pantry joined to the product columns, however deep the page is.
+        :param db: Session object
+        :param user_id: User id
+        :param limit: maximum products returned, None for all of them
+        :param cursor: product_id of the last product of the previous page
+        :param recall: only recalled (True) or not recalled (False) products
+        :param brand: only products of this brand
+        :return: products, and the cursor of the next page or None on the last page
+        """
+        query = (
+            select(Product.product_id, Product.code, Product.name, Product.brand, Product.recall)
+            .join(user_product_association, user_product_association.c.product_id == Product.product_id)
+            .where(user_product_association.c.user_id == user_id)
+            .order_by(Product.product_id)
+        )
+        if cursor is not None:
+            query = query.where(Product.product_id > cursor)
+        if recall is not None:
+            query = query.where(Product.recall.is_(True) if recall else or_(Product.recall.is_(False), Product.recall.is_(None)))
+        if brand is not None:
+            query = query.where(Product.brand == brand)
+        if limit is not None:
+            # One extra row tells whether another page follows
+            query = query.limit(limit + 1)
+
+        rows = db.execute(query).all()
+        if not rows and cursor is None:
+            # Check ID exists, only needed when there is nothing to return
+            if db.query(User.user_id).filter(User.user_id == user_id).first() is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found")
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1].product_id
+
+        products = [ProductInfo(code=row.code, name=row.name, brand=row.brand, recall=bool(row.recall)) for row in rows]
+        return products, next_cursor
+
     @staticmethod
     def delete_products(barcodes: List[Barcode], db: Session, user_id: int) -> Tuple[List[ProductInfo], List[ProductError]]:
         """
-        Delete specified products associated to user
+        Delete specified products associated to user.
+        The user's matching pantry entries are read and deleted set-based in one transaction,
+        one select of the matched products and one delete of their association rows, however
+        many barcodes are given. Barcodes matching none of them are reported as 404.
+        Barcodes that are not valid GTINs are matched on their stored code.
         :param barcodes: list of barcodes to delete
         :param db: Session object
         :param user_id: User id
         :return: response
         """
+        gtins = {to_gtin(barcode.code) for barcode in barcodes}
+        gtins.discard(None)
+        # Rows stored before GTINs, whose code is not a valid GTIN, are still matched by code
+        codes = {barcode.code for barcode in barcodes if to_gtin(barcode.code) is None}
+        matches = []
+        if gtins:
+            matches.append(Product.gtin.in_(gtins))
+        if codes:
+            matches.append(Product.code.in_(codes))
 
-        # Check ID exists
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found")
-        
-        # Report deleted products
-        deleted_products: List[ProductInfo] = []
-        invalid_barcodes: List[ProductError] = []
-        for barcode in barcodes:
-            # Check duplication in username or email
-            existing_product = db.query(Product).filter(
-                or_(
-                    Product.code == barcode.code
-                )
-            ).first()
+        try:
+            # MySQL has no DELETE ... RETURNING, so the rows are read under the pantry lock first
+            version = PantryDao.lock_pantry(db, user_id)
+            rows = db.execute(
+                select(Product.product_id, Product.gtin, Product.code, Product.name, Product.brand, Product.recall)
+                .join(user_product_association, user_product_association.c.product_id == Product.product_id)
+                .where(user_product_association.c.user_id == user_id, or_(*matches))
+            ).all() if matches else []
 
-            if not existing_product:
-                invalid_barcodes.append(ProductError(code=barcode.code, status_code=status.HTTP_404_NOT_FOUND))
-                continue
+            if rows:
+                product_ids = [row.product_id for row in rows]
+                db.execute(
+                    delete(user_product_association)
+                    .where(user_product_association.c.user_id == user_id,
+                           user_product_association.c.product_id.in_(product_ids))
+                )
+                PantryDao.record_changes(db, user_id, version, product_ids, added=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
 
-            if existing_product not in user.products:
-                invalid_barcodes.append(ProductError(code=barcode.code, status_code=status.HTTP_404_NOT_FOUND))
-                continue
-                
-            user.products.remove(existing_product)
+        # Report deleted products, and the barcodes not in the user's pantry
+        deleted_gtins = {row.gtin for row in rows}
+        deleted_codes = {row.code for row in rows}
+        deleted_products = [ProductInfo(code=row.code, name=row.name, brand=row.brand, recall=bool(row.recall)) for row in rows]
 
-            deleted_products.append(ProductInfo(**existing_product.__dict__))
-        
-        db.commit()
+        def was_deleted(code: str) -> bool:
+            gtin = to_gtin(code)
+            return gtin in deleted_gtins if gtin is not None else code in deleted_codes
 
-        return deleted_products, invalid_barcodes
\ No newline at end of file
+        invalid_barcodes = [ProductError(code=barcode.code, status_code=status.HTTP_404_NOT_FOUND)
+                            for barcode in barcodes if not was_deleted(barcode.code)]
+        return deleted_products, invalid_barcodes
@@ -0,0 +1,106 @@
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from ..util.models import Product, RecallAlert, RecallSweep, User, user_product_association
+from ..util.config import RECALL_SWEEP_BATCH_SIZE
+from .pantry_dao import PantryDao
+
+
+class RecallSweepDao:
+    """
+    Apply the recalls added by a recall run to the products table.
+    The tables are created with the rest of the schema by ProductDao.
+    """
+    @staticmethod
+    def get_last_swept_run(db: Session) -> Optional[int]:
+        """
+        Get the newest recall run already swept
+        :param db: Session object
+        :return: run timestamp in ms, None if no run was swept yet
+        """
+        return db.query(func.max(RecallSweep.run_time)).scalar()
+
+    @staticmethod
+    def record_recall_changes(product_ids: List[int], db: Session) -> int:
+        """
+        Bump the pantry version of every user holding products whose recall flag just changed,
+        and log the products as changed, so the next GET /products sees the new flags.
+        The pantries are locked in user order, so concurrent sweeps and scans cannot deadlock.
+        Does not commit, the caller commits with the flag update.
+        :param product_ids: products whose recall flag changed
+        :param db: Session object
+        :return: number of users whose pantry version was bumped
+        """
+        if not product_ids:
+            return 0
+        holders = user_product_association.c
+        held: Dict[int, List[int]] = {}
+        for user_id, product_id in db.execute(
+                select(holders.user_id, holders.product_id).where(holders.product_id.in_(product_ids))):
+            held.setdefault(user_id, []).append(product_id)
+        if not held:
+            return 0
+
+        versions = db.execute(
+            select(User.user_id, User.pantry_version).where(User.user_id.in_(list(held)))
+            .order_by(User.user_id).with_for_update()
+        ).all()
+        for user_id, version in versions:
+            # Logged as added, so a delta since an earlier version returns the product with its new flag
+            PantryDao.record_changes(db, user_id, version, held[user_id], added=True)
+        return len(versions)
+
+    @staticmethod
+    def sweep_run(gtins: List[int], run_time: int, db: Session) -> Optional[RecallSweep]:
+        """
+        Flag the products matching a recall run's new recalls, set-based in one transaction:
+        one select of the matching products per RECALL_SWEEP_BATCH_SIZE GTINs, one update of
+        the flags that change, with a version bump and change log insert for the pantries
+        holding them, and one insert of an alert per user holding any matching product.
+        Products already flagged when scanned since the run are alerted too, their pantries
+        were bumped when the scan stored the flag.
+        :param gtins: GTINs of the recalls new in the run
+        :param run_time: timestamp (ms) of the run
+        :param db: Session object
+        :return: the sweep, or None if the run was already swept
+        """
+        if db.get(RecallSweep, run_time) is not None:
+            return None
+
+        try:
+            matched = []
+            for start in range(0, len(gtins), RECALL_SWEEP_BATCH_SIZE):
+                matched.extend(db.execute(
+                    select(Product.product_id, Product.recall)
+                    .where(Product.gtin.in_(gtins[start:start + RECALL_SWEEP_BATCH_SIZE]))
+                ).all())
+            product_ids = [product_id for product_id, _ in matched]
+            flagged_ids = [product_id for product_id, recall in matched if not recall]
+
+            users_affected = 0
+            if flagged_ids:
+                db.execute(update(Product).where(Product.product_id.in_(flagged_ids))
+                           .values(recall=True, recall_checked_at=run_time))
+                RecallSweepDao.record_recall_changes(flagged_ids, db)
+            if product_ids:
+                holders = user_product_association.c
+                db.execute(insert(RecallAlert).from_select(
+                    ["user_id", "product_id", "run_time"],
+                    select(holders.user_id, holders.product_id, literal(run_time)).where(holders.product_id.in_(product_ids))
+                ))
+                users_affected = db.execute(
+                    select(func.count(func.distinct(RecallAlert.user_id))).where(RecallAlert.run_time == run_time)
+                ).scalar()
+
+            sweep = RecallSweep(run_time=run_time, products_flagged=len(flagged_ids), users_affected=users_affected)
+            db.add(sweep)
+            db.commit()
+            return sweep
+        except IntegrityError:
+            # Swept concurrently by another process
+            db.rollback()
+            return None
+        except Exception:
+            db.rollback()
+            raise
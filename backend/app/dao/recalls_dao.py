@@ -2,6 +2,7 @@ import os
 from fastapi import HTTPException, status
 from botocore.exceptions import ClientError
 from decimal import Decimal
+from typing import Dict, List
 from ..util.dynamo_util import DynamoUtil
 from ..util.schemas import RecallTimestamp
 
@@ -27,4 +28,15 @@ class RecallsDao:
         
         latest_update_timestamp = max(recall_update_timestamps, key=lambda update_timestamp: update_timestamp.get("LogTimestamp"))
 
-        return RecallTimestamp(**latest_update_timestamp)
\ No newline at end of file
+        return RecallTimestamp(**latest_update_timestamp)
+
+    @staticmethod
+    def get_runs_since(ddb_util: DynamoUtil, since_ms: float) -> List[Dict]:
+        """
+        Get the successful recall runs logged after a time, oldest first
+        :param ddb_util: DynamoDB utility instance
+        :param since_ms: exclusive lower bound of the run timestamps, in ms
+        :return: lambda log items
+        """
+        runs = ddb_util.query_after(os.getenv("DYNAMODB_LAMBDA_LOGS_TABLE"), "PK", "GPK", "LogTimestamp", Decimal(str(since_ms)))
+        return [run for run in runs if run.get("StatusCode") == 200]
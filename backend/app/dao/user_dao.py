@@ -5,7 +5,6 @@ from fastapi import HTTPException, status
 from ..util.schemas import UserCreate, UserResponse
 from ..util.models import Base, User
 from ..util.database import engine
-from ..util.hash import hash_password
 
 # Bind engine to metadata and create all tables
 Base.metadata.create_all(bind=engine)
@@ -16,26 +15,34 @@ class UserDao:
     and return the response to the controller
     """
     @staticmethod
-    def create_user(user: UserCreate, db: Session) -> UserResponse:
+    def check_email_available(email: str, db: Session) -> None:
         """
-        Create a new user in the database
-        :param user: user details
+        Check that no user has signed up with an email
+        :param email: email to sign up with
         :param db: Session object
-        :return: response
+        :return: None
         """
         # Check duplication in email
         existing_user = db.query(User).filter(
             or_(
-                User.email == user.email
+                User.email == email
             )
         ).first()
 
         if existing_user:
-            if existing_user.email == user.email:
+            if existing_user.email == email:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
 
-        # Hash password and store it back
-        user.password = hash_password(user.password)
+    @staticmethod
+    def create_user(user: UserCreate, db: Session) -> UserResponse:
+        """
+        Create a new user in the database
+        :param user: user details, with the password already hashed
+        :param db: Session object
+        :return: response
+        """
+        # Checked again in case the email was taken since the caller checked it
+        UserDao.check_email_available(user.email, db)
 
         # valid user, create
         new_user = User(**user.model_dump())
@@ -73,7 +80,7 @@ class UserDao:
         """
         Update user by ID
         :param user_id: user ID
-        :param user: user details
+        :param user: user details, with the password already hashed
         :param db: Session object
         :return: updated user details
         """
@@ -97,8 +104,36 @@ class UserDao:
         for key, value in user.__dict__.items():
             setattr(existing_user, key, value)
 
-        # Hash password and store it back
-        existing_user.password = hash_password(existing_user.password)
+        db.commit()
+        db.refresh(existing_user)
+        return UserResponse(**existing_user.__dict__)
+
+    @staticmethod
+    def patch_user(changes: dict, db: Session, user_id: int) -> UserResponse:
+        """
+        Update the given fields of a user, writing only the columns whose value changes
+        :param changes: new values by column, with a new password already hashed
+        :param db: Session object
+        :param user_id: user ID
+        :return: updated user details
+        """
+        # Check ID exists
+        existing_user = db.query(User).filter(User.user_id == user_id).first()
+        if not existing_user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {user_id} not found")
+
+        changes = {key: value for key, value in changes.items() if getattr(existing_user, key) != value}
+        if not changes:
+            return UserResponse(**existing_user.__dict__)
+
+        # Check duplication in email, only when it changes
+        if "email" in changes:
+            duplicate_user = db.query(User.user_id).filter(User.email == changes["email"], User.user_id != user_id).first()
+            if duplicate_user:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
+
+        for key, value in changes.items():
+            setattr(existing_user, key, value)
 
         db.commit()
         db.refresh(existing_user)
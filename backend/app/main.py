@@ -1,8 +1,18 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from app.util.dynamo_util import DynamoUtil, get_ddb_util
+from app.util.http_client import close_http_client
+from app.util.hash import shutdown_hash_pool
+from app.util.oauth2 import load_jwt_keys
+from app.util.login_activity import start_login_activity_writer, stop_login_activity_writer
+from app.util.product_cache import product_cache
+from app.util.login_throttle import login_throttle
+from app.util.recall_sweep import run_recall_sweeper
+from app.util.config import RECALL_SWEEP_INTERVAL
 from middlewares.logging_middleware import log_requests
 from app.services.user_service import router as user_router
 from app.services.auth import router as auth_router
@@ -11,8 +21,28 @@ from app.services.chat_service import router as chat_router
 from app.services.recalls_service import router as recalls_router
 from app.routes.subscription_routes import router as subscription_router
 from middlewares.cors_middleware import add_cors
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Read the token signing settings once instead of on every request
+    load_jwt_keys()
+    # Create the shared product cache and login throttle tables, expiring items by TTL
+    ddb_util = get_ddb_util()
+    product_cache.create_table(ddb_util)
+    login_throttle.create_table(ddb_util)
+    # Store login attempts in batches off the login path
+    start_login_activity_writer()
+    # Flag pantry products hit by new recalls in the background
+    sweeper = asyncio.create_task(run_recall_sweeper(RECALL_SWEEP_INTERVAL)) if RECALL_SWEEP_INTERVAL > 0 else None
+    yield
+    if sweeper:
+        sweeper.cancel()
+    await stop_login_activity_writer()
+    # Release pooled connections on shutdown
+    await close_http_client()
+    shutdown_hash_pool()
+
 # Create a FastAPI instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add middleware
 app.middleware("http")(log_requests)
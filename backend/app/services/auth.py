@@ -1,37 +1,75 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Request, status, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from typing import Optional
 
 from ..util.database import get_db
 from ..util.models import User
-from ..util.hash import verify_password
-from ..util.oauth2 import create_access_token
+from ..util.hash import verify_password_async
+from ..util.oauth2 import create_access_token, get_current_user
+from ..util.login_activity import record_login_activity
+from ..util.login_throttle import login_throttle
+from ..util.schemas import LoginThrottleStats
 router = APIRouter(tags=["Authentication"])
 
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+def store_password_hash(db: Session, user: User, password_hash: str) -> None:
+    user.password = password_hash
+    db.commit()
+
 @router.post("/login", status_code=status.HTTP_200_OK)
-def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
-    User login
+    User login.
+    The password is checked in the password hashing pool, and rehashed if it was hashed
+    with another cost factor than BCRYPT_ROUNDS. Attempts on existing accounts are queued
+    for the login activity writer. Accounts and client addresses with too many recent
+    failures get 429 before the password is checked.
+    :param request: request, for the client address and user agent
     :param user_credentials: user credentials to login
     :param db: session object
     :return: response
     """
+    ip_address = request.client.host if request.client else None
+    retry_after = await run_in_threadpool(login_throttle.check, user_credentials.username, ip_address)
+    if retry_after is not None:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many failed logins, try again later",
+                            headers={"Retry-After": str(retry_after)})
+
     # Check valid username
-    user = db.query(User).filter(
-        User.email == user_credentials.username,
-    ).first()
+    user = await run_in_threadpool(get_user_by_email, db, user_credentials.username)
 
     if not user:
+        await run_in_threadpool(login_throttle.record_failure, user_credentials.username, ip_address)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid login credentials")
+    # Read now, committing a new hash expires the loaded attributes
+    user_id = user.user_id
 
     # Check password
-    if not verify_password(user_credentials.password, user.password):
+    valid, new_hash = await verify_password_async(user_credentials.password, user.password)
+    record_login_activity(user_id, "success" if valid else "failed", ip_address, request.headers.get("user-agent"))
+    if not valid:
+        await run_in_threadpool(login_throttle.record_failure, user_credentials.username, ip_address)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid login credentials")
+    if new_hash:
+        await run_in_threadpool(store_password_hash, db, user, new_hash)
 
     # Create JWT token
-    access_token = create_access_token(source_data={"user_id": user.user_id})
+    access_token = create_access_token(source_data={"user_id": user_id})
 
     return {
         "access_token": access_token,
         "token_type": "bearer"
-    }
\ No newline at end of file
+    }
+
+@router.get("/login/throttle", response_model=LoginThrottleStats)
+async def get_login_throttle_stats(token_data = Depends(get_current_user)):
+    """
+    Get how many logins were turned away before their password was verified
+    :param token_data: token
+    :return: throttle counters since startup
+    """
+    return LoginThrottleStats(**login_throttle.stats())
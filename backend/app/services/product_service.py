@@ -1,19 +1,21 @@
 import os
-from fastapi import APIRouter, status, Form, Depends, Request
+import json
+from fastapi import APIRouter, status, Form, Depends, Request, Response, Query, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
-from ..util.schemas import ProductInfo, Barcode, ProductError, UserChats, ChatMsg, MsgBy
+from ..util.schemas import ProductInfo, Barcode, ProductError, UserChats, ChatMsg, MsgBy, ProviderHealth, LookupStats, PantryDelta, TokenData
 from ..controllers.product_controller import ProductController
 from ..util.database import get_db
 from ..util.oauth2 import get_current_user
 from ..util.dynamo_util import DynamoUtil, get_ddb_util
+from ..util.config import PRODUCT_PAGE_MAX_LIMIT
 
 # Create router object
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-
 @router.post("", response_model=Tuple[List[ProductInfo], List[ProductError]], status_code=status.HTTP_202_ACCEPTED)
 async def upload_products(
         str_barcodes: List[str] = Form(...),
@@ -29,20 +31,136 @@ async def upload_products(
     :return: response
     """
     barcodes = [Barcode(code=str_code) for str_code in str_barcodes]
-    return ProductController.upload_products(barcodes=barcodes, db=db, ddb_util=ddb_util, token_data=token_data)
+    return await ProductController.upload_products(barcodes=barcodes, db=db, ddb_util=ddb_util, token_data=token_data)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def read_request_codes(request: Request) -> List[str]:
+    """
+    Read the barcodes of a JSON array body, or of an NDJSON body with one barcode per line,
+    as a JSON string or bare. The body is read before the response starts streaming, since
+    the streaming response listens for the client disconnecting on the same channel.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").split(";")[0].strip() == NDJSON_MEDIA_TYPE:
+        return [ndjson_code(line) for line in body.splitlines() if line.strip()]
+
+    try:
+        codes = json.loads(body)
+    except ValueError:
+        codes = None
+    if not isinstance(codes, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of barcodes")
+    return [str(code) for code in codes]
+
+def ndjson_code(line: bytes) -> str:
+    line = line.decode("utf-8", errors="replace").strip()
+    try:
+        return str(json.loads(line))
+    except ValueError:
+        return line
+
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED, response_class=StreamingResponse)
+async def upload_products_bulk(
+        request: Request,
+        db: Session = Depends(get_db),
+        ddb_util: DynamoUtil = Depends(get_ddb_util),
+        token_data = Depends(get_current_user)
+):
+    """
+    Upload many products, streaming back one NDJSON line per barcode as soon as it resolves.
+    A line with name and brand is a ProductInfo, a line with status_code a ProductError.
+    :param request: JSON array of barcodes, or NDJSON with one barcode per line
+    :param db: session object
+    :param ddb_util: DynamoDB utility instance
+    :param token_data: token
+    :return: response
+    """
+    codes = await read_request_codes(request)
+
+    async def stream():
+        async for result in ProductController.upload_products_stream(codes=codes, db=db, ddb_util=ddb_util, token_data=token_data):
+            yield result.model_dump_json() + "\n"
 
-@router.get("", response_model=List[ProductInfo])
+    return StreamingResponse(stream(), status_code=status.HTTP_202_ACCEPTED, media_type=NDJSON_MEDIA_TYPE)
+
+def pantry_etag(token_data: TokenData, version: int) -> str:
+    """
+    Strong ETag of a user's pantry at a version
+    """
+    return f'"{token_data.user_id}-{version}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists the ETag, compared weakly as RFC 9110 requires
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+@router.get("", response_model=Union[List[ProductInfo], PantryDelta])
 async def get_products(
+        response: Response,
+        limit: Optional[int] = Query(None, ge=1, le=PRODUCT_PAGE_MAX_LIMIT),
+        cursor: Optional[int] = Query(None, ge=0),
+        recall: Optional[bool] = None,
+        brand: Optional[str] = None,
+        since_version: Optional[int] = Query(None, ge=0),
+        if_none_match: Optional[str] = Header(None),
         db: Session = Depends(get_db),
         token_data = Depends(get_current_user)
 ):
     """
-    Get uploaded products
+    Get uploaded products, optionally one page at a time.
+    When more products follow, the cursor of the next page is returned in the X-Next-Cursor header.
+    The pantry version is returned as the ETag, a request whose If-None-Match lists it gets 304
+    without reading any product. With since_version only the changes after that version are returned.
+    :param response: response object
+    :param limit: page size, all products if omitted
+    :param cursor: X-Next-Cursor of the previous page
+    :param recall: only recalled (true) or not recalled (false) products
+    :param brand: only products of this brand
+    :param since_version: pantry version the client has, from a previous PantryDelta or ETag
+    :param if_none_match: ETag of the response the client has
     :param db: session object
     :param token_data: token
     :return: response
     """
-    return ProductController.get_products(db=db, token_data=token_data)
+    # Read before the products, so the ETag is never newer than the body it is sent with
+    version = ProductController.get_pantry_version(db=db, token_data=token_data)
+    etag = pantry_etag(token_data, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    if since_version is not None:
+        return ProductController.get_pantry_changes(db=db, token_data=token_data, since_version=since_version, version=version)
+
+    products, next_cursor = ProductController.get_products(db=db, token_data=token_data, limit=limit, cursor=cursor,
+                                                           recall=recall, brand=brand)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return products
+
+@router.get("/providers", response_model=List[ProviderHealth])
+async def get_provider_health(token_data = Depends(get_current_user)):
+    """
+    Get rolling latency, success rate and circuit state of each external product API
+    :param token_data: token
+    :return: provider stats in configured priority order
+    """
+    return ProductController.get_provider_health()
+
+@router.get("/lookups", response_model=LookupStats)
+async def get_lookup_stats(token_data = Depends(get_current_user)):
+    """
+    Get how many product API lookups were coalesced with a concurrent lookup of the same barcode
+    :param token_data: token
+    :return: lookup counters since startup
+    """
+    return ProductController.get_lookup_stats()
 
 @router.delete("", response_model=Tuple[List[ProductInfo], List[ProductError]], status_code=status.HTTP_202_ACCEPTED)
 async def delete_products(
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, status
+from typing import Dict, List
+from fastapi import APIRouter, Depends, Form, status
+from fastapi.concurrency import run_in_threadpool
 
 from ..util.dynamo_util import get_ddb_util, DynamoUtil
 from ..controllers.recalls_controller import RecallsController
-from ..util.schemas import RecallsResponse
+from ..util.schemas import Barcode, RecallsResponse
 
 router = APIRouter(prefix="/recalls", tags=["Recalls"])
 
@@ -19,3 +21,23 @@ async def get_recalls(
     Return recalls plus the latest recall update timestamp.
     """
     return RecallsController.get_recalls(ddb_util)
+
+
+@router.post(
+    "/check",
+    response_model=Dict[str, bool],
+    status_code=status.HTTP_200_OK,
+)
+async def check_recalls(
+    str_barcodes: List[str] = Form(...),
+    ddb_util: DynamoUtil = Depends(get_ddb_util),
+) -> Dict[str, bool]:
+    """
+    Check the recall status of a batch of barcodes.
+    :param str_barcodes: list of barcode strings
+    :param ddb_util: dynamodb access for recall lookups
+    :return: recall status keyed by barcode
+    """
+    barcodes = [Barcode(code=str_code) for str_code in str_barcodes]
+    # The DynamoDB reads and cache refresh block, keep them off the event loop
+    return await run_in_threadpool(RecallsController.check_recalls, barcodes=barcodes, ddb_util=ddb_util)
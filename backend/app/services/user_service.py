@@ -2,7 +2,7 @@ from fastapi import APIRouter, status
 from fastapi import Depends
 from sqlalchemy.orm import Session
 from typing import List
-from ..util.schemas import UserCreate, UserResponse
+from ..util.schemas import UserCreate, UserPatch, UserResponse
 from ..controllers.user_controller import UserController
 from ..util.database import get_db
 from ..util.oauth2 import get_current_user
@@ -10,14 +10,14 @@ from ..util.oauth2 import get_current_user
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Create a new user
     :param user: input user JSON
     :param db: session object
     :return: response
     """
-    return UserController.create_user(user, db)
+    return await UserController.create_user(user, db)
 
 @router.get("", response_model=UserResponse)
 def get_user(
@@ -33,7 +33,7 @@ def get_user(
     return UserController.get_user(db, token_data)
 
 @router.put("", response_model=UserResponse)
-def update_user(
+async def update_user(
         user: UserCreate,
         db: Session = Depends(get_db),
         token_data = Depends(get_current_user)
@@ -45,7 +45,22 @@ def update_user(
     :param token_data: token
     :return: response
     """
-    return UserController.update_user(user, db, token_data)
+    return await UserController.update_user(user, db, token_data)
+
+@router.patch("", response_model=UserResponse)
+async def patch_user(
+        user: UserPatch,
+        db: Session = Depends(get_db),
+        token_data = Depends(get_current_user)
+):
+    """
+    Update only the given fields of the user
+    :param user: input user JSON, fields left out are kept
+    :param db: session object
+    :param token_data: token
+    :return: response
+    """
+    return await UserController.patch_user(user, db, token_data)
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
@@ -1,119 +1,390 @@
 import os
-from typing import List, Tuple
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from .models import Product
 from .schemas import ProductInfo, Barcode, ProductError
-from .config import RECALL_DB_DISABLED
+from .config import RECALL_DB_DISABLED, PRODUCT_CATALOG_ENABLED, PRODUCT_LOOKUP_CONCURRENCY, PRODUCT_LOOKUP_MODE, PRODUCT_HEDGE_DELAY_MS
 from .dynamo_util import DynamoUtil
-from .product_api import get_nutritionix_info, get_openfoodfact_info, get_fatsecret_info 
+from .recall_cache import recall_cache
+from .product_cache import product_cache
+from .single_flight import SingleFlight
+from .gtin import to_gtin
+from .http_client import get_http_client
+from ..dao.catalog_dao import CatalogDao
+from ..dao.recall_sweep_dao import RecallSweepDao
+from .provider_registry import provider_registry, CIRCUIT_OPEN_STATUS
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-recall_table_name = os.getenv("DYNAMODB_RECALL_TABLE")
+recall_index_table_name = os.getenv("DYNAMODB_RECALL_INDEX_TABLE")
+
+# Provider lookups in flight, keyed by GTIN
+product_lookups = SingleFlight()
+
+_lookup_semaphore: Optional[asyncio.Semaphore] = None
+_lookup_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_lookup_semaphore() -> asyncio.Semaphore:
+    """
+    Semaphore capping concurrent barcode resolutions across all requests on this event loop
+    """
+    global _lookup_semaphore, _lookup_loop
+    loop = asyncio.get_running_loop()
+    if _lookup_semaphore is None or _lookup_loop is not loop:
+        _lookup_semaphore = asyncio.Semaphore(PRODUCT_LOOKUP_CONCURRENCY)
+        _lookup_loop = loop
+    return _lookup_semaphore
 
 def get_recall_info(barcode: Barcode, ddb_util: DynamoUtil) -> bool:
     """
-    Check if a given product barcode is in the recall database table.
-    Supports EAN-13 <-> UPC-A normalization:
-      - strips non-digit characters
-      - if 13 digits and starts with '0' also checks 12-digit UPC (drop leading zero)
-      - if 12 digits also checks 13-digit EAN (prepend leading zero)
+    Check if a given product barcode is recalled.
     """
+    return check_recalls([barcode], ddb_util)[barcode.code]
+
+def check_recalls(barcodes: List[Barcode], ddb_util: DynamoUtil) -> Dict[str, bool]:
+    """
+    Check a batch of barcodes against the GTIN -> RecallID index table.
+    Barcodes are keyed by their canonical GTIN-14, so EAN-13 and UPC-A forms need one lookup,
+    and codes that fail check-digit validation are answered without any network call.
+    The in-process recall cache answers first; whatever it cannot answer is resolved
+    with one batched DynamoDB read for the whole request.
+    :param barcodes: barcodes to check
+    :param ddb_util: DynamoDB utility instance
+    :return: recall status keyed by the original barcode code
+    """
+    recalls = {barcode.code: False for barcode in barcodes}
     if RECALL_DB_DISABLED:
-        return False
-
-    # Normalize to digits only
-    raw = (barcode.code or "")
-    digits = "".join(ch for ch in raw if ch.isdigit())
-    if not digits:
-        return False
-
-    # Build candidate codes to check (original + normalized counterpart)
-    candidates = {digits}
-    if len(digits) == 13 and digits.startswith("0"):
-        candidates.add(digits[1:])  # EAN-13 -> UPC-A
-    elif len(digits) == 12:
-        candidates.add("0" + digits)  # UPC-A -> EAN-13
-
-    # Check each candidate against the DynamoDB "UPCs" list attribute
-    for candidate in candidates:
-        if ddb_util.scan_table(recall_table_name, "contains", "UPCs", candidate):
-            return True
-
-    return False
-
-def get_products_info(barcodes: List[Barcode], ddb_util: DynamoUtil, db:Session) -> Tuple[List[ProductInfo], List[ProductError]]:
-    
-    product_info_list: List[ProductInfo] = []
-    invalid_barcodes: List[ProductError] = []
-    db_products = check_db_for_upcs(barcodes, db) # Get codes for the list of barcodes if any existed
+        return recalls
 
+    # Let the cache answer what it can
+    unresolved: Dict[int, List[str]] = {}
     for barcode in barcodes:
-        is_recalled = get_recall_info(barcode, ddb_util)
-        db_present = False # Initialize a flag for db check
-        for product in db_products: # Iterate over the list of db fetched products and check if any of the codes exist in the list
-            if product.code == barcode.code:
-                product_info_list.append(product) # If exists, use the info from db and append it to product_info_listy
-                db_present = True # Update flag to true
-                break # break the inner loop
-        if not db_present: # Check flag and proceed for API calls
-
-        # Try Nutritionix API
-          nutritionix_info = get_nutritionix_info(barcode)
-          if isinstance(nutritionix_info, ProductInfo):
-              nutritionix_info.recall = is_recalled
-              product_info_list.append(nutritionix_info)
-              continue
-
-          # Try OpenFoodFacts API
-          openfoodfact_info = get_openfoodfact_info(barcode)
-          if isinstance(openfoodfact_info, ProductInfo):
-              openfoodfact_info.recall = is_recalled
-              product_info_list.append(openfoodfact_info)
-              continue
-
-          # Try FatSecret API 
-          fatsecret_info = get_fatsecret_info(barcode)
-          if isinstance(fatsecret_info, ProductInfo):
-              fatsecret_info.recall = is_recalled
-              product_info_list.append(fatsecret_info)
-              continue
-
-          # If all sources failed, append the last known error
-          invalid_barcodes.append(ProductError(code=barcode.code, status_code=404))
-        
-    return product_info_list, invalid_barcodes
+        gtin = to_gtin(barcode.code)
+        if gtin is None:
+            continue
+        cached = recall_cache.contains(gtin, ddb_util)
+        if cached is None:
+            unresolved.setdefault(gtin, []).append(barcode.code)
+        else:
+            recalls[barcode.code] = cached
+
+    if unresolved:
+        for item in ddb_util.batch_get_items(recall_index_table_name, "GTIN", list(unresolved)):
+            for code in unresolved.get(int(item["GTIN"]), []):
+                recalls[code] = True
 
+    return recalls
 
-def check_db_for_upcs(barcodes:List[Barcode], db:Session):
+async def get_recall_checked_at(ddb_util: DynamoUtil) -> Optional[int]:
     """
-    Function designed to get a list of barcodes from the Product table.
-    Now expands each barcode to include EAN-13 <-> UPC-A variants so that
-    stored codes in either format are matched.
-    """
-    def _expand_variants(code: str):
-        digits = "".join(ch for ch in (code or "") if ch.isdigit())
-        if not digits:
-            return []
-        variants = {digits}
-        if len(digits) == 12:
-            variants.add("0" + digits)    # UPC-A -> EAN-13
-        elif len(digits) == 13 and digits.startswith("0"):
-            variants.add(digits[1:])      # EAN-13 -> UPC-A
-        return list(variants)
-
-    # Build a unique set of candidate codes to query the DB
-    candidate_codes = set()
+    Recall run that recall checks made from now on reflect, to store with the flags of new products.
+    Read before the checks, so a run logged meanwhile leaves the flags stale instead of passing them off as newer.
+    :param ddb_util: DynamoDB utility instance
+    :return: run timestamp in ms, 0 if no run was logged yet, None when the recall database is disabled
+    """
+    if RECALL_DB_DISABLED:
+        return None
+    return int(await run_in_threadpool(recall_cache.latest_run_time, ddb_util) or 0)
+
+async def _run_provider(provider, client, barcode: Barcode) -> Union[ProductInfo, ProductError]:
+    try:
+        return await provider(client, barcode)
+    except Exception:
+        return ProductError(code=barcode.code, status_code=500)
+
+def _plan_lookup(barcode: Barcode) -> Tuple[list, List[ProductError]]:
+    """
+    Providers to try for a barcode, and an error for each one skipped because its circuit is open.
+    A provider that was never asked may know the barcode, so its skip must keep the lookup from
+    being reported, and cached, as not found.
+    """
+    providers = provider_registry.ordered()
+    skipped = [ProductError(code=barcode.code, status_code=CIRCUIT_OPEN_STATUS)
+               for provider in provider_registry.providers if provider not in providers]
+    return providers, skipped
+
+def _lookup_failure(barcode: Barcode, errors: List[ProductError]) -> ProductError:
+    """
+    Combine provider failures: not found only when every provider said so,
+    otherwise the first transient error, which must not be cached as unknown
+    """
+    if not errors:
+        # No provider to ask
+        return ProductError(code=barcode.code, status_code=CIRCUIT_OPEN_STATUS)
+    for error in errors:
+        if error.status_code != 404:
+            return ProductError(code=barcode.code, status_code=error.status_code)
+    return ProductError(code=barcode.code, status_code=404)
+
+async def _chain_providers(client, barcode: Barcode) -> Union[ProductInfo, ProductError]:
+    """
+    Try each provider in order, waiting for each to fail before the next
+    """
+    providers, errors = _plan_lookup(barcode)
+    for provider in providers:
+        product_info = await _run_provider(provider, client, barcode)
+        if isinstance(product_info, ProductInfo):
+            return product_info
+        errors.append(product_info)
+    return _lookup_failure(barcode, errors)
+
+async def _race_providers(client, barcode: Barcode, hedge_delay: float) -> Union[ProductInfo, ProductError]:
+    """
+    Hedged lookup: the next provider is started once the hedge delay passes without an answer,
+    or as soon as every started provider has failed. The result is the successful answer of the
+    highest priority provider, so a lower priority answer waits only on providers ahead of it.
+    Providers still in flight once the result is known are cancelled.
+    :param client: pooled HTTP client
+    :param barcode: barcode to resolve
+    :param hedge_delay: seconds between provider launches, 0 starts them all at once
+    :return: product info, or the combined error if every provider failed
+    """
+    providers, skipped = _plan_lookup(barcode)
+    loop = asyncio.get_running_loop()
+    tasks: List[asyncio.Task] = []
+    next_launch_at = loop.time()
+    try:
+        while True:
+            # Launch every provider whose hedge delay has passed
+            while len(tasks) < len(providers) and loop.time() >= next_launch_at:
+                tasks.append(asyncio.create_task(_run_provider(providers[len(tasks)], client, barcode)))
+                next_launch_at = loop.time() + hedge_delay
+
+            # Walk the providers in priority order until one is still pending
+            pending = None
+            for task in tasks:
+                if not task.done():
+                    pending = task
+                    break
+                if isinstance(task.result(), ProductInfo):
+                    return task.result()
+
+            if pending is None:
+                # Every launched provider failed, start the next one now
+                if len(tasks) == len(providers):
+                    return _lookup_failure(barcode, [task.result() for task in tasks] + skipped)
+                next_launch_at = loop.time()
+                continue
+
+            in_flight = [task for task in tasks if not task.done()]
+            timeout = max(next_launch_at - loop.time(), 0) if len(tasks) < len(providers) else None
+            await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled lookups unwind so their connections go back to the pool
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def resolve_barcode(barcode: Barcode) -> Union[ProductInfo, ProductError]:
+    """
+    Resolve a single barcode through the providers, in fallback order or as a hedged race
+    depending on PRODUCT_LOOKUP_MODE
+    :param barcode: barcode unknown to the products table
+    :return: product info from the first provider in order that knows it, else a 404 error or the provider failure
+    """
+    client = get_http_client()
+    async with _get_lookup_semaphore():
+        if PRODUCT_LOOKUP_MODE == "race":
+            return await _race_providers(client, barcode, PRODUCT_HEDGE_DELAY_MS / 1000)
+        return await _chain_providers(client, barcode)
+
+async def resolve_unknown_barcodes(barcodes: List[Barcode], ddb_util: DynamoUtil, db: Session) -> Dict[str, Union[ProductInfo, ProductError]]:
+    """
+    Resolve barcodes missing from the products table, see iter_unknown_barcodes
+    :param barcodes: valid barcodes unknown to the products table
+    :param ddb_util: DynamoDB utility instance
+    :param db: Session object
+    :return: product info or error keyed by the original barcode code
+    """
+    return {code: result async for code, result in iter_unknown_barcodes(barcodes, ddb_util, db)}
+
+async def iter_unknown_barcodes(barcodes: List[Barcode], ddb_util: DynamoUtil, db: Session) -> AsyncIterator[Tuple[str, Union[ProductInfo, ProductError]]]:
+    """
+    Resolve barcodes missing from the products table, consulting the imported catalog and the
+    product cache before the providers, and yield each answer as soon as it is known.
+    Each GTIN is resolved once even if the batch holds several forms of it, and every definitive
+    provider answer, found or not found, is written back to the cache.
+    :param barcodes: valid barcodes unknown to the products table
+    :param ddb_util: DynamoDB utility instance
+    :param db: Session object
+    :return: original barcode code with its product info or error, catalog and cache hits first
+    """
+    if barcodes and PRODUCT_CATALOG_ENABLED:
+        catalog = await run_in_threadpool(check_catalog_for_upcs, barcodes, db)
+        for barcode in barcodes:
+            if to_gtin(barcode.code) in catalog:
+                yield barcode.code, catalog[to_gtin(barcode.code)].model_copy(update={"code": barcode.code})
+        barcodes = [barcode for barcode in barcodes if to_gtin(barcode.code) not in catalog]
+
+    gtins = {barcode.code: to_gtin(barcode.code) for barcode in barcodes}
+    cached = await run_in_threadpool(product_cache.get_many, gtins.values(), ddb_util) if barcodes else {}
+
+    waiting: Dict[int, List[Barcode]] = {}
+    for barcode in barcodes:
+        gtin = gtins[barcode.code]
+        if gtin in cached:
+            entry = cached[gtin]
+            yield barcode.code, entry.to_product_info(barcode.code) if entry.found \
+                else ProductError(code=barcode.code, status_code=404)
+        else:
+            waiting.setdefault(gtin, []).append(barcode)
+
+    # Concurrent requests for the same GTIN share one provider lookup
+    flights = {asyncio.ensure_future(product_lookups.do(gtin, partial(resolve_barcode, barcode_list[0]))): gtin
+               for gtin, barcode_list in waiting.items()}
+    answers = []
+    pending = set(flights)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for flight in done:
+                gtin = flights[flight]
+                result, shared = flight.result()
+                # Only the request that ran a lookup caches its answer. Transient provider
+                # failures are not cached, so the next scan tries again
+                if not shared and (isinstance(result, ProductInfo) or result.status_code == 404):
+                    answers.append((gtin, result if isinstance(result, ProductInfo) else None))
+                for barcode in waiting[gtin]:
+                    # Answers are shared between forms of the same GTIN but keep the scanned code
+                    yield barcode.code, result.model_copy(update={"code": barcode.code})
+    finally:
+        # A consumer that stops early leaves the lookups running for other requests sharing them
+        for flight in pending:
+            flight.cancel()
+
+    if answers:
+        await run_in_threadpool(product_cache.put_many, answers, ddb_util)
+
+async def get_products_info(barcodes: List[Barcode], ddb_util: DynamoUtil, db:Session) -> Tuple[List[ProductInfo], List[ProductError]]:
+    """
+    Resolve product info for a batch of barcodes, see iter_products_info
+    :return: products in barcode order, and the errors of the invalid then the unresolved barcodes
+    """
+    results = {code: result async for code, result in iter_products_info(barcodes, ddb_util, db)}
+
+    product_info_list: List[ProductInfo] = []
+    invalid_barcodes: List[ProductError] = [results[barcode.code] for barcode in barcodes if to_gtin(barcode.code) is None]
+    for barcode in barcodes:
+        if to_gtin(barcode.code) is None:
+            continue
+        result = results[barcode.code]
+        if isinstance(result, ProductInfo):
+            product_info_list.append(result)
+        else:
+            invalid_barcodes.append(result)
+    return product_info_list, invalid_barcodes
+
+async def iter_products_info(barcodes: List[Barcode], ddb_util: DynamoUtil, db: Session) -> AsyncIterator[Tuple[str, Union[ProductInfo, ProductError]]]:
+    """
+    Resolve product info for a batch of barcodes, yielding each result as soon as it is known.
+    Known products come from the products table with their stored recall flag, which is
+    rechecked only when a newer recall run has been logged since it was stored. Unknown
+    barcodes come from the imported OpenFoodFacts catalog, then the product cache, and the
+    rest are resolved concurrently over the pooled HTTP client, bounded by PRODUCT_LOOKUP_CONCURRENCY.
+    Blocking database and DynamoDB calls run in the threadpool to keep the event loop free.
+    :return: original barcode code with its product info or error. Stored products keep their stored code
+    """
+    # Reject codes that are not valid GTINs before any database or network call
+    valid_barcodes: List[Barcode] = []
     for barcode in barcodes:
-        candidate_codes.update(_expand_variants(barcode.code))
+        if to_gtin(barcode.code) is None:
+            yield barcode.code, ProductError(code=barcode.code, status_code=422)
+        else:
+            valid_barcodes.append(barcode)
 
-    if not candidate_codes:
-        return []
+    # Get products keyed by GTIN for the barcodes that already exist, noting which recall flags are out of date
+    recall_run_time = None if RECALL_DB_DISABLED else await run_in_threadpool(recall_cache.latest_run_time, ddb_util)
+    db_products, stale_gtins = await run_in_threadpool(check_db_for_upcs, valid_barcodes, db, recall_run_time)
 
-    products = db.query(Product).filter(Product.code.in_(list(candidate_codes))).all()
+    # Check recalls for everything without a fresh stored flag while the unknown barcodes are resolved
+    unchecked_barcodes = [barcode for barcode in valid_barcodes
+                          if to_gtin(barcode.code) not in db_products or to_gtin(barcode.code) in stale_gtins]
+    unknown_barcodes = [barcode for barcode in valid_barcodes if to_gtin(barcode.code) not in db_products]
+    recalls_task = asyncio.ensure_future(run_in_threadpool(check_recalls, unchecked_barcodes, ddb_util))
+    try:
+        # Stored products with a fresh recall flag are ready now
+        for barcode in valid_barcodes:
+            if to_gtin(barcode.code) in db_products and to_gtin(barcode.code) not in stale_gtins:
+                yield barcode.code, db_products[to_gtin(barcode.code)]
+
+        async for code, result in iter_unknown_barcodes(unknown_barcodes, ddb_util, db):
+            if isinstance(result, ProductInfo):
+                result.recall = (await recalls_task)[code]
+            yield code, result
+        recalls = await recalls_task
+    finally:
+        recalls_task.cancel()
+
+    # Store the rechecked flags so the next scan of these products skips the recall check
+    stale_recalls = {to_gtin(barcode.code): recalls[barcode.code] for barcode in unchecked_barcodes
+                     if to_gtin(barcode.code) in stale_gtins}
+    if stale_recalls:
+        await run_in_threadpool(update_recall_status, stale_recalls, recall_run_time, db)
+
+    for barcode in valid_barcodes:
+        if to_gtin(barcode.code) in stale_gtins:
+            db_product = db_products[to_gtin(barcode.code)]
+            db_product.recall = recalls[barcode.code]
+            yield barcode.code, db_product
+
+
+def check_db_for_upcs(barcodes: List[Barcode], db: Session, recall_run_time: Optional[int] = None) -> Tuple[Dict[int, ProductInfo], Set[int]]:
+    """
+    Function designed to get a list of barcodes from the Product table.
+    Barcodes are matched on their canonical GTIN-14, so stored codes in
+    EAN-13 or UPC-A format are matched with a single key each.
+    :param barcodes: barcodes to look up
+    :param db: Session object
+    :param recall_run_time: timestamp of the latest recall run, stored flags older than it are stale
+    :return: products keyed by GTIN with their stored recall flag, and the GTINs whose flag is stale
+    """
+    gtins = {to_gtin(barcode.code) for barcode in barcodes} - {None}
+    if not gtins:
+        return {}, set()
+
+    products = db.query(Product).filter(Product.gtin.in_(list(gtins))).all()
+    stale_gtins = set()
+    if not RECALL_DB_DISABLED:
+        stale_gtins = {product.gtin for product in products
+                       if product.recall_checked_at is None or product.recall_checked_at < (recall_run_time or 0)}
     # Ignore IDE warnings in the below line with respect to expected type.
-    product_info_list = [ProductInfo(code = product.code, name=product.name, brand=product.brand, recall=False) for product in products]
-    return product_info_list
+    return {product.gtin: ProductInfo(code = product.code, name=product.name, brand=product.brand, recall=bool(product.recall)) for product in products}, stale_gtins
+
+
+def update_recall_status(recalls: Dict[int, bool], recall_run_time: Optional[int], db: Session) -> None:
+    """
+    Store rechecked recall flags on products, with two bulk updates. The pantries holding
+    products whose flag changed get a new version, like a recall sweep gives them.
+    :param recalls: recall status keyed by GTIN
+    :param recall_run_time: timestamp of the recall run the flags reflect, 0 if none was logged yet
+    :param db: Session object
+    :return: None
+    """
+    checked_at = int(recall_run_time or 0)
+    stored = db.execute(select(Product.product_id, Product.gtin, Product.recall)
+                        .where(Product.gtin.in_(list(recalls)))).all()
+    changed_ids = [product_id for product_id, gtin, recall in stored if bool(recall) != recalls[gtin]]
+    for recalled in (True, False):
+        gtins = [gtin for gtin, status in recalls.items() if status == recalled]
+        if gtins:
+            db.query(Product).filter(Product.gtin.in_(gtins)).update(
+                {Product.recall: recalled, Product.recall_checked_at: checked_at}, synchronize_session=False)
+    RecallSweepDao.record_recall_changes(changed_ids, db)
+    db.commit()
+
+
+def check_catalog_for_upcs(barcodes: List[Barcode], db: Session) -> Dict[int, ProductInfo]:
+    """
+    Get barcodes from the local OpenFoodFacts catalog, keyed by canonical GTIN-14
+    """
+    gtins = {to_gtin(barcode.code) for barcode in barcodes} - {None}
+    products = CatalogDao.get_products(gtins, db)
+    return {gtin: ProductInfo(code=product.code, name=product.name, brand=product.brand, recall=False)
+            for gtin, product in products.items()}
@@ -0,0 +1,165 @@
+"""
+Streaming import of the OpenFoodFacts data dump into the local product catalog.
+
+Run from the backend directory with the MySQL environment variables set:
+
+    python -m app.util.catalog_import openfoodfacts-products.jsonl.gz
+    python -m app.util.catalog_import en.openfoodfacts.org.products.csv.gz --delta
+
+Records are read one at a time and written in fixed size batches, so memory stays
+bounded regardless of the dump size. With --delta only products modified after the
+newest product already in the catalog are written.
+"""
+import io
+import sys
+import csv
+import gzip
+import json
+import argparse
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+from sqlalchemy.orm import Session
+
+from .gtin import to_gtin
+from .config import UNKNOWN_PLACEHOLDER
+from ..dao.catalog_dao import CatalogDao
+
+CATALOG_BATCH_SIZE = 1000
+
+
+class CatalogImportStats:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.skipped = 0
+
+    def __repr__(self):
+        return f"<CatalogImportStats(read={self.read}, imported={self.imported}, skipped={self.skipped})>"
+
+
+def open_dump(path: str) -> TextIO:
+    """
+    Open a dump as text, decompressing gzip on the fly. "-" reads stdin.
+    """
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_jsonl(stream: TextIO) -> Iterator[Dict]:
+    """
+    Yield one product per line of the JSONL dump, skipping lines that are not valid JSON
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def iter_csv(stream: TextIO) -> Iterator[Dict]:
+    """
+    Yield one product per row of the CSV dump, which is tab separated despite its name
+    """
+    # Some fields, e.g. ingredients, exceed the default field size limit
+    csv.field_size_limit(2 ** 31 - 1)
+    yield from csv.DictReader(stream, delimiter="\t", quoting=csv.QUOTE_NONE)
+
+
+def _text(value, length: int) -> Optional[str]:
+    if isinstance(value, list):
+        value = ",".join(str(item) for item in value)
+    value = str(value or "").strip()
+    return value[:length] if value else None
+
+
+def catalog_row(record: Dict) -> Optional[Dict]:
+    """
+    Map an OpenFoodFacts product to a catalog row
+    :param record: product from the JSONL or CSV dump
+    :return: row for CatalogProduct, or None if the code is not a valid GTIN
+    """
+    code = str(record.get("code") or "").strip()
+    gtin = to_gtin(code)
+    if gtin is None:
+        return None
+
+    try:
+        last_modified = int(record.get("last_modified_t") or 0) or None
+    except ValueError:
+        last_modified = None
+
+    return {
+        "gtin": gtin,
+        "code": code[:50],
+        "name": _text(record.get("product_name"), 255) or UNKNOWN_PLACEHOLDER,
+        "brand": _text(record.get("brands"), 255) or UNKNOWN_PLACEHOLDER,
+        # JSONL has a tag list, the CSV a comma-separated string of the same tags
+        "allergens": _text(record.get("allergens_tags") or record.get("allergens"), 500),
+        "last_modified": last_modified,
+    }
+
+
+def import_catalog(records: Iterable[Dict], db: Session, since: Optional[int] = None,
+                   batch_size: int = CATALOG_BATCH_SIZE) -> CatalogImportStats:
+    """
+    Upsert OpenFoodFacts products into the catalog in batches
+    :param records: products from the dump, consumed lazily
+    :param db: Session object
+    :param since: only import products modified after this last_modified_t
+    :param batch_size: rows written per statement
+    :return: import counts
+    """
+    stats = CatalogImportStats()
+    batch: Dict[int, Dict] = {}
+    for record in records:
+        stats.read += 1
+        row = catalog_row(record)
+        if row is None or (since is not None and (row["last_modified"] or 0) <= since):
+            stats.skipped += 1
+            continue
+
+        # A GTIN listed twice in one batch is written once, with its last occurrence
+        batch[row["gtin"]] = row
+        if len(batch) >= batch_size:
+            CatalogDao.upsert_products(list(batch.values()), db)
+            stats.imported += len(batch)
+            batch = {}
+
+    if batch:
+        CatalogDao.upsert_products(list(batch.values()), db)
+        stats.imported += len(batch)
+    return stats
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Import an OpenFoodFacts dump into the local product catalog")
+    parser.add_argument("path", help="JSONL or CSV dump, optionally gzipped, or - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="dump format, guessed from the file name by default")
+    parser.add_argument("--delta", action="store_true", help="only import products modified since the last import")
+    parser.add_argument("--batch-size", type=int, default=CATALOG_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    dump_format = args.format or ("csv" if ".csv" in args.path else "jsonl")
+
+    # Imported here so the module can be used without a configured database
+    from .database import SessionLocal
+    from ..dao.product_dao import ProductDao  # noqa: F401, creates the catalog table
+
+    db = SessionLocal()
+    try:
+        since = CatalogDao.get_last_modified(db) if args.delta else None
+        with open_dump(args.path) as stream:
+            records = iter_csv(stream) if dump_format == "csv" else iter_jsonl(stream)
+            stats = import_catalog(records, db, since=since, batch_size=args.batch_size)
+        print(stats)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
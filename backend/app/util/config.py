@@ -17,6 +17,48 @@ FATSECRET_BASE_URL = os.getenv("FATSECRET_BASE_URL", "https://platform.fatsecret
 
 UNKNOWN_PLACEHOLDER = '-Unknown-'
 
+# Product lookup variables
+PRODUCT_LOOKUP_CONCURRENCY = int(os.getenv("PRODUCT_LOOKUP_CONCURRENCY", "10"))  # Barcodes resolved at once across all requests
+PRODUCT_HTTP_MAX_CONNECTIONS = int(os.getenv("PRODUCT_HTTP_MAX_CONNECTIONS", "20"))
+PRODUCT_HTTP_TIMEOUT = float(os.getenv("PRODUCT_HTTP_TIMEOUT", "10"))  # Seconds
+PRODUCT_LOOKUP_MODE = os.getenv("PRODUCT_LOOKUP_MODE", "sequential").lower()  # "sequential" or "race"
+PRODUCT_HEDGE_DELAY_MS = float(os.getenv("PRODUCT_HEDGE_DELAY_MS", "300"))  # Delay before racing the next provider, 0 races all at once
+
+# Product provider health variables
+PRODUCT_PROVIDER_TIMEOUTS = {  # Seconds allowed per provider call
+    "nutritionix": float(os.getenv("NUTRITIONIX_TIMEOUT", "3")),
+    "openfoodfacts": float(os.getenv("OPENFOODFACTS_TIMEOUT", "5")),
+    "fatsecret": float(os.getenv("FATSECRET_TIMEOUT", "5")),
+}
+PRODUCT_PROVIDER_RATE_LIMITS = {  # (requests per second, burst), a rate of 0 disables the limit
+    "nutritionix": (float(os.getenv("NUTRITIONIX_RATE", "0")), int(os.getenv("NUTRITIONIX_BURST", "10"))),
+    "openfoodfacts": (float(os.getenv("OPENFOODFACTS_RATE", "0")), int(os.getenv("OPENFOODFACTS_BURST", "10"))),
+    "fatsecret": (float(os.getenv("FATSECRET_RATE", "0")), int(os.getenv("FATSECRET_BURST", "10"))),
+}
+PRODUCT_RATE_LIMIT_MAX_WAIT = float(os.getenv("PRODUCT_RATE_LIMIT_MAX_WAIT", "0.25"))  # Seconds a lookup queues before skipping a provider
+PRODUCT_PROVIDER_RETRIES = int(os.getenv("PRODUCT_PROVIDER_RETRIES", "1"))  # Retries per lookup on provider errors
+PRODUCT_RETRY_BUDGET_RATIO = float(os.getenv("PRODUCT_RETRY_BUDGET_RATIO", "0.1"))  # Retries allowed per call made
+PRODUCT_RETRY_BASE_DELAY = float(os.getenv("PRODUCT_RETRY_BASE_DELAY", "0.1"))  # Seconds, ceiling of the first retry's random delay
+PRODUCT_RETRY_MAX_DELAY = float(os.getenv("PRODUCT_RETRY_MAX_DELAY", "1"))  # Seconds, cap of the doubling delay ceiling
+PRODUCT_BREAKER_FAILURES = int(os.getenv("PRODUCT_BREAKER_FAILURES", "5"))  # Consecutive failures that open a circuit
+PRODUCT_BREAKER_COOLDOWN = float(os.getenv("PRODUCT_BREAKER_COOLDOWN", "30"))  # Seconds before a trial call
+PRODUCT_PROVIDER_WINDOW = int(os.getenv("PRODUCT_PROVIDER_WINDOW", "100"))  # Recent calls kept per provider for stats
+PRODUCT_ADAPTIVE_ORDER = os.getenv("PRODUCT_ADAPTIVE_ORDER", "true").lower() == "true"
+PRODUCT_ADAPTIVE_MIN_SAMPLES = int(os.getenv("PRODUCT_ADAPTIVE_MIN_SAMPLES", "20"))
+
+# Product Catalog variables
+PRODUCT_CATALOG_ENABLED = os.getenv("PRODUCT_CATALOG_ENABLED", "true").lower() == "true"  # Resolve from the imported OpenFoodFacts catalog
+
+# Product Cache variables
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))  # Entries kept in the in-process tier
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", str(7 * 24 * 3600)))  # Seconds a found product is cached
+PRODUCT_CACHE_NEGATIVE_TTL = float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", str(24 * 3600)))  # Seconds an unknown barcode is cached
+
+# Pantry listing variables
+PRODUCT_PAGE_MAX_LIMIT = int(os.getenv("PRODUCT_PAGE_MAX_LIMIT", "500"))  # Largest page GET /products returns
+PANTRY_CHANGE_LOG_VERSIONS = int(os.getenv("PANTRY_CHANGE_LOG_VERSIONS", "100"))  # Pantry versions a delta can span
+PRODUCT_BULK_CHUNK_SIZE = int(os.getenv("PRODUCT_BULK_CHUNK_SIZE", "100"))  # Barcodes resolved and stored together by POST /products/bulk
+
 # Chat API Variables
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
 GEMINI_API_HEADERS = {
@@ -32,6 +74,35 @@ FRONTEND_URL = "http://localhost:3000"
 # Recall Table variables
 RECALL_DB_DISABLED = os.getenv("DISABLE_RECALL_DB", "false").lower() == "true"
 
+# Recall Cache variables
+RECALL_CACHE_MODE = os.getenv("RECALL_CACHE_MODE", "set").lower()  # "set", "bloom", "snapshot" or "off"
+RECALL_SNAPSHOT_PATH = os.getenv("RECALL_SNAPSHOT_PATH")  # Binary snapshot written by the recall processor
+RECALL_CACHE_CHECK_INTERVAL = float(os.getenv("RECALL_CACHE_CHECK_INTERVAL", "60"))  # Seconds between recall run checks
+RECALL_CACHE_BLOOM_ERROR_RATE = float(os.getenv("RECALL_CACHE_BLOOM_ERROR_RATE", "0.001"))
+
+# Recall Sweep variables
+RECALL_SWEEP_INTERVAL = float(os.getenv("RECALL_SWEEP_INTERVAL", "300"))  # Seconds between checks for unswept recall runs, 0 disables
+RECALL_SWEEP_BATCH_SIZE = 1000  # GTINs per products query
+
+# Password hashing variables
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Cost factor of new hashes, older hashes are rehashed on login
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))  # Hashing processes, 0 hashes in the threadpool
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))  # Hashes waiting for a worker before logins get 503
+
+# Login activity variables
+LOGIN_ACTIVITY_BATCH_SIZE = int(os.getenv("LOGIN_ACTIVITY_BATCH_SIZE", "100"))  # Most login events per insert
+LOGIN_ACTIVITY_FLUSH_MS = float(os.getenv("LOGIN_ACTIVITY_FLUSH_MS", "1000"))  # Most a login event waits for its batch to fill
+LOGIN_ACTIVITY_QUEUE_SIZE = int(os.getenv("LOGIN_ACTIVITY_QUEUE_SIZE", "10000"))  # Login events waiting to be written before new ones are dropped
+
+# Login throttle variables
+LOGIN_THROTTLE_WINDOW = float(os.getenv("LOGIN_THROTTLE_WINDOW", "300"))  # Seconds of the sliding window failed logins are counted in
+LOGIN_THROTTLE_ACCOUNT_LIMIT = int(os.getenv("LOGIN_THROTTLE_ACCOUNT_LIMIT", "10"))  # Failed logins per account within the window, 0 disables
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv("LOGIN_THROTTLE_IP_LIMIT", "50"))  # Failed logins per client address within the window, 0 disables
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))  # Accounts and addresses tracked in-process
+
+# Access token variables
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))  # Verified access tokens remembered until they expire, 0 disables
+
 # Chat Session variables
 MAX_CHAT_SESSION_LENGTH = 10
 RECIPE_GEN_SYS_PROMPT = """
@@ -13,8 +13,11 @@ MYSQL_URL = (f"mysql+pymysql://{os.getenv('MYSQL_USER')}:"
              f"{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:"
              f"{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DATABASE')}")
 
+# DATABASE_URL overrides the MySQL connection, e.g. sqlite:// for benchmarks
+DATABASE_URL = os.getenv("DATABASE_URL") or MYSQL_URL
+
 # Connect to the database and create a connection pool
-engine = create_engine(MYSQL_URL)
+engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Get session object
@@ -1,11 +1,18 @@
 import os
+import time
+import random
 
 import boto3
 from boto3 import dynamodb
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 from typing import Optional, List, Dict
 
+# Retries of unprocessed batch keys, backing off exponentially with full jitter
+BATCH_RETRY_LIMIT = 8
+BATCH_RETRY_BASE_DELAY = 0.05  # Seconds
+BATCH_RETRY_MAX_DELAY = 2.0  # Seconds
+
 
 def get_ddb_util():
     ddb_endpoint = os.getenv("DYNAMODB_ENDPOINT")
@@ -64,6 +71,50 @@ class DynamoUtil:
         matching_items = scan_response.get("Items", [])
         return matching_items
 
+    def scan_all(self, table_name: str, projection: Optional[str] = None) -> List[Dict]:
+        """
+        Scan the entire table, following pagination past the 1 MB page limit
+        :param table_name: Name of the table to scan.
+        :param projection: Optional projection expression to limit the returned attributes
+        :return: List of all items in the table
+        """
+        table = self.ddb.Table(table_name)
+        scan_kwargs = {"ProjectionExpression": projection} if projection else {}
+
+        items = []
+        while True:
+            scan_response = table.scan(**scan_kwargs)
+            items.extend(scan_response.get("Items", []))
+            last_key = scan_response.get("LastEvaluatedKey")
+            if not last_key:
+                return items
+            scan_kwargs["ExclusiveStartKey"] = last_key
+
+    def query_after(self, table_name: str, partition_attribute: str, partition_value, sort_attribute: str, after) -> List[Dict]:
+        """
+        Query one partition for the items sorted after a sort key value, in ascending order,
+        following pagination past the 1 MB page limit
+        :param table_name: Name of the table to query.
+        :param partition_attribute: Partition key attribute of the table
+        :param partition_value: Partition to read
+        :param sort_attribute: Sort key attribute of the table
+        :param after: Exclusive lower bound of the sort key
+        :return: List of the matching items
+        """
+        table = self.ddb.Table(table_name)
+        query_kwargs = {
+            "KeyConditionExpression": Key(partition_attribute).eq(partition_value) & Key(sort_attribute).gt(after)
+        }
+
+        items = []
+        while True:
+            query_response = table.query(**query_kwargs)
+            items.extend(query_response.get("Items", []))
+            last_key = query_response.get("LastEvaluatedKey")
+            if not last_key:
+                return items
+            query_kwargs["ExclusiveStartKey"] = last_key
+
     def get_item(self, table_name: str, key_attribute: str, key_value: str):
         table = self.ddb.Table(table_name)
         # Query using FilterExpression
@@ -74,6 +125,71 @@ class DynamoUtil:
         item = scan_response.get('Item')
         return item
 
+    def batch_get_items(self, table_name: str, key_attribute: str, key_values: List) -> List[Dict]:
+        """
+        Fetch multiple items by key with BatchGetItem, retrying any unprocessed keys with
+        exponential backoff, at most BATCH_RETRY_LIMIT times per request
+        :param table_name: Name of the table to read from.
+        :param key_attribute: Partition key attribute of the table
+        :param key_values: Key values to fetch
+        :return: List of the items that exist
+        :raises ClientError: if keys are still unprocessed after the last retry
+        """
+        unique_values = list(dict.fromkeys(key_values))
+        items = []
+        # BatchGetItem accepts at most 100 keys per request
+        for start in range(0, len(unique_values), 100):
+            request_items = {
+                table_name: {"Keys": [{key_attribute: value} for value in unique_values[start:start + 100]]}
+            }
+            retries = 0
+            while request_items:
+                batch_response = self.ddb.batch_get_item(RequestItems=request_items)
+                items.extend(batch_response.get("Responses", {}).get(table_name, []))
+                request_items = batch_response.get("UnprocessedKeys") or None
+                if request_items:
+                    if retries >= BATCH_RETRY_LIMIT:
+                        # Raised like a throttled read, a partial answer would pass for missing items
+                        raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException",
+                                                     "Message": f"Keys still unprocessed after {retries} retries"}},
+                                          "BatchGetItem")
+                    time.sleep(random.uniform(0, min(BATCH_RETRY_MAX_DELAY, BATCH_RETRY_BASE_DELAY * 2 ** retries)))
+                    retries += 1
+        return items
+
+    def batch_put(self, table_name: str, items: List[Dict]) -> None:
+        """
+        Batch writing data into table, overwriting items with the same key
+        :param table_name: Name of the table to write to.
+        :param items: List of items to write to the table.
+        :return: None
+        """
+        table = self.ddb.Table(table_name)
+        # batch_writer groups puts into 25 item requests and retries unprocessed items
+        with table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def increment(self, table_name: str, key_attribute: str, key_value, counter_attribute: str, expires_at: int) -> int:
+        """
+        Atomically add one to a counter attribute, creating the item if needed
+        :param table_name: Name of the table to write to.
+        :param key_attribute: Partition key attribute of the table
+        :param key_value: Key value of the item
+        :param counter_attribute: Attribute to increment
+        :param expires_at: Epoch seconds stored in the item's "ExpiresAt" TTL attribute
+        :return: The counter value after the increment
+        """
+        table = self.ddb.Table(table_name)
+        update_response = table.update_item(
+            Key={key_attribute: key_value},
+            UpdateExpression="ADD #counter :one SET ExpiresAt = :expires_at",
+            ExpressionAttributeNames={"#counter": counter_attribute},
+            ExpressionAttributeValues={":one": 1, ":expires_at": expires_at},
+            ReturnValues="UPDATED_NEW",
+        )
+        return int(update_response["Attributes"][counter_attribute])
+
     def create_table(
             self,
             table_name: str,
@@ -119,3 +235,19 @@ class DynamoUtil:
         except ClientError as e:
             print("error", f"Failed to create table {table_name}: {e}")
             raise
+
+    def enable_ttl(self, table_name: str, attribute: str = "ExpiresAt") -> None:
+        """
+        Have DynamoDB delete items of a table once the epoch seconds in an attribute have passed
+        :param table_name: Name of the table
+        :param attribute: Attribute holding each item's expiry
+        :return: None
+        """
+        client = self.ddb.meta.client
+        description = client.describe_time_to_live(TableName=table_name)["TimeToLiveDescription"]
+        if description.get("TimeToLiveStatus") in ("ENABLED", "ENABLING"):
+            return
+        client.update_time_to_live(
+            TableName=table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": attribute},
+        )
@@ -0,0 +1,67 @@
+from typing import Optional
+
+# Lengths of the GTIN family: EAN-8, UPC-A, EAN-13 and GTIN-14
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+
+def gtin_check_digit(body: str) -> int:
+    """
+    Compute the GS1 check digit for the digits preceding it
+    :param body: GTIN digits without the check digit
+    :return: check digit
+    """
+    # Weights alternate 3, 1, 3, ... starting from the digit next to the check digit
+    total = sum(int(digit) * (3 if position % 2 == 0 else 1) for position, digit in enumerate(reversed(body)))
+    return (10 - total % 10) % 10
+
+
+def upc_e_to_upc_a(digits: str) -> Optional[str]:
+    """
+    Expand a zero-suppressed UPC-E code to its UPC-A form, keeping its check digit
+    :param digits: 8 digits, number system 0 or 1, six data digits and the check digit
+    :return: 12 digit UPC-A, or None if the code is not UPC-E shaped
+    """
+    if len(digits) != 8 or digits[0] not in "01":
+        return None
+    system, data, check = digits[0], digits[1:7], digits[7]
+    last = data[5]
+    if last in "012":
+        body = data[:2] + last + "0000" + data[2:5]
+    elif last == "3":
+        body = data[:3] + "00000" + data[3:5]
+    elif last == "4":
+        body = data[:4] + "00000" + data[4]
+    else:
+        body = data[:5] + "0000" + last
+    return system + body + check
+
+
+def to_gtin(code: str) -> Optional[int]:
+    """
+    Convert a barcode to its canonical GTIN-14, stored as an integer.
+    Non-digit characters are stripped and the check digit is validated. Zero padding to
+    14 digits does not change the value, so the EAN-8, UPC-A and EAN-13 forms of the
+    same product all map to the same integer. 8 digit codes starting with 0 or 1 are read
+    as UPC-E and expanded to UPC-A, falling back to EAN-8 if the expansion does not check.
+    :param code: barcode as scanned or printed
+    :return: GTIN-14 as an integer, or None if the code is not a valid GTIN
+    """
+    digits = "".join(ch for ch in (code or "") if ch.isdigit())
+    upc_a = upc_e_to_upc_a(digits)
+    if upc_a is not None and gtin_check_digit(upc_a[:-1]) == int(upc_a[-1]):
+        return int(upc_a)
+    if len(digits) not in GTIN_LENGTHS:
+        return None
+    if gtin_check_digit(digits[:-1]) != int(digits[-1]):
+        return None
+    return int(digits)
+
+
+def format_gtin(gtin: int, length: int = 14) -> str:
+    """
+    Format an integer GTIN as a zero padded digit string
+    :param gtin: GTIN as an integer
+    :param length: number of digits (14 for GTIN-14, 13 for EAN-13, 12 for UPC-A)
+    :return: digit string
+    """
+    return str(gtin).zfill(length)
@@ -1,5 +1,18 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from passlib.context import CryptContext
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+from .config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE
+
+# Hashes made with another cost factor report needs_update and are rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_slots: Optional[asyncio.Semaphore] = None
+_hash_loop: Optional[asyncio.AbstractEventLoop] = None
 
 def hash_password(password: str) -> str:
     """
@@ -16,4 +29,69 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     :param hashed_password: hashed password
     :return: True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify the password, rehashing it if its hash is out of date
+    :param plain_password: original password
+    :param hashed_password: hashed password
+    :return: True if password matches, and the new hash to store if the password needs rehashing
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _get_hash_slots() -> asyncio.Semaphore:
+    """
+    Semaphore bounding the hashes running or queued for the pool on this event loop
+    """
+    global _hash_slots, _hash_loop
+    loop = asyncio.get_running_loop()
+    if _hash_slots is None or _hash_loop is not loop:
+        _hash_slots = asyncio.Semaphore(max(PASSWORD_HASH_WORKERS, 1) + PASSWORD_HASH_QUEUE_SIZE)
+        _hash_loop = loop
+    return _hash_slots
+
+async def _run_hash(func, *args):
+    """
+    Run bcrypt work in the password hashing pool, so it holds neither the event loop
+    nor the threadpool shared with sync routes for the length of a hash.
+    With PASSWORD_HASH_WORKERS at 0 it runs in the threadpool instead.
+    """
+    global _hash_pool
+    slots = _get_hash_slots()
+    if slots.locked():
+        # Shed the burst instead of queueing logins behind minutes of hashing
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many concurrent logins, try again")
+
+    async with slots:
+        if PASSWORD_HASH_WORKERS <= 0:
+            return await run_in_threadpool(func, *args)
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, func, *args)
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash the password in the password hashing pool
+    :param password: password to hash
+    :return: hashed password
+    """
+    return await _run_hash(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify the password in the password hashing pool, rehashing it if its hash is out of date
+    :param plain_password: original password
+    :param hashed_password: hashed password
+    :return: True if password matches, and the new hash to store if the password needs rehashing
+    """
+    return await _run_hash(verify_and_update_password, plain_password, hashed_password)
+
+def shutdown_hash_pool() -> None:
+    """
+    Stop the password hashing worker processes
+    """
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
@@ -0,0 +1,39 @@
+import asyncio
+import httpx
+from typing import Optional
+
+from .config import PRODUCT_HTTP_MAX_CONNECTIONS, PRODUCT_HTTP_TIMEOUT
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the pooled HTTP client shared by every outbound product lookup.
+    Connections are kept alive between requests; a client is bound to the
+    event loop it was created on, so a new loop gets a new client.
+    :return: async HTTP client
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=PRODUCT_HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=PRODUCT_HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=PRODUCT_HTTP_MAX_CONNECTIONS),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    """
+    Close the pooled HTTP client on shutdown
+    :return: None
+    """
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
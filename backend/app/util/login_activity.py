@@ -0,0 +1,121 @@
+"""
+Batched recording of login attempts.
+
+Login pushes each success or failure onto an in-process queue instead of committing it
+on the login path. A background writer started by the API server's lifespan inserts the
+queued events in batches of up to LOGIN_ACTIVITY_BATCH_SIZE, at most
+LOGIN_ACTIVITY_FLUSH_MS after the first event of a batch arrived, and writes whatever
+is still queued on shutdown.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+
+from .config import LOGIN_ACTIVITY_BATCH_SIZE, LOGIN_ACTIVITY_FLUSH_MS, LOGIN_ACTIVITY_QUEUE_SIZE
+from ..dao.login_activity_dao import LoginActivityDao
+
+logger = logging.getLogger(__name__)
+
+_queue: Optional[asyncio.Queue] = None
+_writer: Optional[asyncio.Task] = None
+
+
+def record_login_activity(user_id: int, login_status: str, ip_address: Optional[str], device_info: Optional[str]) -> bool:
+    """
+    Queue a login event for the writer without waiting for it to be stored
+    :param user_id: user who attempted to log in
+    :param login_status: "success" or "failed"
+    :param ip_address: client address
+    :param device_info: client user agent
+    :return: True if queued, False if the writer is not running or is too far behind
+    """
+    if _queue is None:
+        return False
+    try:
+        _queue.put_nowait({
+            "user_id": user_id,
+            "login_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            "login_status": login_status,
+            "ip_address": ip_address[:50] if ip_address else None,
+            "device_info": device_info[:255] if device_info else None,
+        })
+        return True
+    except asyncio.QueueFull:
+        # Dropping the record beats slowing logins down while the database catches up
+        return False
+
+
+def _insert_batch(activities: List[dict]) -> int:
+    # Imported here so the module can be used without a configured database
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return LoginActivityDao.insert_activities(activities, db)
+    finally:
+        db.close()
+
+
+async def _flush(activities: List[dict]) -> None:
+    try:
+        await run_in_threadpool(_insert_batch, activities)
+    except Exception:
+        logger.exception("Login activity write failed, dropped %d events", len(activities))
+
+
+async def run_login_activity_writer(queue: asyncio.Queue, batch_size: int, flush_interval: float) -> None:
+    """
+    Insert the queued login events in batches until a None is queued, then write what is left
+    :param queue: queue of LoginActivity column values, None stops the writer
+    :param batch_size: most events per insert
+    :param flush_interval: seconds a batch waits for more events once it has one
+    :return: None
+    """
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        activity = await queue.get()
+        if activity is None:
+            return
+        batch = [activity]
+        deadline = loop.time() + flush_interval
+        while len(batch) < batch_size:
+            try:
+                activity = queue.get_nowait() if queue.qsize() else \
+                    await asyncio.wait_for(queue.get(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+            if activity is None:
+                stopping = True
+                break
+            batch.append(activity)
+        await _flush(batch)
+
+
+def start_login_activity_writer() -> asyncio.Task:
+    """
+    Start accepting login events and the background writer storing them
+    :return: writer task
+    """
+    global _queue, _writer
+    _queue = asyncio.Queue(maxsize=LOGIN_ACTIVITY_QUEUE_SIZE)
+    _writer = asyncio.create_task(
+        run_login_activity_writer(_queue, LOGIN_ACTIVITY_BATCH_SIZE, LOGIN_ACTIVITY_FLUSH_MS / 1000))
+    return _writer
+
+
+async def stop_login_activity_writer() -> None:
+    """
+    Stop accepting login events and wait for the writer to store the queued ones
+    :return: None
+    """
+    global _queue, _writer
+    queue, writer = _queue, _writer
+    _queue, _writer = None, None
+    if writer is None or writer.done():
+        return
+    # Queued behind the pending events, so everything before it is written first
+    await queue.put(None)
+    await writer
@@ -0,0 +1,178 @@
+import os
+import math
+import time
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from botocore.exceptions import BotoCoreError, ClientError
+from typing import Dict, List, Optional, Tuple
+
+from .config import (LOGIN_THROTTLE_WINDOW, LOGIN_THROTTLE_ACCOUNT_LIMIT, LOGIN_THROTTLE_IP_LIMIT,
+                     LOGIN_THROTTLE_MAX_KEYS)
+from .dynamo_util import DynamoUtil, get_ddb_util
+
+logger = logging.getLogger(__name__)
+
+
+class LoginThrottle:
+    """
+    Sliding window limit on failed logins per account and per client address, checked before
+    the password is, so a burst of guesses is turned away without running bcrypt for each.
+    Failures are counted in fixed windows; the estimate weights the previous window by how much
+    of it still overlaps the sliding one, which keeps two counters per key instead of a log of
+    attempts. Counters live in an in-process LRU, or in a DynamoDB table shared by every worker.
+    """
+    def __init__(self, table_name: Optional[str] = None, window: float = LOGIN_THROTTLE_WINDOW,
+                 account_limit: int = LOGIN_THROTTLE_ACCOUNT_LIMIT, ip_limit: int = LOGIN_THROTTLE_IP_LIMIT,
+                 max_keys: int = LOGIN_THROTTLE_MAX_KEYS):
+        """
+        :param table_name: DynamoDB table of shared counters, None keeps them in-process
+        :param window: seconds of the sliding window
+        :param account_limit: failures per account within the window, 0 disables the account limit
+        :param ip_limit: failures per client address within the window, 0 disables the address limit
+        :param max_keys: in-process counters kept, least recently used ones are dropped past it
+        """
+        self.table_name = table_name
+        self.window = window
+        self.limits = {"account": account_limit, "ip": ip_limit}
+        self.max_keys = max_keys
+        # key -> {window index: failures}, holding the current and previous windows
+        self._counters: "OrderedDict[str, Dict[int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ddb_util: Optional[DynamoUtil] = None
+        self.checked = 0
+        self.rejected = {"account": 0, "ip": 0}
+        self.failures = 0
+
+    def _keys(self, email: str, ip_address: Optional[str]) -> List[Tuple[str, str]]:
+        # Hashed so the counters hold no emails or addresses
+        values = {"account": email.strip().lower(), "ip": ip_address}
+        return [(kind, f"{kind}:{hashlib.sha256(value.encode()).hexdigest()[:32]}")
+                for kind, value in values.items() if value and self.limits[kind] > 0]
+
+    def _get_ddb_util(self) -> DynamoUtil:
+        if self._ddb_util is None:
+            self._ddb_util = get_ddb_util()
+        return self._ddb_util
+
+    def _get_counts(self, keys: List[str], current: int) -> Dict[str, Tuple[int, int]]:
+        """
+        :return: (previous window, current window) failures of each key
+        """
+        if self.table_name:
+            try:
+                items = self._get_ddb_util().batch_get_items(
+                    self.table_name, "ThrottleKey", [f"{key}#{index}" for key in keys for index in (current - 1, current)])
+            except (BotoCoreError, ClientError):
+                # Throttling only sheds load, an unavailable table lets logins through
+                logger.warning(f"Failed to read login throttle table {self.table_name}", exc_info=True)
+                items = []
+            found = {item["ThrottleKey"]: int(item["Failures"]) for item in items}
+            return {key: (found.get(f"{key}#{current - 1}", 0), found.get(f"{key}#{current}", 0)) for key in keys}
+
+        with self._lock:
+            counts = {}
+            for key in keys:
+                windows = self._counters.get(key, {})
+                counts[key] = (windows.get(current - 1, 0), windows.get(current, 0))
+            return counts
+
+    def _add_failure(self, keys: List[str], current: int) -> None:
+        if self.table_name:
+            # Kept until the window after it has ended, when it no longer counts
+            expires_at = int((current + 2) * self.window) + 1
+            try:
+                for key in keys:
+                    self._get_ddb_util().increment(self.table_name, "ThrottleKey", f"{key}#{current}", "Failures", expires_at)
+            except (BotoCoreError, ClientError):
+                logger.warning(f"Failed to write login throttle table {self.table_name}", exc_info=True)
+            return
+
+        with self._lock:
+            for key in keys:
+                windows = self._counters.setdefault(key, {})
+                for index in [index for index in windows if index < current - 1]:
+                    del windows[index]
+                windows[current] = windows.get(current, 0) + 1
+                self._counters.move_to_end(key)
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+
+    def _retry_after(self, limit: int, previous: int, current: int, elapsed: float) -> int:
+        """
+        Seconds until the estimate drops below the limit, assuming no further failures
+        """
+        if current >= limit:
+            # Once the current window becomes the previous one, its weight has to fall far enough
+            wait = self.window - elapsed + self.window * (1 - limit / current)
+        else:
+            wait = self.window * (1 - (limit - current) / previous) - elapsed
+        # Whole seconds past the point where the estimate equals the limit
+        return max(math.floor(wait) + 1, 1)
+
+    def check(self, email: str, ip_address: Optional[str]) -> Optional[int]:
+        """
+        Check a login attempt against the failure limits
+        :param email: submitted username
+        :param ip_address: client address
+        :return: seconds to wait before trying again if the attempt is throttled, None if it may proceed
+        """
+        keys = self._keys(email, ip_address)
+        self.checked += 1
+        if not keys:
+            return None
+
+        now = time.time()
+        current, elapsed = int(now // self.window), now % self.window
+        counts = self._get_counts([key for _, key in keys], current)
+        for kind, key in keys:
+            previous, failures = counts[key]
+            estimate = previous * (1 - elapsed / self.window) + failures
+            if estimate >= self.limits[kind]:
+                self.rejected[kind] += 1
+                return self._retry_after(self.limits[kind], previous, failures, elapsed)
+        return None
+
+    def record_failure(self, email: str, ip_address: Optional[str]) -> None:
+        """
+        Count a failed login against the account and the client address
+        :param email: submitted username
+        :param ip_address: client address
+        :return: None
+        """
+        keys = self._keys(email, ip_address)
+        self.failures += 1
+        if keys:
+            self._add_failure([key for _, key in keys], int(time.time() // self.window))
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "rejected_account": self.rejected["account"],
+            "rejected_ip": self.rejected["ip"],
+            "failures": self.failures,
+            "tracked_keys": len(self._counters),
+            "shared": bool(self.table_name),
+        }
+
+    def create_table(self, ddb_util: DynamoUtil) -> None:
+        """
+        Create the shared table if one is configured, letting TTL remove expired counters
+        :param ddb_util: DynamoDB utility instance
+        :return: None
+        """
+        if self.table_name:
+            ddb_util.create_table(
+                table_name=self.table_name,
+                attribute_definitions=[{"AttributeName": "ThrottleKey", "AttributeType": "S"}],
+                key_schema=[{"AttributeName": "ThrottleKey", "KeyType": "HASH"}])
+            ddb_util.enable_ttl(self.table_name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+# Shared by every request in this process
+login_throttle = LoginThrottle(table_name=os.getenv("DYNAMODB_LOGIN_THROTTLE_TABLE"))
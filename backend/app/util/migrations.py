@@ -0,0 +1,200 @@
+"""
+Versioned schema migrations for deployments created before a model change.
+
+Base.metadata.create_all creates missing tables but never alters existing ones, so
+columns, keys and indexes added to existing tables are applied here. Run from the
+backend directory with the MySQL environment variables set:
+
+    python -m app.util.migrations            # apply pending migrations
+    python -m app.util.migrations --status   # list applied and pending migrations
+
+Each migration runs once and is recorded in the schema_migrations table. Every step
+also checks the live schema first, so databases created from the current models,
+which already have the final schema, simply record the migrations as applied.
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+from sqlalchemy import (Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, select,
+                        func, update, delete, text)
+from sqlalchemy.engine import Connection, Engine
+
+from .gtin import to_gtin
+from .models import Base, Product, user_product_association
+
+BACKFILL_BATCH_SIZE = 1000
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _columns(conn: Connection, table_name: str) -> List[str]:
+    return [column["name"] for column in inspect(conn).get_columns(table_name)]
+
+
+def _add_column(conn: Connection, table_name: str, column_ddl: str) -> None:
+    column_name = column_ddl.split()[0]
+    if column_name not in _columns(conn, table_name):
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+
+
+def add_product_gtin(conn: Connection) -> None:
+    """
+    Add products.gtin and fill it from code, in batches
+    """
+    _add_column(conn, "products", "gtin BIGINT NULL")
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(Product.product_id, Product.code)
+            .where(Product.gtin.is_(None), Product.product_id > last_id)
+            .order_by(Product.product_id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        gtins = [{"id": product_id, "value": to_gtin(code)} for product_id, code in rows if to_gtin(code) is not None]
+        if gtins:
+            conn.execute(update(Product).where(Product.product_id == bindparam("id")).values(gtin=bindparam("value")), gtins)
+        last_id = rows[-1].product_id
+
+
+def add_product_recall_checked_at(conn: Connection) -> None:
+    """
+    Add products.recall_checked_at, left empty so every stored recall flag is rechecked once
+    """
+    _add_column(conn, "products", "recall_checked_at BIGINT NULL")
+
+
+def merge_duplicate_products(conn: Connection) -> None:
+    """
+    Merge products sharing a GTIN into the oldest one, moving their pantry entries to it
+    """
+    duplicated = select(Product.gtin).where(Product.gtin.is_not(None)).group_by(Product.gtin) \
+        .having(func.count() > 1).subquery()
+    rows = conn.execute(
+        select(Product.gtin, Product.product_id)
+        .where(Product.gtin.in_(select(duplicated.c.gtin)))
+        .order_by(Product.gtin, Product.product_id)
+    ).all()
+
+    keepers = {}
+    for gtin, product_id in rows:
+        keeper = keepers.setdefault(gtin, product_id)
+        if product_id == keeper:
+            continue
+        # Duplicate pantry entries this creates are removed when user_product gets its key
+        conn.execute(update(user_product_association)
+                     .where(user_product_association.c.product_id == product_id)
+                     .values(product_id=keeper))
+        conn.execute(delete(Product).where(Product.product_id == product_id))
+
+
+def add_user_product_keys(conn: Connection) -> None:
+    """
+    Rebuild user_product with the composite primary key and reverse index, dropping duplicate rows.
+    Adding a primary key in place is not portable, so the rows are copied into a new table.
+    """
+    if inspect(conn).get_pk_constraint("user_product").get("constrained_columns"):
+        return
+
+    # The foreign keys of the new table need the referenced tables in its metadata
+    metadata = MetaData()
+    metadata.reflect(bind=conn, only=["users", "products"])
+    new_table = user_product_association.to_metadata(metadata, name="user_product_new")
+    new_table.create(bind=conn)
+
+    old_table = Table("user_product", MetaData(), autoload_with=conn)
+    conn.execute(new_table.insert().from_select(
+        ["user_id", "product_id"],
+        select(old_table.c.user_id, old_table.c.product_id)
+        .where(old_table.c.user_id.is_not(None), old_table.c.product_id.is_not(None))
+        .distinct()
+    ))
+    old_table.drop(bind=conn)
+    conn.execute(text("ALTER TABLE user_product_new RENAME TO user_product"))
+
+
+def make_product_gtin_unique(conn: Connection) -> None:
+    """
+    Replace the plain GTIN index with a unique one
+    """
+    for index in inspect(conn).get_indexes("products"):
+        if index["column_names"] == ["gtin"]:
+            if index["unique"]:
+                return
+            conn.execute(text(f"DROP INDEX {index['name']} ON products") if conn.dialect.name == "mysql"
+                         else text(f"DROP INDEX {index['name']}"))
+    conn.execute(text("CREATE UNIQUE INDEX ix_products_gtin ON products (gtin)"))
+
+
+def add_user_pantry_version(conn: Connection) -> None:
+    """
+    Add users.pantry_version, starting every pantry at version 0
+    """
+    _add_column(conn, "users", "pantry_version BIGINT NOT NULL DEFAULT 0")
+
+
+# Applied in order, never renumber or remove a released migration
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "add products.gtin", add_product_gtin),
+    (2, "add products.recall_checked_at", add_product_recall_checked_at),
+    (3, "merge products sharing a GTIN", merge_duplicate_products),
+    (4, "add user_product primary key and reverse index", add_user_product_keys),
+    (5, "make products.gtin unique", make_product_gtin_unique),
+    (6, "add users.pantry_version", add_user_pantry_version),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    schema_migrations.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return [row.version for row in conn.execute(select(schema_migrations.c.version))]
+
+
+def migrate(engine: Engine) -> List[str]:
+    """
+    Create missing tables, then apply pending migrations in order, each in its own transaction
+    :param engine: database engine
+    :return: names of the migrations applied
+    """
+    Base.metadata.create_all(bind=engine)
+    done = set(applied_versions(engine))
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        # MySQL commits DDL implicitly, which is why every step checks the live schema first
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc).replace(tzinfo=None)))
+        applied.append(name)
+    return applied
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    args = parser.parse_args(argv)
+
+    # Imported here so the module can be used without a configured database
+    from .database import engine
+
+    if args.status:
+        done = set(applied_versions(engine))
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:>4}  {'applied' if version in done else 'pending':<8} {name}")
+        return
+
+    applied = migrate(engine)
+    print("\n".join(f"applied: {name}" for name in applied) or "schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,25 @@
-from sqlalchemy import Column, String, Integer, TIMESTAMP, BigInteger, ForeignKey, Enum, Text, Table, Boolean
+from sqlalchemy import Column, String, Integer, TIMESTAMP, BigInteger, ForeignKey, Enum, Text, Table, Boolean, Index
 from sqlalchemy.sql.expression import text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
-# Association table
+# SQLite only autoincrements INTEGER primary keys, MySQL keeps BIGINT
+BigIntegerPK = BigInteger().with_variant(Integer, "sqlite")
+
+# Association table, the reverse index serves "who has this product" and the product foreign key
 user_product_association = Table(
     'user_product', Base.metadata,
-    Column('user_id', BigInteger, ForeignKey('users.user_id')),
-    Column('product_id', BigInteger, ForeignKey('products.product_id'))
+    Column('user_id', BigInteger, ForeignKey('users.user_id'), primary_key=True),
+    Column('product_id', BigInteger, ForeignKey('products.product_id'), primary_key=True),
+    Index('ix_user_product_product_id', 'product_id'),
 )
 
 class User(Base):
     __tablename__ = "users"
 
-    user_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     zip_code = Column(String(10), nullable=False)
@@ -26,6 +30,9 @@ class User(Base):
     general_diet = Column(String(50), nullable=True, default="na")
     religious_cultural_diets = Column(String(50), nullable=True, default="na")
     allergens = Column(String(500), nullable=True, default="na")  # Comma-separated
+
+    # Bumped by every change to the user's products, served as the ETag of GET /products
+    pantry_version = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
     
     created_at = Column(TIMESTAMP(timezone=True), server_default=text("CURRENT_TIMESTAMP"), nullable=False)
     updated_at = Column(
@@ -48,13 +55,19 @@ class User(Base):
         back_populates="users"
     )
 
+    # Relationship with pantry_changes table
+    pantry_changes = relationship("PantryChange", cascade="all, delete-orphan")
+
+    # Relationship with recall_alerts table
+    recall_alerts = relationship("RecallAlert", cascade="all, delete-orphan")
+
     def __repr__(self):
         return f"<User(user_id={self.user_id}, first_name='{self.first_name}', last_name='{self.last_name}', email='{self.email}')>"
 
 class LoginActivity(Base):
     __tablename__ = "login_activities"
 
-    login_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    login_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
     login_at = Column(TIMESTAMP, nullable=False)
     login_status = Column(Enum("success", "failed", name="login_status_enum"), nullable=False)
@@ -67,7 +80,7 @@ class LoginActivity(Base):
 class Newsletter(Base):
     __tablename__ = "newsletters"
 
-    newsletter_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    newsletter_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     type = Column(Enum("food_recall", "expiration_notice", name="newsletter_type_enum"), nullable=False)
@@ -83,7 +96,7 @@ class Newsletter(Base):
 class Subscription(Base):
     __tablename__ = "subscriptions"
     user_id = Column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
-    subscription_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    subscription_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     zip_code = Column(String(10), nullable=False)
     email = Column(String(255), nullable=False)
     state = Column(String(100), nullable=False)
@@ -102,11 +115,13 @@ class Subscription(Base):
 
 class Product(Base):
     __tablename__ = "products"
-    product_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    product_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     code = Column(String(50), nullable=False)
+    gtin = Column(BigInteger, nullable=True, unique=True, index=True)  # Canonical GTIN-14 of code
     name = Column(String(255), nullable=False)
     brand = Column(String(255), nullable=False)
     recall = Column(Boolean, default=False)
+    recall_checked_at = Column(BigInteger, nullable=True)  # Timestamp (ms) of the recall run the recall flag reflects
 
     # Relationship with User Table
     users = relationship(
@@ -116,4 +131,59 @@ class Product(Base):
     )
 
     def __repr__(self):
-        return f"<ProductInfo(code={self.code}, name={self.name}, brand={self.brand}, recall={self.recall})>"
\ No newline at end of file
+        return f"<ProductInfo(code={self.code}, name={self.name}, brand={self.brand}, recall={self.recall})>"
+
+class PantryChange(Base):
+    """
+    Product added to or removed from a user's pantry, by pantry version.
+    Serves the delta mode of GET /products, only the latest versions are kept.
+    """
+    __tablename__ = "pantry_changes"
+    user_id = Column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, primary_key=True, autoincrement=False)
+    product_id = Column(BigInteger, ForeignKey("products.product_id"), primary_key=True, autoincrement=False)
+    added = Column(Boolean, nullable=False)
+
+    def __repr__(self):
+        return f"<PantryChange(user_id={self.user_id}, version={self.version}, product_id={self.product_id}, added={self.added})>"
+
+class RecallSweep(Base):
+    """
+    Recall run whose new recalls have been applied to the products table
+    """
+    __tablename__ = "recall_sweeps"
+    run_time = Column(BigInteger, primary_key=True, autoincrement=False)  # Timestamp (ms) of the recall run
+    swept_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"), nullable=False)
+    products_flagged = Column(Integer, nullable=False, default=0)
+    users_affected = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RecallSweep(run_time={self.run_time}, products_flagged={self.products_flagged}, users_affected={self.users_affected})>"
+
+class RecallAlert(Base):
+    """
+    Pantry product found recalled by a recall sweep, one row per user holding it
+    """
+    __tablename__ = "recall_alerts"
+    user_id = Column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    product_id = Column(BigInteger, ForeignKey("products.product_id"), primary_key=True, autoincrement=False)
+    run_time = Column(BigInteger, primary_key=True, autoincrement=False)  # Timestamp (ms) of the recall run
+    created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"), nullable=False)
+
+    def __repr__(self):
+        return f"<RecallAlert(user_id={self.user_id}, product_id={self.product_id}, run_time={self.run_time})>"
+
+class CatalogProduct(Base):
+    """
+    Local copy of the OpenFoodFacts catalog, imported from its data dump
+    """
+    __tablename__ = "catalog_products"
+    gtin = Column(BigInteger, primary_key=True, autoincrement=False)  # Canonical GTIN-14 of code
+    code = Column(String(50), nullable=False)
+    name = Column(String(255), nullable=False)
+    brand = Column(String(255), nullable=False)
+    allergens = Column(String(500), nullable=True)  # Comma-separated allergen tags, e.g. "en:milk,en:gluten"
+    last_modified = Column(BigInteger, nullable=True, index=True)  # OpenFoodFacts last_modified_t, drives delta imports
+
+    def __repr__(self):
+        return f"<CatalogProduct(code={self.code}, name={self.name}, brand={self.brand})>"
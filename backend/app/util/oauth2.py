@@ -1,11 +1,17 @@
 import jwt
 from dotenv import load_dotenv
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from datetime import datetime, timedelta, timezone
 from ..util.schemas import TokenData
+from ..util.config import JWT_CACHE_SIZE
 
 # Load environment variables
 load_dotenv()
@@ -14,6 +20,48 @@ load_dotenv()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
+class JwtKeys(NamedTuple):
+    secret_key: str
+    algorithm: str
+    expire_minutes: int
+
+
+_jwt_keys: Optional[JwtKeys] = None
+
+# Verified tokens by digest, most recently used last: digest -> (token data, exp)
+_token_cache: "OrderedDict[bytes, Tuple[TokenData, Optional[float]]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def load_jwt_keys() -> JwtKeys:
+    """
+    Read the JWT signing settings from the environment, forgetting the tokens verified with the previous ones.
+    Called once at startup, and on first use if the app was not started through its lifespan.
+    :return: JWT signing settings
+    """
+    global _jwt_keys
+    expire_time = os.getenv("EXPIRE_TIME")
+    _jwt_keys = JwtKeys(os.getenv("SECRET_KEY"), os.getenv("ALGORITHM"), int(expire_time) if expire_time else None)
+    clear_token_cache()
+    return _jwt_keys
+
+
+def get_jwt_keys() -> JwtKeys:
+    """
+    Get the JWT signing settings, loading them on first use
+    :return: JWT signing settings
+    """
+    return _jwt_keys or load_jwt_keys()
+
+
+def clear_token_cache() -> None:
+    """
+    Forget every verified token
+    """
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
 def create_access_token(source_data: dict, expire_delta: timedelta = None):
     """
     Create an access JWT token
@@ -30,32 +78,86 @@ def create_access_token(source_data: dict, expire_delta: timedelta = None):
     if expire_delta:
         expire_time = datetime.now(timezone.utc) + expire_delta
     else:
-        expire_time = datetime.now(timezone.utc) + timedelta(minutes=int(os.getenv("EXPIRE_TIME")))
+        expire_time = datetime.now(timezone.utc) + timedelta(minutes=get_jwt_keys().expire_minutes)
 
     # Update the payload with the expiration time
     to_encode.update({"exp": expire_time})
 
     # Create the JWT token
-    encoded_jwt = jwt.encode(to_encode, os.getenv("SECRET_KEY"), algorithm=os.getenv("ALGORITHM"))
+    keys = get_jwt_keys()
+    encoded_jwt = jwt.encode(to_encode, keys.secret_key, algorithm=keys.algorithm)
 
     return encoded_jwt
 
 
+def _get_cached_token(digest: bytes) -> Optional[TokenData]:
+    """
+    Get the data of a token verified before, if it has not expired since
+    :param digest: SHA-256 digest of the token
+    :return: token data, None if the token is not cached or has expired
+    """
+    with _token_cache_lock:
+        entry = _token_cache.get(digest)
+        if entry is None:
+            return None
+        token_data, exp = entry
+        if exp is not None and exp <= time.time():
+            # Decoded again so the expiry is reported the same way as for an uncached token
+            del _token_cache[digest]
+            return None
+        _token_cache.move_to_end(digest)
+        return token_data
+
+
+def _cache_token(digest: bytes, token_data: TokenData, exp: Optional[float]) -> None:
+    """
+    Remember a verified token, evicting the least recently used ones past JWT_CACHE_SIZE
+    :param digest: SHA-256 digest of the token
+    :param token_data: data embedded in the token
+    :param exp: expiration timestamp of the token, None if it never expires
+    """
+    with _token_cache_lock:
+        _token_cache[digest] = (token_data, exp)
+        _token_cache.move_to_end(digest)
+        while len(_token_cache) > JWT_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
 def validate_access_token(token: str, credential_exception):
+    """
+    Validate an access JWT token. Tokens verified before are served from a bounded
+    cache until they expire instead of checking their signature again.
+    :param token: encoded JWT token
+    :param credential_exception: exception raised if the token is invalid
+    :return: data embedded in the token
+    """
+    # Keyed by digest so the cache holds no usable tokens, only verified ones are cached
+    digest = hashlib.sha256(token.encode()).digest()
+    if JWT_CACHE_SIZE > 0:
+        token_data = _get_cached_token(digest)
+        if token_data is not None:
+            return token_data
+
     try:
         # Decode the token
-        payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=os.getenv("ALGORITHM"))
+        keys = get_jwt_keys()
+        payload = jwt.decode(token, keys.secret_key, algorithms=[keys.algorithm])
 
         # Check if the payload contains the required fields
         user_id = payload.get("user_id")
         if not user_id:
             raise credential_exception
 
-        return TokenData(user_id=user_id)
+        token_data = TokenData(user_id=user_id)
 
     except jwt.exceptions.InvalidTokenError:
         raise credential_exception
 
+    if JWT_CACHE_SIZE > 0:
+        exp = payload.get("exp")
+        _cache_token(digest, token_data, float(exp) if exp is not None else None)
+    return token_data
+
 
 
 def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
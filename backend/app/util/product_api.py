@@ -1,56 +1,33 @@
-import requests
-from requests_oauthlib import OAuth1
+import httpx
+from urllib.parse import urlencode
+from oauthlib.oauth1 import Client as OAuth1Client
 from .schemas import ProductInfo, Barcode, ProductError
 from .config import OPENFOOD_API_URL, NUTRITIONIX_API_URL, NUTRITIONIX_HEADERS, UNKNOWN_PLACEHOLDER, FATSECRET_KEY_OAUTH1, FATSECRET_SECRET_OAUTH1, FATSECRET_BASE_URL
 
-def get_nutritionix_info(barcode: Barcode):
-
-    nutritionix_params = {
-        "upc": barcode.code
-    }
-    product_response = requests.get(url=NUTRITIONIX_API_URL, headers=NUTRITIONIX_HEADERS, params=nutritionix_params)
 
+def _parse_nutritionix_response(barcode: Barcode, product_response):
     if product_response.status_code == 200:
         product_json = product_response.json()
         return ProductInfo(
-            code=barcode.code, 
-            name=product_json['foods'][0].get('food_name', UNKNOWN_PLACEHOLDER), 
-            brand=product_json['foods'][0].get('brand_name', UNKNOWN_PLACEHOLDER), 
+            code=barcode.code,
+            name=product_json['foods'][0].get('food_name', UNKNOWN_PLACEHOLDER),
+            brand=product_json['foods'][0].get('brand_name', UNKNOWN_PLACEHOLDER),
             recall=False)
-    
-    return ProductError(code=barcode.code, status_code=product_response.status_code)
 
-def get_openfoodfact_info(barcode: Barcode):
+    return ProductError(code=barcode.code, status_code=product_response.status_code)
 
-    product_response = requests.get(f"{OPENFOOD_API_URL}{barcode.code}.json")
-    
+def _parse_openfoodfact_response(barcode: Barcode, product_response):
     if product_response.status_code == 200:
         product_json = product_response.json()
         return ProductInfo(
-            code=barcode.code, 
-            name=product_json['product'].get('product_name', UNKNOWN_PLACEHOLDER), 
-            brand=product_json['product'].get('brands', UNKNOWN_PLACEHOLDER), 
+            code=barcode.code,
+            name=product_json['product'].get('product_name', UNKNOWN_PLACEHOLDER),
+            brand=product_json['product'].get('brands', UNKNOWN_PLACEHOLDER),
             recall=False)
-    
-    return ProductError(code=barcode.code, status_code=product_response.status_code)
-
 
-def get_fatsecret_info(barcode: Barcode):
-    """
-    Look up a food via FatSecret 'food.search' using the barcode text as the query.
-    Mirrors the shape of other helpers: returns ProductInfo | ProductError.
-    """
-    # Build OAuth1 auth
-    auth = OAuth1(FATSECRET_KEY_OAUTH1, FATSECRET_SECRET_OAUTH1)
-    url = f"{FATSECRET_BASE_URL}/food.search"
-    params = {"search_expression": barcode.code, "format": "json"}
-
-    try:
-        resp = requests.get(url, auth=auth, params=params, timeout=10)
-    except requests.RequestException:
-        # Network or auth failure → treat as backend error
-        return ProductError(code=barcode.code, status_code=500)
+    return ProductError(code=barcode.code, status_code=product_response.status_code)
 
+def _parse_fatsecret_response(barcode: Barcode, resp):
     if resp.status_code != 200:
         return ProductError(code=barcode.code, status_code=resp.status_code)
 
@@ -72,7 +49,35 @@ def get_fatsecret_info(barcode: Barcode):
     except Exception:
         # Malformed JSON or structure mismatch
         return ProductError(code=barcode.code, status_code=500)
-    
 
 
-    
\ No newline at end of file
+# Used by the resolution engine, sharing one pooled client
+
+async def fetch_nutritionix_info(client: httpx.AsyncClient, barcode: Barcode):
+    try:
+        product_response = await client.get(NUTRITIONIX_API_URL, headers=NUTRITIONIX_HEADERS, params={"upc": barcode.code})
+    except httpx.HTTPError:
+        return ProductError(code=barcode.code, status_code=500)
+    return _parse_nutritionix_response(barcode, product_response)
+
+async def fetch_openfoodfact_info(client: httpx.AsyncClient, barcode: Barcode):
+    try:
+        product_response = await client.get(f"{OPENFOOD_API_URL}{barcode.code}.json")
+    except httpx.HTTPError:
+        return ProductError(code=barcode.code, status_code=500)
+    return _parse_openfoodfact_response(barcode, product_response)
+
+async def fetch_fatsecret_info(client: httpx.AsyncClient, barcode: Barcode):
+    """
+    Async FatSecret 'food.search' lookup. The request is signed with OAuth1 directly
+    since requests_oauthlib only plugs into requests.
+    """
+    params = urlencode({"search_expression": barcode.code, "format": "json"})
+    oauth_client = OAuth1Client(FATSECRET_KEY_OAUTH1, client_secret=FATSECRET_SECRET_OAUTH1)
+    try:
+        url, headers, _ = oauth_client.sign(f"{FATSECRET_BASE_URL}/food.search?{params}")
+        resp = await client.get(url, headers=headers)
+    except (httpx.HTTPError, ValueError):
+        # Network or auth failure → treat as backend error
+        return ProductError(code=barcode.code, status_code=500)
+    return _parse_fatsecret_response(barcode, resp)
@@ -0,0 +1,160 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from botocore.exceptions import BotoCoreError, ClientError
+from typing import Dict, Iterable, Optional, Tuple
+
+from .config import PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL, PRODUCT_CACHE_NEGATIVE_TTL
+from .dynamo_util import DynamoUtil
+from .schemas import ProductInfo
+
+logger = logging.getLogger(__name__)
+
+
+class CachedProduct:
+    """
+    Provider answer for one GTIN. A negative entry records that no provider knows the barcode.
+    """
+    __slots__ = ("name", "brand", "expires_at")
+
+    def __init__(self, name: Optional[str], brand: Optional[str], expires_at: float):
+        self.name = name
+        self.brand = brand
+        self.expires_at = expires_at
+
+    @property
+    def found(self) -> bool:
+        return self.name is not None
+
+    def to_product_info(self, code: str) -> ProductInfo:
+        return ProductInfo(code=code, name=self.name, brand=self.brand, recall=False)
+
+
+class ProductCache:
+    """
+    Two tier cache of external product API answers keyed by canonical GTIN-14.
+    An in-process LRU answers repeated scans on one worker; a DynamoDB table shared by
+    every worker answers the rest, so a barcode is resolved externally at most once per TTL.
+    Unknown barcodes are cached too, with their own, usually shorter, TTL.
+    Entries carry an absolute expiry (epoch seconds) that doubles as the DynamoDB TTL attribute.
+    """
+    def __init__(self, table_name: Optional[str] = None, size: int = PRODUCT_CACHE_SIZE,
+                 ttl: float = PRODUCT_CACHE_TTL, negative_ttl: float = PRODUCT_CACHE_NEGATIVE_TTL):
+        """
+        :param table_name: DynamoDB table of the shared tier, None keeps the cache in-process only
+        :param size: maximum entries kept in the in-process tier, 0 disables it
+        :param ttl: seconds a found product is cached
+        :param negative_ttl: seconds an unknown barcode is cached, 0 disables negative caching
+        """
+        self.table_name = table_name
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[int, CachedProduct]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_local(self, gtin: int, now: float) -> Optional[CachedProduct]:
+        with self._lock:
+            entry = self._entries.get(gtin)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                del self._entries[gtin]
+                return None
+            self._entries.move_to_end(gtin)
+            return entry
+
+    def _put_local(self, gtin: int, entry: CachedProduct) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[gtin] = entry
+            self._entries.move_to_end(gtin)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def get_many(self, gtins: Iterable[int], ddb_util: DynamoUtil) -> Dict[int, CachedProduct]:
+        """
+        Look up cached answers, in-process first and then one batched read of the shared tier
+        :param gtins: canonical GTIN-14 integers
+        :param ddb_util: DynamoDB utility instance
+        :return: unexpired entries keyed by GTIN, positive and negative
+        """
+        now = time.time()
+        found: Dict[int, CachedProduct] = {}
+        missing = []
+        for gtin in dict.fromkeys(gtins):
+            entry = self._get_local(gtin, now)
+            if entry is not None:
+                found[gtin] = entry
+            else:
+                missing.append(gtin)
+
+        if missing and self.table_name:
+            try:
+                items = ddb_util.batch_get_items(self.table_name, "GTIN", missing)
+            except (BotoCoreError, ClientError):
+                # The cache only saves provider calls, an unavailable shared tier is a miss
+                logger.warning(f"Failed to read product cache table {self.table_name}", exc_info=True)
+                items = []
+            for item in items:
+                # DynamoDB deletes expired items lazily, so check the expiry ourselves
+                if item["ExpiresAt"] <= now:
+                    continue
+                entry = CachedProduct(item.get("Name"), item.get("Brand"), float(item["ExpiresAt"]))
+                found[int(item["GTIN"])] = entry
+                self._put_local(int(item["GTIN"]), entry)
+        return found
+
+    def put_many(self, answers: Iterable[Tuple[int, Optional[ProductInfo]]], ddb_util: DynamoUtil) -> None:
+        """
+        Cache provider answers in both tiers
+        :param answers: (GTIN, product info) pairs, None product info marks an unknown barcode
+        :param ddb_util: DynamoDB utility instance
+        :return: None
+        """
+        now = time.time()
+        items = []
+        for gtin, product_info in answers:
+            if product_info is None:
+                if self.negative_ttl <= 0:
+                    continue
+                entry = CachedProduct(None, None, now + self.negative_ttl)
+            else:
+                entry = CachedProduct(product_info.name, product_info.brand, now + self.ttl)
+            self._put_local(gtin, entry)
+
+            item = {"GTIN": gtin, "ExpiresAt": int(entry.expires_at)}
+            if entry.found:
+                item["Name"] = entry.name
+                item["Brand"] = entry.brand
+            items.append(item)
+
+        if items and self.table_name:
+            try:
+                ddb_util.batch_put(self.table_name, items)
+            except (BotoCoreError, ClientError):
+                logger.warning(f"Failed to write product cache table {self.table_name}", exc_info=True)
+
+    def create_table(self, ddb_util: DynamoUtil) -> None:
+        """
+        Create the shared table if one is configured, letting TTL remove expired items
+        :param ddb_util: DynamoDB utility instance
+        :return: None
+        """
+        if self.table_name:
+            ddb_util.create_table(
+                table_name=self.table_name,
+                attribute_definitions=[{"AttributeName": "GTIN", "AttributeType": "N"}],
+                key_schema=[{"AttributeName": "GTIN", "KeyType": "HASH"}])
+            ddb_util.enable_ttl(self.table_name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every request in this process
+product_cache = ProductCache(table_name=os.getenv("DYNAMODB_PRODUCT_CACHE_TABLE"))
@@ -0,0 +1,269 @@
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Callable, List, Optional, Union
+
+from .config import (PRODUCT_PROVIDER_TIMEOUTS, PRODUCT_PROVIDER_RETRIES, PRODUCT_RETRY_BUDGET_RATIO,
+                     PRODUCT_RETRY_BASE_DELAY, PRODUCT_RETRY_MAX_DELAY,
+                     PRODUCT_BREAKER_FAILURES, PRODUCT_BREAKER_COOLDOWN, PRODUCT_PROVIDER_WINDOW,
+                     PRODUCT_ADAPTIVE_ORDER, PRODUCT_ADAPTIVE_MIN_SAMPLES, PRODUCT_PROVIDER_RATE_LIMITS,
+                     PRODUCT_RATE_LIMIT_MAX_WAIT)
+from .schemas import Barcode, ProductInfo, ProductError, ProviderHealth
+from .rate_limiter import TokenBucket
+from .product_api import fetch_nutritionix_info, fetch_openfoodfact_info, fetch_fatsecret_info
+
+# Outcomes of a provider call
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Status returned without calling a provider whose circuit is open
+CIRCUIT_OPEN_STATUS = 503
+# Status returned without calling a provider whose rate limit is exhausted
+RATE_LIMITED_STATUS = 429
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after sustained failure.
+    The circuit opens after a run of consecutive failures; once the cooldown passes a single
+    trial call is let through, which closes the circuit on success or reopens it on failure.
+    """
+    def __init__(self, failure_threshold: int = PRODUCT_BREAKER_FAILURES, cooldown: float = PRODUCT_BREAKER_COOLDOWN):
+        """
+        :param failure_threshold: consecutive failures that open the circuit
+        :param cooldown: seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def available(self) -> bool:
+        """
+        Whether the provider is worth trying now, without claiming the half-open trial
+        """
+        return self.state != OPEN or time.monotonic() - self.opened_at >= self.cooldown
+
+    def acquire(self) -> bool:
+        """
+        Claim permission for one call
+        :return: True if the call may go ahead
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """
+        Give back a claimed call that finished without an outcome, e.g. when it was cancelled
+        """
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of calls so retries cannot multiply load on a struggling provider.
+    Every call deposits ratio tokens, every retry withdraws one.
+    """
+    def __init__(self, ratio: float = PRODUCT_RETRY_BUDGET_RATIO, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Provider:
+    """
+    Product API wrapped with a timeout, retries, rolling stats and a circuit breaker
+    """
+    def __init__(self, name: str, fetch: Callable, timeout: Optional[float] = None,
+                 retries: int = PRODUCT_PROVIDER_RETRIES, window: int = PRODUCT_PROVIDER_WINDOW,
+                 rate_limit: Optional[TokenBucket] = None, max_wait: float = PRODUCT_RATE_LIMIT_MAX_WAIT,
+                 retry_base_delay: float = PRODUCT_RETRY_BASE_DELAY, retry_max_delay: float = PRODUCT_RETRY_MAX_DELAY):
+        """
+        :param name: provider name used in stats
+        :param fetch: async function (client, barcode) -> ProductInfo | ProductError
+        :param timeout: seconds allowed per attempt, None relies on the HTTP client timeout
+        :param retries: retries allowed per lookup on errors, subject to the retry budget
+        :param window: number of recent calls the stats are computed over
+        :param rate_limit: token bucket every attempt must pass, None for no limit
+        :param max_wait: seconds an attempt queues on the rate limit before skipping the provider
+        :param retry_base_delay: seconds the first retry waits at most, doubling per retry
+        :param retry_max_delay: seconds any retry waits at most
+        """
+        self.name = name
+        self.fetch = fetch
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_limit = rate_limit
+        self.max_wait = max_wait
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker = CircuitBreaker()
+        self.retry_budget = RetryBudget()
+        self.outcomes = deque(maxlen=window)  # (outcome, latency seconds)
+
+    def record(self, outcome: str, latency: float) -> None:
+        self.outcomes.append((outcome, latency))
+        if outcome == ERROR:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    async def _attempt(self, client, barcode: Barcode) -> Union[ProductInfo, ProductError]:
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self.fetch(client, barcode), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            result = ProductError(code=barcode.code, status_code=504)
+        except asyncio.CancelledError:
+            # Lost a race, this says nothing about the provider's health
+            self.breaker.release()
+            raise
+        except Exception:
+            result = ProductError(code=barcode.code, status_code=500)
+
+        if isinstance(result, ProductInfo):
+            outcome = FOUND
+        elif result.status_code == 404:
+            outcome = NOT_FOUND
+        else:
+            outcome = ERROR
+        self.record(outcome, time.monotonic() - started)
+        return result
+
+    async def __call__(self, client, barcode: Barcode) -> Union[ProductInfo, ProductError]:
+        """
+        Look up a barcode, retrying errors while the retry budget allows.
+        Retries back off exponentially with full jitter, so lookups failing together do not retry in step.
+        :param client: pooled HTTP client
+        :param barcode: barcode to resolve
+        :return: product info, a 404 error if the provider does not know it, else the failure
+        """
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            # Over quota the lookup moves on to the next provider rather than drawing a 429
+            if self.rate_limit is not None and not await self.rate_limit.acquire(self.max_wait):
+                return ProductError(code=barcode.code, status_code=RATE_LIMITED_STATUS)
+            if not self.breaker.acquire():
+                return ProductError(code=barcode.code, status_code=CIRCUIT_OPEN_STATUS)
+            result = await self._attempt(client, barcode)
+            if isinstance(result, ProductInfo) or result.status_code == 404:
+                return result
+            if attempt >= self.retries or not self.retry_budget.withdraw():
+                return result
+            await asyncio.sleep(random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)))
+            attempt += 1
+
+    def _latencies(self) -> List[float]:
+        return sorted(latency for _, latency in self.outcomes)
+
+    def expected_cost(self) -> float:
+        """
+        Expected seconds spent on this provider per product it finds.
+        Ordering a fallback chain by latency over success probability minimises the expected
+        time to an answer. Both are smoothed so a new provider starts from an even prior.
+        """
+        calls = len(self.outcomes)
+        latency = sum(self._latencies()) / calls if calls else 0.0
+        found = sum(1 for outcome, _ in self.outcomes if outcome == FOUND)
+        return latency / ((found + 1) / (calls + 2))
+
+    def health(self) -> ProviderHealth:
+        calls = len(self.outcomes)
+        latencies = self._latencies()
+        errors = sum(1 for outcome, _ in self.outcomes if outcome == ERROR)
+        found = sum(1 for outcome, _ in self.outcomes if outcome == FOUND)
+        return ProviderHealth(
+            name=self.name,
+            state=self.breaker.state,
+            calls=calls,
+            success_rate=(calls - errors) / calls if calls else 1.0,
+            found_rate=found / calls if calls else 0.0,
+            avg_latency_ms=sum(latencies) / calls * 1000 if calls else 0.0,
+            p95_latency_ms=latencies[min(int(calls * 0.95), calls - 1)] * 1000 if calls else 0.0,
+            consecutive_failures=self.breaker.consecutive_failures,
+            retry_tokens=self.retry_budget.tokens,
+            expected_cost_ms=self.expected_cost() * 1000,
+            rate_limit=self.rate_limit.state() if self.rate_limit is not None else None,
+        )
+
+
+class ProviderRegistry:
+    """
+    Product providers in their configured priority order
+    """
+    def __init__(self, providers: List[Provider], adaptive: bool = PRODUCT_ADAPTIVE_ORDER,
+                 min_samples: int = PRODUCT_ADAPTIVE_MIN_SAMPLES):
+        """
+        :param providers: providers in fallback priority order
+        :param adaptive: reorder the chain by expected cost once every provider has enough samples
+        :param min_samples: calls per provider before its stats are trusted for ordering
+        """
+        self.providers = providers
+        self.adaptive = adaptive
+        self.min_samples = min_samples
+
+    def ordered(self) -> List[Provider]:
+        """
+        Providers in the order a lookup should try them. Providers with an open circuit are left out,
+        the rest keep their priority order until all have enough samples to be ordered by cost.
+        """
+        available = [provider for provider in self.providers if provider.breaker.available()]
+        if self.adaptive and all(len(provider.outcomes) >= self.min_samples for provider in available):
+            # sorted is stable, so equal costs keep their priority order
+            available = sorted(available, key=lambda provider: provider.expected_cost())
+        return available
+
+    def health(self) -> List[ProviderHealth]:
+        return [provider.health() for provider in self.providers]
+
+
+def _configured_provider(name: str, fetch: Callable) -> Provider:
+    rate, burst = PRODUCT_PROVIDER_RATE_LIMITS[name]
+    return Provider(name, fetch, timeout=PRODUCT_PROVIDER_TIMEOUTS[name],
+                    rate_limit=TokenBucket(rate, burst) if rate > 0 else None)
+
+
+# Shared by every request in this process
+provider_registry = ProviderRegistry([
+    _configured_provider("nutritionix", fetch_nutritionix_info),
+    _configured_provider("openfoodfacts", fetch_openfoodfact_info),
+    _configured_provider("fatsecret", fetch_fatsecret_info),
+])
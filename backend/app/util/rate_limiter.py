@@ -0,0 +1,82 @@
+import time
+import asyncio
+
+from .schemas import RateLimitState
+
+
+class TokenBucket:
+    """
+    Token bucket admitting calls at a sustained rate with bursts up to its capacity.
+    A caller that finds the bucket empty reserves the next token and sleeps until it is
+    refilled, so queued callers are admitted in arrival order. If the reservation would
+    take longer than the caller is willing to wait it is refused instead.
+    """
+    def __init__(self, rate: float, burst: int):
+        """
+        :param rate: tokens added per second
+        :param burst: bucket capacity, the largest burst admitted at once
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("Token bucket rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)  # Negative while callers are queued on reserved tokens
+        self.updated_at = time.monotonic()
+        self.waiting = 0
+        self.admitted = 0
+        self.delayed = 0
+        self.rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate, self.burst)
+        self.updated_at = now
+
+    def try_acquire(self, max_wait: float = 0) -> float:
+        """
+        Reserve a token without sleeping
+        :param max_wait: longest acceptable wait in seconds
+        :return: seconds to wait before the reserved token is usable, or -1 if refused
+        """
+        self._refill()
+        wait = max(1 - self.tokens, 0) / self.rate
+        if wait > max_wait:
+            self.rejected += 1
+            return -1
+        self.tokens -= 1
+        return wait
+
+    async def acquire(self, max_wait: float = 0) -> bool:
+        """
+        Take a token, queueing for at most max_wait seconds
+        :param max_wait: longest acceptable wait in seconds
+        :return: True if admitted, False if the call should skip this provider
+        """
+        wait = self.try_acquire(max_wait)
+        if wait < 0:
+            return False
+        if wait > 0:
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the reserved token back to the callers behind us
+                self.tokens += 1
+                raise
+            finally:
+                self.waiting -= 1
+            self.delayed += 1
+        self.admitted += 1
+        return True
+
+    def state(self) -> RateLimitState:
+        self._refill()
+        return RateLimitState(
+            rate=self.rate,
+            burst=self.burst,
+            tokens=max(self.tokens, 0),
+            waiting=self.waiting,
+            admitted=self.admitted,
+            delayed=self.delayed,
+            rejected=self.rejected,
+        )
@@ -0,0 +1,188 @@
+import os
+import math
+import time
+import hashlib
+import threading
+from typing import Optional, Iterable
+from fastapi import HTTPException
+
+from .config import RECALL_CACHE_MODE, RECALL_CACHE_CHECK_INTERVAL, RECALL_CACHE_BLOOM_ERROR_RATE, RECALL_SNAPSHOT_PATH
+from .dynamo_util import DynamoUtil
+from .gtin import to_gtin
+from .recall_snapshot import RecallSnapshot
+from ..dao.recalls_dao import RecallsDao
+
+
+class BloomFilter:
+    """
+    Fixed size Bloom filter over integer keys.
+    Answers "definitely absent" or "possibly present" in a fraction of the memory of a set.
+    """
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Size the filter for the expected number of keys
+        :param capacity: expected number of keys
+        :param error_rate: target false positive rate
+        """
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: int):
+        # Double hashing: derive k bit positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.to_bytes(8, "little"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, key: int) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RecallCache:
+    """
+    In-process copy of every recalled GTIN loaded from the recalls table.
+    The cache is reloaded only when the recall processor logs a newer successful run,
+    and that check itself runs at most once per check interval.
+    In snapshot mode the recall processor's binary snapshot is memory-mapped instead,
+    and it is remapped whenever the file is replaced.
+    """
+    def __init__(self, mode: str = RECALL_CACHE_MODE, check_interval: float = RECALL_CACHE_CHECK_INTERVAL,
+                 error_rate: float = RECALL_CACHE_BLOOM_ERROR_RATE, snapshot_path: Optional[str] = RECALL_SNAPSHOT_PATH):
+        """
+        :param mode: "set" for an exact set, "bloom" for a Bloom filter, "snapshot" for the mapped snapshot, "off" to disable
+        :param check_interval: seconds between checks for a newer recall run
+        :param error_rate: false positive rate of the Bloom filter
+        :param snapshot_path: path of the recall snapshot used in snapshot mode
+        """
+        if mode not in ("set", "bloom", "snapshot", "off"):
+            raise ValueError(f"Invalid recall cache mode: {mode}")
+        if mode == "snapshot" and not snapshot_path:
+            raise ValueError("RECALL_SNAPSHOT_PATH must be set to use the snapshot recall cache")
+        self.mode = mode
+        self.check_interval = check_interval
+        self.error_rate = error_rate
+        self.snapshot_path = snapshot_path
+        self.gtins = None
+        self.version = None  # Timestamp of the loaded recall run, or signature of the mapped snapshot
+        self.checked_at = 0.0
+        self.run_time = None  # Timestamp of the latest successful recall run seen
+        self.run_checked_at = None
+        self._lock = threading.Lock()
+
+    def _build(self, gtins: Iterable[int]):
+        if self.mode == "set":
+            return set(gtins)
+        gtins = list(gtins)
+        bloom = BloomFilter(len(gtins), self.error_rate)
+        for gtin in gtins:
+            bloom.add(gtin)
+        return bloom
+
+    def _latest_version(self, ddb_util: DynamoUtil) -> Optional[int]:
+        try:
+            # Logged with a fractional part, stored on products as whole milliseconds like the sweep's run_time
+            return int(RecallsDao.get_update_time(ddb_util).time_ms)
+        except HTTPException:
+            # No successful recall run logged yet
+            return None
+
+    def latest_run_time(self, ddb_util: DynamoUtil) -> Optional[int]:
+        """
+        Timestamp of the latest successful recall run, looked up at most once per check interval.
+        In set and bloom modes this is the run the cache was loaded from, so recall checks made
+        now reflect exactly that run.
+        :param ddb_util: DynamoDB utility instance
+        :return: run timestamp in whole ms, None if no run was logged yet
+        """
+        if self.mode in ("set", "bloom"):
+            self.refresh(ddb_util)
+            return self.version
+        if self.run_checked_at is None or time.monotonic() - self.run_checked_at >= self.check_interval:
+            self.run_time = self._latest_version(ddb_util)
+            self.run_checked_at = time.monotonic()
+        return self.run_time
+
+    def load(self, ddb_util: DynamoUtil, version: Optional[float] = None) -> None:
+        """
+        Load every recalled GTIN from the recalls table
+        :param ddb_util: DynamoDB utility instance
+        :param version: timestamp of the recall run the load reflects
+        :return: None
+        """
+        recalls = ddb_util.scan_all(os.getenv("DYNAMODB_RECALL_TABLE"), projection="UPCs")
+        gtins = set()
+        for recall in recalls:
+            for upc in recall.get("UPCs") or []:
+                gtin = to_gtin(upc)
+                if gtin is not None:
+                    gtins.add(gtin)
+        self.gtins = self._build(gtins)
+        self.version = version
+
+    def load_snapshot(self) -> None:
+        """
+        Map the recall snapshot if the file was replaced since it was last mapped
+        :return: None
+        """
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            # Not written yet, recall checks fall back to DynamoDB
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature != self.version:
+            # The previous mapping is released once no lookup references it
+            self.gtins = RecallSnapshot(self.snapshot_path)
+            self.version = signature
+
+    def refresh(self, ddb_util: DynamoUtil) -> None:
+        """
+        Reload the cache if the recall processor logged a newer successful run
+        :param ddb_util: DynamoDB utility instance
+        :return: None
+        """
+        now = time.monotonic()
+        if self.gtins is not None and now - self.checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            # Another thread may have refreshed while we waited on the lock
+            if self.gtins is not None and now - self.checked_at < self.check_interval:
+                return
+            if self.mode == "snapshot":
+                self.load_snapshot()
+            else:
+                latest_version = self._latest_version(ddb_util)
+                if self.gtins is None or (latest_version is not None and latest_version != self.version):
+                    self.load(ddb_util, latest_version)
+            self.checked_at = time.monotonic()
+
+    def contains(self, gtin: int, ddb_util: DynamoUtil) -> Optional[bool]:
+        """
+        Check whether a GTIN is recalled using the in-memory copy
+        :param gtin: canonical GTIN-14 integer
+        :param ddb_util: DynamoDB utility instance
+        :return: True/False if the cache can answer, None if the caller must check DynamoDB
+        """
+        if self.mode == "off":
+            return None
+
+        self.refresh(ddb_util)
+        if self.gtins is None:
+            # Snapshot not written yet
+            return None
+        if gtin not in self.gtins:
+            return False
+        # A Bloom filter hit may be a false positive
+        return None if self.mode == "bloom" else True
+
+
+# Shared by every request in this process
+recall_cache = RecallCache()
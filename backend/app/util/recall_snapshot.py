@@ -0,0 +1,94 @@
+import sys
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from typing import List, Optional
+
+# Snapshot layout written by the recall processor (little-endian):
+#   header  : magic "FSRS", format version (uint16), reserved (uint16), key count N (uint32)
+#   keys    : N sorted uint64 GTINs
+#   offsets : N + 1 uint64 offsets into the records section
+#   records : UTF-8 JSON object per key
+SNAPSHOT_MAGIC = b"FSRS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHHI")
+
+
+class _PackedUInt64:
+    """
+    Read-only sequence view over little-endian uint64 values, for big-endian hosts
+    where memoryview.cast cannot be used directly.
+    """
+    def __init__(self, buffer, offset: int, count: int):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        return struct.unpack_from("<Q", self.buffer, self.offset + index * 8)[0]
+
+
+class RecallSnapshot:
+    """
+    Memory-mapped view of the recall snapshot.
+    Every worker process maps the same read-only file, so the page cache holds a single copy,
+    and lookups are a binary search over the sorted GTIN array.
+    """
+    def __init__(self, path: str):
+        """
+        Map the snapshot file
+        :param path: path of the snapshot written by the recall processor
+        """
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count = SNAPSHOT_HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"Unsupported recall snapshot: {path}")
+
+        keys_start = SNAPSHOT_HEADER.size
+        offsets_start = keys_start + count * 8
+        self._records_start = offsets_start + (count + 1) * 8
+
+        if sys.byteorder == "little":
+            self._keys = memoryview(self._mmap)[keys_start:offsets_start].cast("Q")
+            self._offsets = memoryview(self._mmap)[offsets_start:self._records_start].cast("Q")
+        else:
+            self._keys = _PackedUInt64(self._mmap, keys_start, count)
+            self._offsets = _PackedUInt64(self._mmap, offsets_start, count + 1)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _find(self, gtin: int) -> Optional[int]:
+        index = bisect_left(self._keys, gtin)
+        if index < len(self._keys) and self._keys[index] == gtin:
+            return index
+        return None
+
+    def __contains__(self, gtin: int) -> bool:
+        return self._find(gtin) is not None
+
+    def get_recall_ids(self, gtin: int) -> List[str]:
+        """
+        Get the IDs of the recalls covering a GTIN
+        :param gtin: integer GTIN
+        :return: recall IDs, empty if the GTIN is not recalled
+        """
+        index = self._find(gtin)
+        if index is None:
+            return []
+        start = self._records_start + self._offsets[index]
+        end = self._records_start + self._offsets[index + 1]
+        return json.loads(self._mmap[start:end])["RecallIDs"]
+
+    def close(self) -> None:
+        if isinstance(self._keys, memoryview):
+            self._keys.release()
+            self._offsets.release()
+        self._mmap.close()
@@ -0,0 +1,79 @@
+"""
+Sweep of the pantry products affected by new recalls.
+
+Each successful recall processor run logs the GTINs of the recalls it added. The sweep
+reads the runs logged since the last one swept and flags the matching products in bulk,
+recording the users holding them, instead of rechecking every stored product. The API
+server runs it every RECALL_SWEEP_INTERVAL seconds; it can also be run from the backend
+directory with the MySQL and DynamoDB environment variables set:
+
+    python -m app.util.recall_sweep
+"""
+import asyncio
+import logging
+from typing import List
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from .dynamo_util import DynamoUtil, get_ddb_util
+from .models import RecallSweep
+from ..dao.recalls_dao import RecallsDao
+from ..dao.recall_sweep_dao import RecallSweepDao
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_recalls(ddb_util: DynamoUtil, db: Session) -> List[RecallSweep]:
+    """
+    Apply every successful recall run logged since the last sweep, oldest first
+    :param ddb_util: DynamoDB utility instance
+    :param db: Session object
+    :return: the runs swept now
+    """
+    since = RecallSweepDao.get_last_swept_run(db) or 0
+    sweeps = []
+    for run in RecallsDao.get_runs_since(ddb_util, since):
+        # Runs logged before the processor recorded its GTINs are marked swept with nothing to flag
+        gtins = sorted({int(gtin) for gtin in run.get("RecallGTINs") or []})
+        sweep = RecallSweepDao.sweep_run(gtins, int(run["LogTimestamp"]), db)
+        if sweep is not None:
+            sweeps.append(sweep)
+    return sweeps
+
+
+def _sweep_once() -> List[RecallSweep]:
+    # Imported here so the module can be used without a configured database
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return sweep_recalls(get_ddb_util(), db)
+    finally:
+        db.close()
+
+
+async def run_recall_sweeper(interval: float) -> None:
+    """
+    Sweep new recall runs every interval seconds until cancelled
+    :param interval: seconds between sweeps
+    :return: None
+    """
+    while True:
+        try:
+            for sweep in await run_in_threadpool(_sweep_once):
+                logger.info("Recall sweep: %s", sweep)
+        except Exception:
+            # A failed sweep is retried from the same run next time
+            logger.exception("Recall sweep failed")
+        await asyncio.sleep(interval)
+
+
+def main() -> None:
+    from ..dao.product_dao import ProductDao  # noqa: F401, creates the sweep tables
+
+    sweeps = _sweep_once()
+    print("\n".join(str(sweep) for sweep in sweeps) or "no new recall runs")
+
+
+if __name__ == "__main__":
+    main()
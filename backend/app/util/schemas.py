@@ -24,6 +24,23 @@ class UserResponse(UserBase):
 class UserUpdate(UserBase):
     updated_at: datetime
 
+# Partial update, only the fields sent are changed
+class UserPatch(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    zip_code: Optional[str] = None
+    email: Optional[EmailStr] = None
+    general_diet: Optional[str] = None
+    religious_cultural_diets: Optional[str] = None
+    allergens: Optional[str] = None
+    password: Optional[str] = None
+
+    @validator("first_name", "last_name", "zip_code", "email", "password")
+    def validate_required(cls, value):
+        if value is None:
+            raise ValueError("Field cannot be null")
+        return value
+
 class UserLogin(UserBase):
     password: str
 
@@ -62,6 +79,52 @@ class ProductInfo(Barcode):
     brand: str
     recall: bool = False
 
+# Token bucket in front of an external product API
+class RateLimitState(BaseModel):
+    rate: float
+    burst: int
+    tokens: float
+    waiting: int
+    admitted: int
+    delayed: int
+    rejected: int
+
+# Rolling health of an external product API
+class ProviderHealth(BaseModel):
+    name: str
+    state: str
+    calls: int
+    success_rate: float
+    found_rate: float
+    avg_latency_ms: float
+    p95_latency_ms: float
+    consecutive_failures: int
+    retry_tokens: float
+    expected_cost_ms: float
+    rate_limit: Optional[RateLimitState] = None
+
+# Coalescing of concurrent provider lookups for the same barcode
+class LookupStats(BaseModel):
+    calls: int
+    executions: int
+    coalesced: int
+    in_flight: int
+
+# Failed login limits checked before passwords are verified
+class LoginThrottleStats(BaseModel):
+    checked: int
+    rejected_account: int
+    rejected_ip: int
+    failures: int
+    tracked_keys: int
+    shared: bool
+
+# Changes to a pantry since a version the client has
+class PantryDelta(BaseModel):
+    version: int
+    added: List[ProductInfo]  # Also products whose recall flag changed
+    removed: List[str]
+
 class SubscriptionCreate(BaseModel):
     state: str
     subscription_type: str
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+    The first caller for a key starts the work; callers arriving while it is in flight
+    await the same result instead of repeating it. The work runs as its own task, so a
+    caller that goes away does not cancel it for the others.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def coalesced(self) -> int:
+        """
+        Calls answered by another caller's execution
+        """
+        return self.calls - self.executions
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run work for key unless a call for the same key is already in flight
+        :param key: identity of the work, e.g. a GTIN
+        :param work: coroutine function doing the work
+        :return: the result, and whether it was shared with an earlier caller
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tasks are bound to their event loop
+            self._flights = {}
+            self._loop = loop
+
+        self.calls += 1
+        task = self._flights.get(key)
+        shared = task is not None
+        if not shared:
+            self.executions += 1
+            task = loop.create_task(work())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._flights.pop(key, None) if self._flights.get(key) is done else None)
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "executions": self.executions, "coalesced": self.coalesced, "in_flight": self.in_flight}
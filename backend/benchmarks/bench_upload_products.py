@@ -0,0 +1,109 @@
+"""
+Benchmark ProductDao.upload_products against the previous per-product implementation.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_upload_products
+
+Uses an in-memory SQLite database unless DATABASE_URL points elsewhere (use a scratch
+database, the benchmark inserts users and products). Each run uploads a batch in which
+half the products already exist and a quarter are already in the user's pantry.
+"""
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import event, or_  # noqa: E402
+from app.util.database import engine, SessionLocal  # noqa: E402
+from app.util.models import Product, User  # noqa: E402
+from app.util.schemas import ProductInfo  # noqa: E402
+from app.util.gtin import gtin_check_digit, to_gtin  # noqa: E402
+from app.dao.product_dao import ProductDao  # noqa: E402
+
+BATCH_SIZES = (1, 100, 1000)
+
+
+def legacy_upload_products(products, db, user_id):
+    """
+    The per-product implementation replaced by the set-based upload
+    """
+    user = db.query(User).filter(User.user_id == user_id).first()
+    stored_products = []
+    for product in products:
+        existing_product = db.query(Product).filter(or_(Product.gtin == to_gtin(product.code))).first()
+        if not existing_product:
+            new_product = Product(**product.model_dump(), gtin=to_gtin(product.code))
+            db.add(new_product)
+            user.products.append(new_product)
+        elif existing_product not in user.products:
+            db.refresh(existing_product)
+            user.products.append(existing_product)
+        db.commit()
+        stored_products.append(product)
+    return stored_products
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def make_products(start, count):
+    products = []
+    for i in range(start, start + count):
+        body = f"{i:011d}"
+        products.append(ProductInfo(code=f"{body}{gtin_check_digit(body)}", name=f"Product {i}", brand="Brand"))
+    return products
+
+
+def run(upload, size, run_id, counter):
+    db = SessionLocal()
+    try:
+        user = User(first_name="Bench", last_name="User", zip_code="00000",
+                    email=f"bench-{upload.__name__}-{size}-{run_id}@example.com", password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.user_id
+
+        # Half the batch already exists, half of that is already in the pantry
+        base = run_id * 10_000_000
+        products = make_products(base, size)
+        existing = products[:size // 2]
+        if existing:
+            ProductDao.upload_products(products=existing[:len(existing) // 2], db=db, user_id=user_id)
+            other = User(first_name="Other", last_name="User", zip_code="00000",
+                         email=f"other-{upload.__name__}-{size}-{run_id}@example.com", password="x")
+            db.add(other)
+            db.commit()
+            ProductDao.upload_products(products=existing[len(existing) // 2:], db=db, user_id=other.user_id)
+        db.expire_all()
+
+        counter.count = 0
+        start = time.perf_counter()
+        upload(products=products, db=db, user_id=user_id)
+        elapsed = time.perf_counter() - start
+        return counter.count, elapsed
+    finally:
+        db.close()
+
+
+def main():
+    counter = QueryCounter()
+
+    print(f"{'implementation':<24}{'barcodes':>10}{'queries':>10}{'latency ms':>12}")
+    run_id = 0
+    for upload in (legacy_upload_products, ProductDao.upload_products):
+        for size in BATCH_SIZES:
+            run_id += 1
+            queries, elapsed = run(upload, size, run_id, counter)
+            name = "legacy" if upload is legacy_upload_products else "set-based"
+            print(f"{name:<24}{size:>10}{queries:>10}{elapsed * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
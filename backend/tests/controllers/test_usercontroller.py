@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.app.util.models import Base, User
+from backend.app.util.schemas import UserCreate
+from backend.app.controllers import user_controller
+from backend.app.controllers.user_controller import UserController
+
+
+class TestCreateUser(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Shared by the threadpool the controller runs the database work in
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add(User(user_id=1, first_name="a", last_name="b", zip_code="1", email="taken@b.c", password="x"))
+        self.db.commit()
+
+        patcher = patch.object(user_controller, "hash_password_async", AsyncMock(return_value="hashed"))
+        self.hash_password = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def user(self, email: str) -> UserCreate:
+        return UserCreate(first_name="c", last_name="d", zip_code="1", email=email, password="Secret123!")
+
+    async def test_taken_email_rejected_before_hashing(self):
+        with self.assertRaises(HTTPException) as raised:
+            await UserController.create_user(self.user("taken@b.c"), self.db)
+
+        self.assertEqual(raised.exception.status_code, 400)
+        self.hash_password.assert_not_called()
+
+    async def test_new_email_hashed_and_stored(self):
+        created = await UserController.create_user(self.user("new@b.c"), self.db)
+
+        self.assertEqual(created.email, "new@b.c")
+        self.hash_password.assert_awaited_once_with("Secret123!")
+        self.assertEqual(self.db.query(User).filter(User.email == "new@b.c").one().password, "hashed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from backend.app.util.models import Base, PantryChange, Product, User, user_product_association
+from backend.app.util.schemas import Barcode, ProductInfo
+from backend.app.dao.product_dao import ProductDao
+
+
+class TestDeleteProducts(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add_all([
+            User(user_id=1, first_name="a", last_name="b", zip_code="1", email="a@b.c", password="x", pantry_version=2),
+            User(user_id=2, first_name="c", last_name="d", zip_code="1", email="c@d.e", password="x", pantry_version=0),
+            Product(product_id=1, code="012345678905", gtin=12345678905, name="Held", brand="brand", recall=False),
+            Product(product_id=2, code="036000291452", gtin=36000291452, name="Also held", brand="brand", recall=True),
+            Product(product_id=3, code="4006381333931", gtin=4006381333931, name="Not held", brand="brand", recall=False),
+        ])
+        self.db.flush()
+        self.db.execute(user_product_association.insert(), [
+            {"user_id": 1, "product_id": 1}, {"user_id": 1, "product_id": 2}, {"user_id": 2, "product_id": 3},
+        ])
+        self.db.commit()
+
+    def test_deletes_held_and_reports_the_rest(self):
+        # Held in EAN-13 and UPC-A form, held by another user, unknown, and invalid
+        codes = ["0012345678905", "036000291452", "4006381333931", "96385074", "012345678906"]
+
+        deleted, errors = ProductDao.delete_products([Barcode(code=code) for code in codes], self.db, 1)
+
+        self.assertCountEqual([(product.code, product.recall) for product in deleted],
+                              [("012345678905", False), ("036000291452", True)])
+        self.assertEqual([(error.code, error.status_code) for error in errors],
+                         [("4006381333931", 404), ("96385074", 404), ("012345678906", 404)])
+
+        # Only the user's own pantry entries are removed, the products stay
+        pantry = self.db.execute(select(user_product_association.c.user_id, user_product_association.c.product_id)).all()
+        self.assertEqual(pantry, [(2, 3)])
+        self.assertEqual(len(self.db.execute(select(Product.product_id)).all()), 3)
+
+        # One new pantry version logs both removals
+        self.assertEqual(self.db.execute(select(User.pantry_version).where(User.user_id == 1)).scalar(), 3)
+        changes = self.db.execute(select(PantryChange.user_id, PantryChange.version, PantryChange.product_id, PantryChange.added)).all()
+        self.assertCountEqual(changes, [(1, 3, 1, False), (1, 3, 2, False)])
+
+    def test_deletes_rows_without_gtin_by_code(self):
+        # Stored before GTINs, its code is not a valid GTIN so the migration left gtin empty
+        self.db.add(Product(product_id=4, code="12345", gtin=None, name="Legacy", brand="brand", recall=False))
+        self.db.flush()
+        self.db.execute(user_product_association.insert(), [{"user_id": 1, "product_id": 4}])
+        self.db.commit()
+
+        deleted, errors = ProductDao.delete_products([Barcode(code="12345"), Barcode(code="54321")], self.db, 1)
+
+        self.assertEqual([product.code for product in deleted], ["12345"])
+        self.assertEqual([error.code for error in errors], ["54321"])
+        held = self.db.execute(select(user_product_association.c.product_id).where(user_product_association.c.user_id == 1)).scalars().all()
+        self.assertCountEqual(held, [1, 2])
+
+    def test_nothing_held_keeps_version(self):
+        deleted, errors = ProductDao.delete_products([Barcode(code="4006381333931")], self.db, 1)
+
+        self.assertEqual(deleted, [])
+        self.assertEqual([error.code for error in errors], ["4006381333931"])
+        self.assertEqual(self.db.execute(select(User.pantry_version).where(User.user_id == 1)).scalar(), 2)
+        self.assertEqual(self.db.execute(select(PantryChange.user_id)).all(), [])
+
+
+
+class TestUploadProducts(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add_all([
+            User(user_id=1, first_name="a", last_name="b", zip_code="1", email="a@b.c", password="x", pantry_version=0),
+            Product(product_id=1, code="012345678905", gtin=12345678905, name="Stored", brand="brand", recall=False,
+                    recall_checked_at=100),
+        ])
+        self.db.commit()
+
+    def test_new_products_stamped_with_recall_run(self):
+        products = [ProductInfo(code="012345678905", name="Stored", brand="brand", recall=False),
+                    ProductInfo(code="036000291452", name="New", brand="brand", recall=True)]
+
+        ProductDao.upload_products(products, self.db, 1, recall_checked_at=200)
+
+        checked = dict(self.db.execute(select(Product.code, Product.recall_checked_at)).all())
+        # The stored product keeps the run its flag was checked against
+        self.assertEqual(checked, {"012345678905": 100, "036000291452": 200})
+
+
+if __name__ == "__main__":
+    unittest.main()
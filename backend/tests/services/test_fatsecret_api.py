@@ -11,33 +11,43 @@ if BASE_DIR not in sys.path:
 if APP_DIR not in sys.path:
     sys.path.insert(0, APP_DIR)
 
-from app.util.product_api import get_fatsecret_info  # util-level function (no API route)
+import asyncio
+import httpx
+
+import app.util.product_api as product_api
+from app.util.product_api import fetch_fatsecret_info
 from app.util.schemas import Barcode, ProductInfo, ProductError
 
 
+def fetch(monkeypatch, handler, code):
+    """Run the async FatSecret lookup against a mocked transport (no real network)."""
+    monkeypatch.setattr(product_api, "FATSECRET_KEY_OAUTH1", "key")
+    monkeypatch.setattr(product_api, "FATSECRET_SECRET_OAUTH1", "secret")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_fatsecret_info(client, Barcode(code=code))
+
+    return asyncio.run(run())
+
+
 # ----------------------------------------------------
-# FatSecret util tests (no real network; monkeypatched)
+# FatSecret util tests (no real network; mocked transport)
 # ----------------------------------------------------
 def test_fatsecret_info_success(monkeypatch):
     """FatSecret returns a matching food → should produce ProductInfo."""
-    class FakeResp:
-        status_code = 200
-        def raise_for_status(self): pass
-        def json(self):
-            return {
-                "foods": {
-                    "food": [{
-                        "food_name": "Mocked Banana",
-                        "brand_name": "MockBrand",
-                        "food_description": "Mock desc",
-                    }]
-                }
+    def handler(request):
+        return httpx.Response(200, json={
+            "foods": {
+                "food": [{
+                    "food_name": "Mocked Banana",
+                    "brand_name": "MockBrand",
+                    "food_description": "Mock desc",
+                }]
             }
+        })
 
-    import requests
-    monkeypatch.setattr(requests, "get", lambda *a, **k: FakeResp())
-
-    out = get_fatsecret_info(Barcode(code="012345"))
+    out = fetch(monkeypatch, handler, "012345")
     assert isinstance(out, ProductInfo)
     assert out.name == "Mocked Banana"
     assert out.brand == "MockBrand"
@@ -47,30 +57,40 @@ def test_fatsecret_info_success(monkeypatch):
 
 def test_fatsecret_info_no_match(monkeypatch):
     """FatSecret returns 200 but no foods → should produce ProductError(404)."""
-    class FakeResp:
-        status_code = 200
-        def raise_for_status(self): pass
-        def json(self):
-            return {"foods": {"food": []}}
-
-    import requests
-    monkeypatch.setattr(requests, "get", lambda *a, **k: FakeResp())
-
-    out = get_fatsecret_info(Barcode(code="000"))
+    out = fetch(monkeypatch, lambda request: httpx.Response(200, json={"foods": {"food": []}}), "000")
     assert isinstance(out, ProductError)
     assert out.status_code == 404
 
 
 def test_fatsecret_info_http_error(monkeypatch):
     """FatSecret returns non-200 → should produce ProductError(status_code)."""
-    class FakeResp:
-        status_code = 401
-        def raise_for_status(self): pass
-        def json(self): return {}
+    out = fetch(monkeypatch, lambda request: httpx.Response(401, json={}), "bad-auth")
+    assert isinstance(out, ProductError)
+    assert out.status_code == 401
+
 
-    import requests
-    monkeypatch.setattr(requests, "get", lambda *a, **k: FakeResp())
+def test_fatsecret_info_network_error(monkeypatch):
+    """Network failure → should produce ProductError(500)."""
+    def handler(request):
+        raise httpx.ConnectError("unreachable", request=request)
 
-    out = get_fatsecret_info(Barcode(code="bad-auth"))
+    out = fetch(monkeypatch, handler, "012345")
     assert isinstance(out, ProductError)
-    assert out.status_code == 401
+    assert out.status_code == 500
+
+
+def test_fetch_fatsecret_info_signed_async(monkeypatch):
+    """Async FatSecret lookup signs the request with OAuth1 and parses the same shape."""
+    seen = {}
+
+    def handler(request):
+        seen["auth"] = request.headers.get("Authorization", "")
+        seen["query"] = dict(request.url.params)
+        return httpx.Response(200, json={"foods": {"food": [{"food_name": "Async Banana", "brand_name": "MockBrand"}]}})
+
+    out = fetch(monkeypatch, handler, "012345")
+
+    assert isinstance(out, ProductInfo)
+    assert out.name == "Async Banana"
+    assert seen["auth"].startswith("OAuth ")
+    assert seen["query"] == {"search_expression": "012345", "format": "json"}
@@ -60,6 +60,23 @@ class TestProductService(unittest.TestCase):
         print(products)
         self.assertEqual(len(products), 2)
 
+    def test_get_products_paged(self):
+        headers = {
+            "Authorization": f"Bearer {self.access_token}"
+        }
+        response = self.product_client.get("/products", params={"limit": 1}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        first_page = response.json()
+        self.assertEqual(len(first_page), 1)
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = self.product_client.get("/products", params={"limit": 1, "cursor": cursor}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        second_page = response.json()
+        self.assertEqual(len(second_page), 1)
+        self.assertNotEqual(first_page[0]["code"], second_page[0]["code"])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
     def test_delete_products(self):
         headers = {
             "Authorization": f"Bearer {self.access_token}"
@@ -79,6 +96,7 @@ def suite():
     suite = unittest.TestSuite()
     suite.addTest(TestProductService("test_product_upload"))
     suite.addTest(TestProductService("test_get_products"))
+    suite.addTest(TestProductService("test_get_products_paged"))
     suite.addTest(TestProductService("test_delete_products"))
     return suite
 
@@ -0,0 +1,98 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.app.util.models import Base, User
+from backend.app.util.schemas import TokenData, ProductInfo, ProductError
+from backend.app.util.database import get_db
+from backend.app.util.dynamo_util import get_ddb_util
+from backend.app.util.oauth2 import get_current_user
+from backend.app.util.gtin import to_gtin
+from backend.app.dao.product_dao import ProductDao
+from backend.app.controllers import product_controller
+from backend.app.services.product_service import router as product_router
+
+
+async def resolve(barcodes, ddb_util, db):
+    """
+    Resolve every valid barcode to a product without calling DynamoDB or the product APIs
+    """
+    for barcode in barcodes:
+        if to_gtin(barcode.code) is None:
+            yield barcode.code, ProductError(code=barcode.code, status_code=422)
+        else:
+            yield barcode.code, ProductInfo(code=barcode.code, name=f"Product {barcode.code}", brand="brand", recall=False)
+
+
+class TestPantrySync(unittest.TestCase):
+    def setUp(self):
+        # Shared by the threadpool the routes run the database work in
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add(User(user_id=1, first_name="test", last_name="test", zip_code="12345", email="test@test.com", password="x"))
+        self.db.commit()
+
+        app = FastAPI()
+        app.include_router(product_router)
+        app.dependency_overrides[get_db] = lambda: self.db
+        app.dependency_overrides[get_ddb_util] = lambda: MagicMock()
+        app.dependency_overrides[get_current_user] = lambda: TokenData(user_id=1)
+        self.client = TestClient(app)
+
+        for patcher in (patch.object(product_controller, "iter_products_info", resolve),
+                        patch.object(product_controller, "get_recall_checked_at", AsyncMock(return_value=0))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def upload(self, *codes):
+        ProductDao.upload_products([ProductInfo(code=code, name="name", brand="brand", recall=False) for code in codes], self.db, 1)
+
+    def test_get_products_not_modified(self):
+        self.upload("0078742237145", "044000034207")
+        response = self.client.get("/products")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        response = self.client.get("/products", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+
+        # Nothing changed since the current version
+        version = int(etag.strip('"').split("-")[-1])
+        response = self.client.get("/products", params={"since_version": version})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"version": version, "added": [], "removed": []})
+
+        # A later upload changes the ETag and shows up in the delta
+        self.upload("036000291452")
+        response = self.client.get("/products", params={"since_version": version}, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        delta = response.json()
+        self.assertEqual(delta["version"], version + 1)
+        self.assertEqual([product["code"] for product in delta["added"]], ["036000291452"])
+        self.assertEqual(delta["removed"], [])
+
+    def test_bulk_upload(self):
+        headers = {"Content-Type": "application/x-ndjson"}
+        body = "0078742237145\n044000034207\nnot-a-barcode\n"
+        response = self.client.post("/products/bulk", content=body, headers=headers)
+        self.assertEqual(response.status_code, 202)
+        results = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(len(results), 3)
+        self.assertIn({"code": "not-a-barcode", "status_code": 422}, results)
+
+        # The resolved products were stored in the pantry
+        response = self.client.get("/products")
+        self.assertCountEqual([product["code"] for product in response.json()], ["0078742237145", "044000034207"])
+
+
+if __name__ == "__main__":
+    unittest.main()
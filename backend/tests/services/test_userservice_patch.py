@@ -0,0 +1,55 @@
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.app.util.models import Base, User
+from backend.app.util.schemas import TokenData
+from backend.app.util.database import get_db
+from backend.app.util.oauth2 import get_current_user
+from backend.app.services.user_service import router as user_router
+
+
+class TestPatchUser(unittest.TestCase):
+    def setUp(self):
+        # Shared by the threadpool the routes run the database work in
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add_all([
+            User(user_id=1, first_name="test", last_name="test", zip_code="12345", email="test@test.com", password="hashed"),
+            User(user_id=2, first_name="other", last_name="other", zip_code="12345", email="other@test.com", password="x"),
+        ])
+        self.db.commit()
+
+        app = FastAPI()
+        app.include_router(user_router)
+        app.dependency_overrides[get_db] = lambda: self.db
+        app.dependency_overrides[get_current_user] = lambda: TokenData(user_id=1)
+        self.client = TestClient(app)
+
+    def test_patch_user(self):
+        response = self.client.patch("/users", json={'zip_code': "54321", 'general_diet': "vegan"})
+        self.assertEqual(response.status_code, 200)
+        user_response = response.json()
+        self.assertEqual(user_response.get('zip_code'), "54321")
+        self.assertEqual(user_response.get('general_diet'), "vegan")
+        self.assertEqual(user_response.get('email'), "test@test.com")
+
+        # Fields left out are kept, so the password still works
+        user = self.db.get(User, 1)
+        self.db.refresh(user)
+        self.assertEqual(user.password, "hashed")
+        self.assertEqual(user.first_name, "test")
+
+    def test_patch_user_taken_email(self):
+        response = self.client.patch("/users", json={'email': "other@test.com"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.db.get(User, 1).email, "test@test.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import json
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.app.util.models import CatalogProduct
+from backend.app.util.catalog_import import import_catalog, iter_jsonl, iter_csv, catalog_row
+from backend.app.dao.catalog_dao import CatalogDao
+from backend.app.util.barcode_scanner import check_catalog_for_upcs
+from backend.app.util.schemas import Barcode
+
+
+def jsonl(*products):
+    return io.StringIO("\n".join(json.dumps(product) for product in products) + "\n")
+
+
+class TestCatalogImport(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        CatalogProduct.__table__.create(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+    def test_import_jsonl(self):
+        stream = jsonl(
+            {"code": "0012345678905", "product_name": "Trail Mix", "brands": "Great Value",
+             "allergens_tags": ["en:nuts", "en:peanuts"], "last_modified_t": 1700000000},
+            {"code": "4006381333931", "product_name": "Pencil"},
+            {"code": "12345", "product_name": "Not a GTIN"},
+        )
+        stream = io.StringIO(stream.getvalue() + "not json\n")
+
+        stats = import_catalog(iter_jsonl(stream), self.db, batch_size=1)
+
+        self.assertEqual((stats.read, stats.imported, stats.skipped), (3, 2, 1))
+        product = self.db.get(CatalogProduct, 12345678905)
+        self.assertEqual((product.code, product.name, product.brand), ("0012345678905", "Trail Mix", "Great Value"))
+        self.assertEqual(product.allergens, "en:nuts,en:peanuts")
+        self.assertEqual(self.db.get(CatalogProduct, 4006381333931).brand, "-Unknown-")
+
+    def test_import_csv(self):
+        stream = io.StringIO(
+            "code\tproduct_name\tbrands\tallergens\tlast_modified_t\n"
+            "036000291452\tTissues\tKleenex\t\t1700000000\n"
+        )
+
+        import_catalog(iter_csv(stream), self.db)
+
+        product = self.db.get(CatalogProduct, 36000291452)
+        self.assertEqual(product.name, "Tissues")
+        self.assertIsNone(product.allergens)
+
+    def test_delta_import_upserts_newer_products(self):
+        import_catalog(iter_jsonl(jsonl(
+            {"code": "012345678905", "product_name": "Old", "last_modified_t": 100},
+            {"code": "036000291452", "product_name": "Tissues", "last_modified_t": 200},
+        )), self.db)
+        since = CatalogDao.get_last_modified(self.db)
+
+        stats = import_catalog(iter_jsonl(jsonl(
+            {"code": "012345678905", "product_name": "New", "last_modified_t": 300},
+            {"code": "036000291452", "product_name": "Unchanged", "last_modified_t": 200},
+        )), self.db, since=since)
+
+        self.assertEqual(since, 200)
+        self.assertEqual((stats.imported, stats.skipped), (1, 1))
+        self.assertEqual(self.db.get(CatalogProduct, 12345678905).name, "New")
+        self.assertEqual(self.db.get(CatalogProduct, 36000291452).name, "Tissues")
+        self.assertEqual(self.db.query(CatalogProduct).count(), 2)
+
+    def test_catalog_lookup_by_any_gtin_form(self):
+        import_catalog(iter_jsonl(jsonl({"code": "012345678905", "product_name": "Trail Mix", "brands": "Great Value"})), self.db)
+
+        products = check_catalog_for_upcs([Barcode(code="0012345678905"), Barcode(code="036000291452")], self.db)
+
+        self.assertEqual(list(products), [12345678905])
+        self.assertEqual(products[12345678905].name, "Trail Mix")
+
+    def test_row_truncates_long_fields(self):
+        row = catalog_row({"code": "012345678905", "product_name": "x" * 300, "last_modified_t": "bad"})
+
+        self.assertEqual(len(row["name"]), 255)
+        self.assertIsNone(row["last_modified"])
+
+
+if __name__ == "__main__":
+    unittest.main()
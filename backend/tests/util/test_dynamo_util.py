@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from backend.app.util import dynamo_util
+from backend.app.util.dynamo_util import DynamoUtil
+
+
+class TestBatchGetItems(unittest.TestCase):
+    def setUp(self):
+        self.ddb_util = DynamoUtil(region="us-east-2", access_key="key", secret_key="secret")
+        self.ddb_util.ddb = MagicMock()
+        patcher = patch.object(dynamo_util.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def unprocessed(self, *values):
+        return {"Table": {"Keys": [{"GTIN": value} for value in values]}}
+
+    def test_unprocessed_keys_retried_with_backoff(self):
+        self.ddb_util.ddb.batch_get_item.side_effect = [
+            {"Responses": {"Table": [{"GTIN": 1}]}, "UnprocessedKeys": self.unprocessed(2, 3)},
+            {"Responses": {"Table": []}, "UnprocessedKeys": self.unprocessed(2, 3)},
+            {"Responses": {"Table": [{"GTIN": 2}, {"GTIN": 3}]}},
+        ]
+
+        items = self.ddb_util.batch_get_items("Table", "GTIN", [1, 2, 3])
+
+        self.assertEqual(items, [{"GTIN": 1}, {"GTIN": 2}, {"GTIN": 3}])
+        self.assertEqual(self.ddb_util.ddb.batch_get_item.call_args.kwargs["RequestItems"], self.unprocessed(2, 3))
+        # Full jitter under an exponentially growing ceiling
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertLessEqual(delays[0], dynamo_util.BATCH_RETRY_BASE_DELAY)
+        self.assertLessEqual(delays[1], dynamo_util.BATCH_RETRY_BASE_DELAY * 2)
+
+    def test_retries_capped(self):
+        self.ddb_util.ddb.batch_get_item.return_value = {"Responses": {"Table": []}, "UnprocessedKeys": self.unprocessed(1)}
+
+        with self.assertRaises(ClientError):
+            self.ddb_util.batch_get_items("Table", "GTIN", [1])
+
+        self.assertEqual(self.ddb_util.ddb.batch_get_item.call_count, dynamo_util.BATCH_RETRY_LIMIT + 1)
+        self.assertTrue(all(call.args[0] <= dynamo_util.BATCH_RETRY_MAX_DELAY for call in self.sleep.call_args_list))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestEnableTtl(unittest.TestCase):
+    def setUp(self):
+        self.ddb_util = DynamoUtil(region="us-east-2", access_key="key", secret_key="secret")
+        self.ddb_util.ddb = MagicMock()
+        self.client = self.ddb_util.ddb.meta.client
+
+    def test_enables_ttl_on_attribute(self):
+        self.client.describe_time_to_live.return_value = {"TimeToLiveDescription": {"TimeToLiveStatus": "DISABLED"}}
+
+        self.ddb_util.enable_ttl("Table")
+
+        self.client.update_time_to_live.assert_called_once_with(
+            TableName="Table", TimeToLiveSpecification={"Enabled": True, "AttributeName": "ExpiresAt"})
+
+    def test_already_enabled_left_alone(self):
+        self.client.describe_time_to_live.return_value = {
+            "TimeToLiveDescription": {"TimeToLiveStatus": "ENABLED", "AttributeName": "ExpiresAt"}}
+
+        self.ddb_util.enable_ttl("Table")
+
+        self.client.update_time_to_live.assert_not_called()
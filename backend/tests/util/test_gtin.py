@@ -0,0 +1,43 @@
+import unittest
+from backend.app.util.gtin import to_gtin, format_gtin, gtin_check_digit, upc_e_to_upc_a
+
+
+class TestGtin(unittest.TestCase):
+    def test_check_digit(self):
+        self.assertEqual(gtin_check_digit("01234567890"), 5)
+        self.assertEqual(gtin_check_digit("400638133393"), 1)
+
+    def test_to_gtin(self):
+        # UPC-A, EAN-13 and GTIN-14 forms of the same product share one integer
+        self.assertEqual(to_gtin("012345678905"), 12345678905)
+        self.assertEqual(to_gtin("0012345678905"), 12345678905)
+        self.assertEqual(to_gtin("00012345678905"), 12345678905)
+        self.assertEqual(to_gtin("0 12345-67890 5"), 12345678905)
+        self.assertEqual(to_gtin("96385074"), 96385074)  # EAN-8
+
+    def test_to_gtin_upc_e(self):
+        # Zero-suppressed UPC-E scans share the integer of their UPC-A form
+        self.assertEqual(to_gtin("04252614"), to_gtin("042100005264"))
+        self.assertEqual(to_gtin("04252614"), 42100005264)
+        self.assertEqual(to_gtin("04963406"), to_gtin("049000006346"))
+        # Expansion depends on the last data digit
+        self.assertEqual(upc_e_to_upc_a("01234503"), "012000003453")
+        self.assertEqual(upc_e_to_upc_a("01234533"), "012300000453")
+        self.assertEqual(upc_e_to_upc_a("01234543"), "012340000053")
+        self.assertEqual(upc_e_to_upc_a("01234563"), "012345000063")
+        self.assertIsNone(upc_e_to_upc_a("96385074"))
+        self.assertIsNone(to_gtin("04252615"))  # Bad check digit either way
+
+    def test_to_gtin_invalid(self):
+        self.assertIsNone(to_gtin("012345678906"))  # Bad check digit
+        self.assertIsNone(to_gtin("12345"))  # Bad length
+        self.assertIsNone(to_gtin(""))
+        self.assertIsNone(to_gtin(None))
+
+    def test_format_gtin(self):
+        self.assertEqual(format_gtin(12345678905), "00012345678905")
+        self.assertEqual(format_gtin(12345678905, 12), "012345678905")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import asyncio
 import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
 from passlib.context import CryptContext
-from backend.app.util.hash import hash_password, verify_password
+from backend.app.util import hash as hash_util
+from backend.app.util.hash import hash_password, verify_password, verify_and_update_password, \
+    hash_password_async, verify_password_async
 
 class TestPasswordUtils(unittest.TestCase):
     def setUp(self):
@@ -39,5 +44,40 @@ class TestPasswordUtils(unittest.TestCase):
         result = verify_password(self.wrong_password, hashed_password)
         self.assertFalse(result)
 
+    def test_verify_and_update_rehashes_other_cost(self):
+        """
+        Test a hash made with another cost factor is replaced on verification
+        """
+        old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(self.plain_password)
+
+        valid, new_hash = verify_and_update_password(self.plain_password, old_hash)
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith(f"$2b${hash_util.BCRYPT_ROUNDS:02d}$"))
+        self.assertTrue(verify_password(self.plain_password, new_hash))
+
+        # Current hashes are left as they are
+        self.assertEqual(verify_and_update_password(self.plain_password, new_hash), (True, None))
+
+class TestPasswordPool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch.object(hash_util, "_hash_slots", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(hash_util.shutdown_hash_pool)
+
+    async def test_hash_and_verify_in_process_pool(self):
+        with patch.object(hash_util, "PASSWORD_HASH_WORKERS", 1):
+            hashed_password = await hash_password_async("TestPassword123")
+            self.assertEqual(await verify_password_async("TestPassword123", hashed_password), (True, None))
+            self.assertEqual((await verify_password_async("WrongPassword123", hashed_password))[0], False)
+
+    async def test_full_queue_is_rejected(self):
+        with patch.object(hash_util, "PASSWORD_HASH_WORKERS", 0), patch.object(hash_util, "PASSWORD_HASH_QUEUE_SIZE", 0):
+            results = await asyncio.gather(hash_password_async("first"), hash_password_async("second"), return_exceptions=True)
+
+        self.assertIsInstance(results[0], str)
+        self.assertIsInstance(results[1], HTTPException)
+        self.assertEqual(results[1].status_code, 503)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.app.util import login_activity
+from backend.app.util.login_activity import record_login_activity, run_login_activity_writer
+from backend.app.util.models import Base, LoginActivity, User
+from backend.app.dao.login_activity_dao import LoginActivityDao
+
+
+class TestLoginActivityWriter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Batches are written from the threadpool, so every thread shares the one in-memory database
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        self.db.add(User(user_id=1, first_name="a", last_name="b", zip_code="1", email="a@b.c", password="x"))
+        self.db.commit()
+
+        self.batches = []
+        def insert_batch(activities):
+            self.batches.append(len(activities))
+            return LoginActivityDao.insert_activities(activities, self.db)
+        patcher = patch.object(login_activity, "_insert_batch", insert_batch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored(self):
+        return self.db.execute(select(LoginActivity.login_status, LoginActivity.ip_address)).all()
+
+    async def test_batches_by_size_and_drains_on_stop(self):
+        with patch.object(login_activity, "LOGIN_ACTIVITY_BATCH_SIZE", 2), \
+                patch.object(login_activity, "LOGIN_ACTIVITY_FLUSH_MS", 60000):
+            login_activity.start_login_activity_writer()
+            for i in range(5):
+                self.assertTrue(record_login_activity(1, "failed" if i % 2 else "success", f"10.0.0.{i}", "agent"))
+            await asyncio.sleep(0.05)
+            # Two full batches written, the fifth event waits for its batch to fill
+            self.assertEqual(self.batches, [2, 2])
+
+            await login_activity.stop_login_activity_writer()
+        self.assertEqual(self.batches, [2, 2, 1])
+        self.assertEqual(len(self.stored()), 5)
+        self.assertIn(("failed", "10.0.0.1"), self.stored())
+        # Not running anymore, events are no longer accepted
+        self.assertFalse(record_login_activity(1, "success", None, None))
+
+    async def test_flushes_partial_batch_after_interval(self):
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(run_login_activity_writer(queue, 100, 0.05))
+        self.addAsyncCleanup(writer.cancel)
+        queue.put_nowait({"user_id": 1, "login_at": None, "login_status": "success", "ip_address": None, "device_info": None})
+        queue.put_nowait({"user_id": 1, "login_at": None, "login_status": "success", "ip_address": None, "device_info": None})
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.batches, [])
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.batches, [2])
+
+    async def test_failed_write_is_logged(self):
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(run_login_activity_writer(queue, 1, 0.05))
+        with patch.object(login_activity, "_insert_batch", side_effect=RuntimeError("database down")), \
+                self.assertLogs(login_activity.logger, level="ERROR") as logs:
+            queue.put_nowait({"user_id": 1, "login_at": None, "login_status": "success", "ip_address": None, "device_info": None})
+            queue.put_nowait(None)
+            await writer
+
+        self.assertIn("dropped 1 events", logs.output[0])
+        self.assertIn("RuntimeError: database down", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from backend.app.util.login_throttle import LoginThrottle
+
+
+class TestLoginThrottle(unittest.TestCase):
+    def setUp(self):
+        # Start at the beginning of a window
+        self.now = 3000.0
+        patcher = patch("backend.app.util.login_throttle.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.throttle = LoginThrottle(window=100, account_limit=3, ip_limit=5)
+
+    def test_account_limit(self):
+        for _ in range(3):
+            self.assertIsNone(self.throttle.check("A@b.c", "1.1.1.1"))
+            self.throttle.record_failure("A@b.c", "1.1.1.1")
+
+        # The account is throttled however the email is cased, another account is not
+        self.assertIsNotNone(self.throttle.check("a@b.c ", "2.2.2.2"))
+        self.assertIsNone(self.throttle.check("d@e.f", "1.1.1.1"))
+        self.assertEqual(self.throttle.stats()["rejected_account"], 1)
+
+    def test_ip_limit(self):
+        for i in range(5):
+            self.throttle.record_failure(f"user{i}@b.c", "1.1.1.1")
+
+        self.assertIsNotNone(self.throttle.check("new@b.c", "1.1.1.1"))
+        self.assertIsNone(self.throttle.check("new@b.c", "2.2.2.2"))
+        stats = self.throttle.stats()
+        self.assertEqual((stats["checked"], stats["rejected_ip"], stats["failures"]), (2, 1, 5))
+
+    def test_window_slides(self):
+        for _ in range(6):
+            self.throttle.record_failure("a@b.c", None)
+        self.now += 50
+        retry_after = self.throttle.check("a@b.c", None)
+        self.assertIsNotNone(retry_after)
+
+        # Early in the next window most of the previous one still counts
+        self.now += 60
+        self.assertIsNotNone(self.throttle.check("a@b.c", None))
+
+        # Admitted once the weighted previous window falls under the limit, as Retry-After promised
+        self.assertEqual(retry_after, 101)
+        self.now = 3000 + 50 + retry_after - 1
+        self.assertIsNotNone(self.throttle.check("a@b.c", None))
+        self.now += 1
+        self.assertIsNone(self.throttle.check("a@b.c", None))
+
+    def test_bounded_keys(self):
+        throttle = LoginThrottle(window=100, account_limit=1, ip_limit=0, max_keys=2)
+        for email in ("a@b.c", "d@e.f", "g@h.i"):
+            throttle.record_failure(email, "1.1.1.1")
+
+        # The oldest account is forgotten, and disabled address limits keep no counters
+        self.assertEqual(throttle.stats()["tracked_keys"], 2)
+        self.assertIsNone(throttle.check("a@b.c", "1.1.1.1"))
+        self.assertIsNotNone(throttle.check("g@h.i", "1.1.1.1"))
+
+    def test_shared_table(self):
+        throttle = LoginThrottle(table_name="LoginThrottleTable", window=100, account_limit=3, ip_limit=0)
+        throttle._ddb_util = MagicMock()
+        throttle.record_failure("a@b.c", "1.1.1.1")
+        key = throttle._ddb_util.increment.call_args.args[2]
+        self.assertTrue(key.startswith("account:") and key.endswith("#30"))
+        self.assertNotIn("a@b.c", key)
+
+        throttle._ddb_util.batch_get_items.return_value = [{"ThrottleKey": key, "Failures": 3}]
+        self.assertIsNotNone(throttle.check("a@b.c", "1.1.1.1"))
+        self.assertEqual(len(throttle._ddb_util.batch_get_items.call_args.args[2]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
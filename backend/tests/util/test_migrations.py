@@ -0,0 +1,68 @@
+import unittest
+from sqlalchemy import create_engine, inspect, text
+from backend.app.util.migrations import migrate, applied_versions, MIGRATIONS
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.addCleanup(self.engine.dispose)
+
+    def create_legacy_schema(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE users (user_id INTEGER PRIMARY KEY, first_name VARCHAR(100) NOT NULL, "
+                              "last_name VARCHAR(100) NOT NULL, zip_code VARCHAR(10) NOT NULL, email VARCHAR(100) NOT NULL, "
+                              "password VARCHAR(100) NOT NULL, general_diet VARCHAR(50), religious_cultural_diets VARCHAR(50), "
+                              "allergens VARCHAR(500), created_at TIMESTAMP, updated_at TIMESTAMP)"))
+            conn.execute(text("CREATE TABLE products (product_id INTEGER PRIMARY KEY, code VARCHAR(50) NOT NULL, "
+                              "name VARCHAR(255) NOT NULL, brand VARCHAR(255) NOT NULL, recall BOOLEAN)"))
+            conn.execute(text("CREATE TABLE user_product (user_id BIGINT REFERENCES users (user_id), "
+                              "product_id BIGINT REFERENCES products (product_id))"))
+            conn.execute(text("INSERT INTO users (user_id, first_name, last_name, zip_code, email, password) "
+                              "VALUES (1, 'a', 'b', '1', 'a@b.c', 'x'), (2, 'c', 'd', '1', 'c@d.e', 'x')"))
+            # The same product uploaded as UPC-A and EAN-13, and a code that is not a GTIN
+            conn.execute(text("INSERT INTO products (product_id, code, name, brand) VALUES "
+                              "(1, '012345678905', 'Trail Mix', 'GV'), (2, '0012345678905', 'Trail Mix', 'GV'), "
+                              "(3, 'abc', 'Unknown', 'X')"))
+            conn.execute(text("INSERT INTO user_product VALUES (1, 1), (1, 1), (1, 2), (2, 2), (2, 3)"))
+
+    def test_migrates_legacy_schema(self):
+        self.create_legacy_schema()
+
+        applied = migrate(self.engine)
+
+        self.assertEqual(len(applied), len(MIGRATIONS))
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT product_id, gtin FROM products ORDER BY product_id")).all(),
+                             [(1, 12345678905), (3, None)])
+            self.assertEqual(conn.execute(text("SELECT user_id, product_id FROM user_product ORDER BY 1, 2")).all(),
+                             [(1, 1), (2, 1), (2, 3)])
+
+        inspector = inspect(self.engine)
+        self.assertIn("recall_checked_at", [column["name"] for column in inspector.get_columns("products")])
+        self.assertEqual(inspector.get_pk_constraint("user_product")["constrained_columns"], ["user_id", "product_id"])
+        self.assertIn(["product_id"], [index["column_names"] for index in inspector.get_indexes("user_product")])
+        self.assertIn((["gtin"], 1), [(index["column_names"], index["unique"]) for index in inspector.get_indexes("products")])
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT pantry_version FROM users ORDER BY user_id")).scalars().all(), [0, 0])
+
+        # Duplicates are now rejected by the database
+        with self.assertRaises(Exception), self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO user_product VALUES (1, 1)"))
+
+    def test_runs_once(self):
+        self.create_legacy_schema()
+        migrate(self.engine)
+
+        self.assertEqual(migrate(self.engine), [])
+        self.assertEqual(sorted(applied_versions(self.engine)), [version for version, _, _ in MIGRATIONS])
+
+    def test_fresh_database_only_records_migrations(self):
+        applied = migrate(self.engine)
+
+        self.assertEqual(len(applied), len(MIGRATIONS))
+        self.assertEqual(inspect(self.engine).get_pk_constraint("user_product")["constrained_columns"], ["user_id", "product_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
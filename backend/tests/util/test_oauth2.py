@@ -1,7 +1,8 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta, timezone
-from backend.app.util.oauth2 import create_access_token, validate_access_token, get_current_user
+from backend.app.util import oauth2
+from backend.app.util.oauth2 import create_access_token, validate_access_token, get_current_user, load_jwt_keys
 from backend.app.util.schemas import TokenData
 import jwt
 from fastapi import HTTPException, status
@@ -29,7 +30,10 @@ class TestJWTHandler(unittest.TestCase):
             },
         )
         patcher.start()
+        # Keys are read once, so reload them from the patched environment and again once it is restored
+        self.addCleanup(load_jwt_keys)
         self.addCleanup(patcher.stop)
+        load_jwt_keys()
 
     def test_create_access_token(self):
         """
@@ -110,6 +114,50 @@ class TestJWTHandler(unittest.TestCase):
         self.assertEqual(context.exception.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(context.exception.detail, "Invalid credentials")
 
+    def test_validate_access_token_cached(self):
+        """
+        Test a verified token is served from the cache without decoding it again
+        """
+        token = create_access_token(self.test_user_data)
+        exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        validate_access_token(token, exception)
+
+        with patch("backend.app.util.oauth2.jwt.decode") as mock_decode:
+            token_data = validate_access_token(token, exception)
+        mock_decode.assert_not_called()
+        self.assertEqual(token_data.user_id, self.test_user_data["user_id"])
+
+    def test_validate_access_token_cached_expired(self):
+        """
+        Test a cached token is rejected once it expires
+        """
+        token = create_access_token(self.test_user_data, timedelta(seconds=30))
+        exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        validate_access_token(token, exception)
+
+        with patch("backend.app.util.oauth2.time.time", return_value=datetime.now(timezone.utc).timestamp() + 60), \
+                patch("backend.app.util.oauth2.jwt.decode", side_effect=jwt.exceptions.ExpiredSignatureError):
+            with self.assertRaises(HTTPException):
+                validate_access_token(token, exception)
+        self.assertEqual(len(oauth2._token_cache), 0)
+
+    def test_token_cache_bounded(self):
+        """
+        Test the least recently used tokens are evicted past JWT_CACHE_SIZE, and reloading the keys clears the cache
+        """
+        exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        with patch("backend.app.util.oauth2.JWT_CACHE_SIZE", 2):
+            tokens = [create_access_token({"user_id": user_id}) for user_id in (1, 2, 3)]
+            validate_access_token(tokens[0], exception)
+            validate_access_token(tokens[1], exception)
+            validate_access_token(tokens[0], exception)
+            validate_access_token(tokens[2], exception)
+            cached = {token_data.user_id for token_data, _ in oauth2._token_cache.values()}
+            self.assertEqual(cached, {1, 3})
+
+        load_jwt_keys()
+        self.assertEqual(len(oauth2._token_cache), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
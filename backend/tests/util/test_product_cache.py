@@ -0,0 +1,89 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from backend.app.util import product_cache as product_cache_module
+from backend.app.util.product_cache import ProductCache
+from backend.app.util.schemas import ProductInfo
+
+
+class TestProductCache(unittest.TestCase):
+    def setUp(self):
+        self.ddb_util = MagicMock()
+        self.ddb_util.batch_get_items.return_value = []
+        self.product = ProductInfo(code="012345678905", name="Trail Mix", brand="Great Value")
+
+    def test_positive_and_negative_entries(self):
+        cache = ProductCache()
+        cache.put_many([(12345678905, self.product), (36000291452, None)], self.ddb_util)
+
+        found = cache.get_many([12345678905, 36000291452, 4006381333931], self.ddb_util)
+
+        self.assertTrue(found[12345678905].found)
+        self.assertEqual(found[12345678905].to_product_info("0012345678905").code, "0012345678905")
+        self.assertFalse(found[36000291452].found)
+        self.assertNotIn(4006381333931, found)
+
+    def test_separate_ttls(self):
+        cache = ProductCache(ttl=100, negative_ttl=10)
+        with patch.object(product_cache_module.time, "time", return_value=1000):
+            cache.put_many([(12345678905, self.product), (36000291452, None)], self.ddb_util)
+
+        with patch.object(product_cache_module.time, "time", return_value=1050):
+            found = cache.get_many([12345678905, 36000291452], self.ddb_util)
+
+        self.assertEqual(list(found), [12345678905])
+
+    def test_negative_caching_disabled(self):
+        cache = ProductCache(negative_ttl=0)
+        cache.put_many([(36000291452, None)], self.ddb_util)
+
+        self.assertEqual(cache.get_many([36000291452], self.ddb_util), {})
+
+    def test_lru_eviction(self):
+        cache = ProductCache(size=2)
+        cache.put_many([(1, self.product), (2, self.product)], self.ddb_util)
+        cache.get_many([1], self.ddb_util)  # 2 is now least recently used
+        cache.put_many([(3, self.product)], self.ddb_util)
+
+        self.assertEqual(sorted(cache.get_many([1, 2, 3], self.ddb_util)), [1, 3])
+
+    def test_shared_tier(self):
+        cache = ProductCache(table_name="ProductCacheTable")
+        with patch.object(product_cache_module.time, "time", return_value=1000):
+            cache.put_many([(12345678905, self.product), (36000291452, None)], self.ddb_util)
+
+        table_name, items = self.ddb_util.batch_put.call_args.args
+        self.assertEqual(table_name, "ProductCacheTable")
+        self.assertEqual(items[0]["Name"], "Trail Mix")
+        self.assertNotIn("Name", items[1])
+        self.assertTrue(all(isinstance(item["ExpiresAt"], int) for item in items))
+
+        # Another worker only has the shared tier, expired items are ignored
+        other = ProductCache(table_name="ProductCacheTable")
+        self.ddb_util.batch_get_items.return_value = [
+            {"GTIN": Decimal("12345678905"), "Name": "Trail Mix", "Brand": "Great Value", "ExpiresAt": Decimal("2000")},
+            {"GTIN": Decimal("36000291452"), "ExpiresAt": Decimal("1500")},
+        ]
+        with patch.object(product_cache_module.time, "time", return_value=1800):
+            found = other.get_many([12345678905, 36000291452], self.ddb_util)
+            self.assertEqual(list(found), [12345678905])
+            self.assertEqual(found[12345678905].name, "Trail Mix")
+
+            # The shared tier answer is now held in-process
+            self.ddb_util.batch_get_items.reset_mock()
+            other.get_many([12345678905], self.ddb_util)
+            self.ddb_util.batch_get_items.assert_not_called()
+
+    def test_shared_tier_errors_are_misses(self):
+        cache = ProductCache(table_name="ProductCacheTable")
+        error = ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": "missing"}}, "BatchGetItem")
+        self.ddb_util.batch_get_items.side_effect = error
+        self.ddb_util.batch_put.side_effect = error
+
+        self.assertEqual(cache.get_many([12345678905], self.ddb_util), {})
+        cache.put_many([(12345678905, self.product)], self.ddb_util)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+from backend.app.util import barcode_scanner
+from backend.app.util.barcode_scanner import get_products_info, iter_products_info, _race_providers
+from backend.app.util.product_cache import ProductCache
+from backend.app.util.provider_registry import Provider, ProviderRegistry
+from backend.app.util.schemas import Barcode, ProductInfo, ProductError
+
+
+class FakeProvider:
+    """
+    Async provider stub that knows a fixed set of codes and records its concurrency
+    """
+    def __init__(self, known_codes, delay=0.01):
+        self.known_codes = known_codes
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.cancelled = False
+
+    async def __call__(self, client, barcode):
+        self.calls.append(barcode.code)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            self.active -= 1
+        if barcode.code in self.known_codes:
+            return ProductInfo(code=barcode.code, name=f"name-{barcode.code}", brand="brand")
+        return ProductError(code=barcode.code, status_code=404)
+
+
+def registry(*providers):
+    """
+    Registry in fixed order without retries, so each fake sees exactly the calls under test
+    """
+    return ProviderRegistry([Provider(f"provider-{i}", provider, retries=0) for i, provider in enumerate(providers)],
+                            adaptive=False)
+
+
+class TestProductResolution(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.codes = ["012345678905", "4006381333931", "036000291452", "96385074"]
+        self.barcodes = [Barcode(code=code) for code in self.codes]
+
+        patches = [
+            patch.object(barcode_scanner, "check_db_for_upcs", return_value=({}, set())),
+            patch.object(barcode_scanner.recall_cache, "latest_run_time", return_value=None),
+            patch.object(barcode_scanner, "check_catalog_for_upcs", return_value={}),
+            patch.object(barcode_scanner, "product_cache", ProductCache()),
+            patch.object(barcode_scanner, "check_recalls", side_effect=lambda barcodes, ddb_util: {
+                barcode.code: barcode.code == "036000291452" for barcode in barcodes
+            }),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_resolves_unknown_barcodes_concurrently(self):
+        first = FakeProvider({"012345678905", "4006381333931"})
+        second = FakeProvider({"036000291452"})
+
+        with patch.object(barcode_scanner, "provider_registry", registry(first, second)):
+            products, errors = await get_products_info(self.barcodes, MagicMock(), MagicMock())
+
+        self.assertEqual([product.code for product in products], ["012345678905", "4006381333931", "036000291452"])
+        self.assertEqual([product.recall for product in products], [False, False, True])
+        self.assertEqual([(error.code, error.status_code) for error in errors], [("96385074", 404)])
+
+        # Every barcode hit the first provider at the same time, fallbacks only ran for misses
+        self.assertEqual(first.max_active, 4)
+        self.assertCountEqual(second.calls, ["036000291452", "96385074"])
+
+    async def test_concurrency_limit(self):
+        provider = FakeProvider(set(self.codes))
+
+        with patch.object(barcode_scanner, "provider_registry", registry(provider)), \
+                patch.object(barcode_scanner, "PRODUCT_LOOKUP_CONCURRENCY", 2), \
+                patch.object(barcode_scanner, "_lookup_semaphore", None):
+            products, errors = await get_products_info(self.barcodes, MagicMock(), MagicMock())
+
+        self.assertEqual(len(products), 4)
+        self.assertEqual(provider.max_active, 2)
+
+    async def test_invalid_barcodes_skip_providers(self):
+        provider = FakeProvider(set())
+
+        with patch.object(barcode_scanner, "provider_registry", registry(provider)):
+            products, errors = await get_products_info([Barcode(code="012345678906")], MagicMock(), MagicMock())
+
+        self.assertEqual(products, [])
+        self.assertEqual(errors[0].status_code, 422)
+        self.assertEqual(provider.calls, [])
+
+    async def test_provider_answers_are_cached(self):
+        provider = FakeProvider({"012345678905"})
+
+        with patch.object(barcode_scanner, "provider_registry", registry(provider)):
+            await get_products_info(self.barcodes, MagicMock(), MagicMock())
+            # The EAN-13 form of an already resolved UPC-A is the same GTIN
+            products, errors = await get_products_info(
+                self.barcodes + [Barcode(code="0012345678905")], MagicMock(), MagicMock())
+
+        self.assertEqual([product.code for product in products], ["012345678905", "0012345678905"])
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(len(provider.calls), 4)
+
+    async def test_concurrent_requests_share_lookups(self):
+        provider = FakeProvider(set(self.codes), delay=0.05)
+        lookups = barcode_scanner.SingleFlight()
+
+        with patch.object(barcode_scanner, "provider_registry", registry(provider)), \
+                patch.object(barcode_scanner, "product_lookups", lookups):
+            results = await asyncio.gather(*(get_products_info(self.barcodes, MagicMock(), MagicMock()) for _ in range(5)))
+
+        self.assertTrue(all(len(products) == 4 for products, _ in results))
+        self.assertEqual(len(provider.calls), 4)
+        self.assertEqual(lookups.coalesced, 16)
+
+    async def test_transient_failures_are_not_cached(self):
+        provider = MagicMock(side_effect=[
+            ProductError(code="012345678905", status_code=500),
+            ProductInfo(code="012345678905", name="name", brand="brand"),
+        ])
+
+        async def flaky_provider(client, barcode):
+            return provider(client, barcode)
+
+        with patch.object(barcode_scanner, "provider_registry", registry(flaky_provider)):
+            first_products, first_errors = await get_products_info([Barcode(code="012345678905")], MagicMock(), MagicMock())
+            products, errors = await get_products_info([Barcode(code="012345678905")], MagicMock(), MagicMock())
+
+        self.assertEqual(first_errors[0].status_code, 500)
+        self.assertEqual(products[0].name, "name")
+
+    async def test_open_circuit_is_not_cached_as_unknown(self):
+        down = FakeProvider({"012345678905"})
+        answering = FakeProvider(set())
+        providers = registry(down, answering)
+        for _ in range(providers.providers[0].breaker.failure_threshold):
+            providers.providers[0].breaker.record_failure()
+
+        with patch.object(barcode_scanner, "provider_registry", providers):
+            products, errors = await get_products_info([Barcode(code="012345678905")], MagicMock(), MagicMock())
+            # The skipped provider may know the barcode, so the miss is transient and not cached
+            self.assertEqual(errors[0].status_code, 503)
+            self.assertEqual(down.calls, [])
+            with patch.object(barcode_scanner, "PRODUCT_LOOKUP_MODE", "race"):
+                products, errors = await get_products_info([Barcode(code="012345678905")], MagicMock(), MagicMock())
+            self.assertEqual(errors[0].status_code, 503)
+        self.assertEqual(len(answering.calls), 2)
+
+    async def test_results_stream_as_they_resolve(self):
+        fast = FakeProvider({"012345678905", "4006381333931", "036000291452"}, delay=0.01)
+        slow = FakeProvider({"96385074"}, delay=0.2)
+
+        async def provider(client, barcode):
+            return await (slow if barcode.code == "96385074" else fast)(client, barcode)
+
+        barcodes = [Barcode(code="96385074"), Barcode(code="bad")] + self.barcodes[:3]
+        with patch.object(barcode_scanner, "provider_registry", registry(provider)):
+            results = [(code, result) async for code, result in iter_products_info(barcodes, MagicMock(), MagicMock())]
+
+        # The invalid code first, then the fast lookups, and the slow one last
+        codes = [code for code, _ in results]
+        self.assertEqual(codes[0], "bad")
+        self.assertCountEqual(codes[1:4], ["012345678905", "4006381333931", "036000291452"])
+        self.assertEqual(codes[4], "96385074")
+        self.assertIsInstance(results[0][1], ProductError)
+        self.assertTrue(dict(results)["036000291452"].recall)
+
+
+class TestHedgedRace(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.barcode = Barcode(code="012345678905")
+
+    async def test_hedge_starts_next_provider_after_delay(self):
+        slow = FakeProvider({self.barcode.code}, delay=0.5)
+        fast = FakeProvider({self.barcode.code}, delay=0.01)
+        spare = FakeProvider({self.barcode.code}, delay=0.01)
+
+        with patch.object(barcode_scanner, "provider_registry", registry(slow, fast, spare)):
+            result = await _race_providers(MagicMock(), self.barcode, hedge_delay=0.05)
+
+        # The slow first provider still wins on priority, hedges only start one delay apart
+        self.assertEqual(result.name, f"name-{self.barcode.code}")
+        self.assertEqual(len(fast.calls), 1)
+        self.assertEqual(len(spare.calls), 1)
+        self.assertFalse(slow.cancelled)
+
+    async def test_highest_priority_success_wins_and_losers_are_cancelled(self):
+        failing = FakeProvider(set(), delay=0.01)
+        second = FakeProvider({self.barcode.code}, delay=0.05)
+        third = FakeProvider({self.barcode.code}, delay=0.01)
+        fourth = FakeProvider({self.barcode.code}, delay=1)
+
+        with patch.object(barcode_scanner, "provider_registry", registry(failing, second, third, fourth)):
+            result = await _race_providers(MagicMock(), self.barcode, hedge_delay=0)
+
+        # The third answered first, but the second outranks it once the first failed
+        self.assertIsInstance(result, ProductInfo)
+        self.assertEqual(second.max_active, 1)
+        self.assertTrue(fourth.cancelled)
+
+    async def test_failed_provider_starts_next_without_waiting(self):
+        failing = FakeProvider(set(), delay=0.01)
+        second = FakeProvider({self.barcode.code}, delay=0.01)
+
+        with patch.object(barcode_scanner, "provider_registry", registry(failing, second)):
+            start = asyncio.get_running_loop().time()
+            result = await _race_providers(MagicMock(), self.barcode, hedge_delay=10)
+
+        self.assertIsInstance(result, ProductInfo)
+        self.assertLess(asyncio.get_running_loop().time() - start, 1)
+
+    async def test_all_providers_fail(self):
+        providers = [FakeProvider(set()), FakeProvider(set())]
+
+        with patch.object(barcode_scanner, "provider_registry", registry(*providers)):
+            result = await _race_providers(MagicMock(), self.barcode, hedge_delay=0.01)
+
+        self.assertIsInstance(result, ProductError)
+        self.assertEqual(result.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+from backend.app.util import provider_registry as registry_module
+from backend.app.util.provider_registry import Provider, ProviderRegistry, CircuitBreaker, RetryBudget, FOUND, NOT_FOUND
+from backend.app.util.schemas import Barcode, ProductInfo, ProductError
+
+
+class ScriptedFetch:
+    """
+    Async fetch stub returning the scripted status codes in turn, 200 being a found product
+    """
+    def __init__(self, *statuses, delay=0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, client, barcode):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        status_code = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        if status_code == 200:
+            return ProductInfo(code=barcode.code, name="name", brand="brand")
+        return ProductError(code=barcode.code, status_code=status_code)
+
+
+class TestProvider(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.barcode = Barcode(code="012345678905")
+
+    async def test_timeout(self):
+        provider = Provider("slow", ScriptedFetch(200, delay=1), timeout=0.01, retries=0)
+
+        result = await provider(MagicMock(), self.barcode)
+
+        self.assertEqual(result.status_code, 504)
+        self.assertEqual(provider.health().success_rate, 0)
+
+    async def test_retries_errors_but_not_misses(self):
+        fetch = ScriptedFetch(500, 200)
+        provider = Provider("flaky", fetch, retries=1)
+        self.assertIsInstance(await provider(MagicMock(), self.barcode), ProductInfo)
+        self.assertEqual(fetch.calls, 2)
+
+        fetch = ScriptedFetch(404)
+        provider = Provider("unknown", fetch, retries=1)
+        self.assertEqual((await provider(MagicMock(), self.barcode)).status_code, 404)
+        self.assertEqual(fetch.calls, 1)
+
+    async def test_retries_back_off_with_jitter(self):
+        fetch = ScriptedFetch(500, 500, 500, 200)
+        provider = Provider("flaky", fetch, retries=3, retry_base_delay=0.001, retry_max_delay=0.003)
+        provider.retry_budget = RetryBudget(ratio=0.1, max_tokens=3)
+
+        with patch.object(registry_module.random, "uniform", wraps=registry_module.random.uniform) as uniform:
+            self.assertIsInstance(await provider(MagicMock(), self.barcode), ProductInfo)
+
+        # A random delay under a ceiling doubling per retry, up to the cap
+        self.assertEqual([call.args for call in uniform.call_args_list], [(0, 0.001), (0, 0.002), (0, 0.003)])
+
+    async def test_retry_budget(self):
+        fetch = ScriptedFetch(500)
+        provider = Provider("down", fetch, retries=3)
+        provider.retry_budget = RetryBudget(ratio=0.1, max_tokens=2)
+        provider.breaker = CircuitBreaker(failure_threshold=100)
+
+        await provider(MagicMock(), self.barcode)
+        await provider(MagicMock(), self.barcode)
+
+        # Two calls, but only two retries in the budget between them
+        self.assertEqual(fetch.calls, 4)
+
+    async def test_circuit_opens_and_recovers(self):
+        fetch = ScriptedFetch(500, 500, 200)
+        provider = Provider("down", fetch, retries=0)
+        provider.breaker = CircuitBreaker(failure_threshold=2, cooldown=30)
+
+        await provider(MagicMock(), self.barcode)
+        await provider(MagicMock(), self.barcode)
+        self.assertEqual(provider.breaker.state, "open")
+
+        # Open circuit fails fast without calling the provider
+        result = await provider(MagicMock(), self.barcode)
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(fetch.calls, 2)
+        self.assertEqual(ProviderRegistry([provider]).ordered(), [])
+
+        # After the cooldown a trial call closes it again
+        with patch.object(registry_module.time, "monotonic", return_value=provider.breaker.opened_at + 31):
+            self.assertIsInstance(await provider(MagicMock(), self.barcode), ProductInfo)
+        self.assertEqual(provider.breaker.state, "closed")
+
+    def test_half_open_allows_one_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+
+        self.assertTrue(breaker.acquire())
+        self.assertFalse(breaker.acquire())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+
+class TestProviderRegistry(unittest.TestCase):
+    def provider(self, name, latency, found_ratio, calls=20):
+        provider = Provider(name, ScriptedFetch(200))
+        found = int(calls * found_ratio)
+        for i in range(calls):
+            provider.record(FOUND if i < found else NOT_FOUND, latency)
+        return provider
+
+    def test_keeps_priority_until_enough_samples(self):
+        first = self.provider("first", 1.0, 0.5, calls=5)
+        second = self.provider("second", 0.1, 0.5)
+
+        self.assertEqual(ProviderRegistry([first, second], min_samples=20).ordered(), [first, second])
+
+    def test_orders_by_expected_cost(self):
+        slow = self.provider("slow", 1.0, 0.9)
+        fast = self.provider("fast", 0.1, 0.5)
+        useless = self.provider("useless", 0.05, 0.0)
+
+        registry = ProviderRegistry([slow, useless, fast], min_samples=20)
+
+        self.assertEqual(registry.ordered(), [fast, useless, slow])
+        self.assertEqual([health.name for health in registry.health()], ["slow", "useless", "fast"])
+        self.assertEqual(registry.health()[0].found_rate, 0.9)
+
+    def test_fixed_order(self):
+        slow = self.provider("slow", 1.0, 0.5)
+        fast = self.provider("fast", 0.1, 0.5)
+
+        self.assertEqual(ProviderRegistry([slow, fast], adaptive=False).ordered(), [slow, fast])
+
+
+if __name__ == "__main__":
+    unittest.main()
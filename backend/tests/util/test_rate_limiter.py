@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+from backend.app.util.rate_limiter import TokenBucket
+from backend.app.util.provider_registry import Provider
+from backend.app.util.schemas import Barcode, ProductInfo
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_then_rejects_without_waiting(self):
+        bucket = TokenBucket(rate=1, burst=3)
+
+        admitted = [await bucket.acquire(max_wait=0) for _ in range(4)]
+
+        self.assertEqual(admitted, [True, True, True, False])
+        state = bucket.state()
+        self.assertEqual((state.admitted, state.rejected, state.delayed), (3, 1, 0))
+
+    async def test_queues_for_bounded_time(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        # One token now, the next two every 20 ms; the fourth would wait 60 ms
+        admitted = await asyncio.gather(*(bucket.acquire(max_wait=0.05) for _ in range(4)))
+
+        self.assertEqual(admitted, [True, True, True, False])
+        self.assertGreaterEqual(loop.time() - start, 0.035)
+        self.assertEqual(bucket.state().delayed, 2)
+        self.assertEqual(bucket.state().waiting, 0)
+
+    async def test_cancelled_waiter_returns_its_token(self):
+        bucket = TokenBucket(rate=10, burst=1)
+        await bucket.acquire()
+
+        waiter = asyncio.create_task(bucket.acquire(max_wait=1))
+        await asyncio.sleep(0)
+        self.assertEqual(bucket.state().waiting, 1)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+
+        self.assertGreater(bucket.tokens, -0.5)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0, burst=1)
+
+
+class TestRateLimitedProvider(unittest.IsolatedAsyncioTestCase):
+    async def test_skips_provider_over_quota(self):
+        calls = []
+
+        async def fetch(client, barcode):
+            calls.append(barcode.code)
+            return ProductInfo(code=barcode.code, name="name", brand="brand")
+
+        provider = Provider("limited", fetch, rate_limit=TokenBucket(rate=0.1, burst=1), max_wait=0.01)
+        barcode = Barcode(code="012345678905")
+
+        self.assertIsInstance(await provider(MagicMock(), barcode), ProductInfo)
+        result = await provider(MagicMock(), barcode)
+
+        self.assertEqual(result.status_code, 429)
+        self.assertEqual(len(calls), 1)
+        # Skipping for quota is not a provider failure
+        self.assertEqual(provider.breaker.consecutive_failures, 0)
+        self.assertEqual(provider.health().rate_limit.rejected, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock
+from decimal import Decimal
+from backend.app.util.recall_cache import RecallCache, BloomFilter
+from backend.app.util.gtin import to_gtin
+
+
+class TestRecallCache(unittest.TestCase):
+    def setUp(self):
+        self.ddb_util = MagicMock()
+        self.ddb_util.scan_all.return_value = [
+            {"UPCs": ["012345678905"]},
+            {"UPCs": ["4006381333931", "012345678906"]},
+            {},
+        ]
+        self.ddb_util.scan_table.return_value = [
+            {"StatusCode": 200, "LogTimestamp": Decimal("1731700000000"), "InvocationId": "1"},
+        ]
+
+    def test_set_mode_answers_from_memory(self):
+        cache = RecallCache(mode="set", check_interval=60)
+
+        self.assertTrue(cache.contains(to_gtin("012345678905"), self.ddb_util))
+        self.assertTrue(cache.contains(to_gtin("0012345678905"), self.ddb_util))  # EAN-13 form
+        self.assertTrue(cache.contains(to_gtin("4006381333931"), self.ddb_util))
+        self.assertFalse(cache.contains(to_gtin("036000291452"), self.ddb_util))
+
+        # Loaded once, and the recall run was checked once within the interval
+        self.ddb_util.scan_all.assert_called_once()
+        self.ddb_util.scan_table.assert_called_once()
+
+    def test_reloads_only_on_newer_recall_run(self):
+        cache = RecallCache(mode="set", check_interval=0)
+
+        cache.contains(to_gtin("012345678905"), self.ddb_util)
+        cache.contains(to_gtin("012345678905"), self.ddb_util)
+        self.assertEqual(self.ddb_util.scan_all.call_count, 1)
+
+        self.ddb_util.scan_table.return_value = [
+            {"StatusCode": 200, "LogTimestamp": Decimal("1731800000000"), "InvocationId": "2"},
+        ]
+        self.ddb_util.scan_all.return_value = [{"UPCs": ["036000291452"]}]
+
+        self.assertTrue(cache.contains(to_gtin("036000291452"), self.ddb_util))
+        self.assertFalse(cache.contains(to_gtin("012345678905"), self.ddb_util))
+        self.assertEqual(self.ddb_util.scan_all.call_count, 2)
+
+    def test_bloom_mode_defers_hits_to_dynamodb(self):
+        cache = RecallCache(mode="bloom", check_interval=60)
+
+        self.assertIsNone(cache.contains(to_gtin("012345678905"), self.ddb_util))
+        self.assertFalse(cache.contains(to_gtin("036000291452"), self.ddb_util))
+
+    def test_off_mode(self):
+        cache = RecallCache(mode="off")
+
+        self.assertIsNone(cache.contains(to_gtin("012345678905"), self.ddb_util))
+        self.ddb_util.scan_all.assert_not_called()
+
+    def test_latest_run_time(self):
+        cache = RecallCache(mode="set", check_interval=60)
+        self.assertEqual(cache.latest_run_time(self.ddb_util), 1731700000000)
+
+        # Without an in-memory copy the run is still looked up only once per interval
+        cache = RecallCache(mode="off", check_interval=60)
+        self.ddb_util.scan_table.reset_mock()
+        self.assertEqual(cache.latest_run_time(self.ddb_util), 1731700000000)
+        self.assertEqual(cache.latest_run_time(self.ddb_util), 1731700000000)
+        self.ddb_util.scan_table.assert_called_once()
+        self.ddb_util.scan_all.assert_called_once()
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        keys = [100000000000 + i for i in range(1000)]
+        bloom = BloomFilter(len(keys), 0.01)
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(200000000000 + i in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
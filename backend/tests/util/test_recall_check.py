@@ -0,0 +1,53 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import ANY, MagicMock, patch
+from backend.app.util.barcode_scanner import check_recalls, get_recall_info
+from backend.app.util.recall_cache import RecallCache
+from backend.app.util.schemas import Barcode
+
+
+class TestCheckRecalls(unittest.TestCase):
+    def setUp(self):
+        self.ddb_util = MagicMock()
+        self.ddb_util.batch_get_items.return_value = [{"GTIN": Decimal("12345678905"), "RecallID": "abc"}]
+        self.barcodes = [
+            Barcode(code="0012345678905"),
+            Barcode(code="012345678905"),
+            Barcode(code="036000291452"),
+            Barcode(code="012345678906"),
+        ]
+
+    @patch("backend.app.util.barcode_scanner.recall_cache", RecallCache(mode="off"))
+    def test_check_recalls_single_batch(self):
+        recalls = check_recalls(self.barcodes, self.ddb_util)
+
+        self.assertEqual(recalls, {
+            "0012345678905": True,
+            "012345678905": True,
+            "036000291452": False,
+            "012345678906": False,  # Invalid check digit
+        })
+        # Both forms of the same product share one key
+        self.ddb_util.batch_get_items.assert_called_once_with(ANY, "GTIN", [12345678905, 36000291452])
+
+    @patch("backend.app.util.barcode_scanner.recall_cache")
+    def test_check_recalls_answered_from_cache(self, mock_cache):
+        mock_cache.contains.side_effect = lambda gtin, ddb_util: gtin == 36000291452
+
+        recalls = check_recalls(self.barcodes, self.ddb_util)
+
+        self.assertEqual(recalls, {
+            "0012345678905": False,
+            "012345678905": False,
+            "036000291452": True,
+            "012345678906": False,
+        })
+        self.ddb_util.batch_get_items.assert_not_called()
+
+    @patch("backend.app.util.barcode_scanner.recall_cache", RecallCache(mode="off"))
+    def test_get_recall_info(self):
+        self.assertTrue(get_recall_info(Barcode(code="0012345678905"), self.ddb_util))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import json
+import struct
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from backend.app.util.recall_snapshot import RecallSnapshot, SNAPSHOT_HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION
+from backend.app.util.recall_cache import RecallCache
+from backend.app.util.gtin import to_gtin
+
+
+def write_snapshot(path, recall_ids):
+    """
+    Write a snapshot in the recall processor's layout from a {gtin: [RecallID]} mapping
+    """
+    keys = sorted(recall_ids)
+    records = [json.dumps({"RecallIDs": recall_ids[key]}).encode("utf-8") for key in keys]
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(keys)))
+        snapshot_file.write(struct.pack(f"<{len(keys)}Q", *keys))
+        snapshot_file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        snapshot_file.write(b"".join(records))
+
+
+class TestRecallSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "recalls.snapshot")
+        write_snapshot(self.path, {
+            12345678905: ["a"],
+            4006381333931: ["b", "c"],
+            36000291452: ["d"],
+        })
+
+    def test_lookup(self):
+        snapshot = RecallSnapshot(self.path)
+        self.addCleanup(snapshot.close)
+
+        self.assertEqual(len(snapshot), 3)
+        self.assertIn(12345678905, snapshot)
+        self.assertNotIn(12345678906, snapshot)
+        self.assertEqual(snapshot.get_recall_ids(4006381333931), ["b", "c"])
+        self.assertEqual(snapshot.get_recall_ids(36000291452), ["d"])
+        self.assertEqual(snapshot.get_recall_ids(1), [])
+
+    def test_invalid_snapshot(self):
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(b"NOPE" + bytes(8))
+
+        with self.assertRaises(ValueError):
+            RecallSnapshot(self.path)
+
+    def test_recall_cache_snapshot_mode(self):
+        ddb_util = MagicMock()
+        cache = RecallCache(mode="snapshot", check_interval=0, snapshot_path=self.path)
+
+        # UPC-A and EAN-13 forms of the same product share one integer key
+        self.assertTrue(cache.contains(to_gtin("012345678905"), ddb_util))
+        self.assertTrue(cache.contains(to_gtin("0012345678905"), ddb_util))
+        self.assertFalse(cache.contains(to_gtin("012345678912"), ddb_util))
+        ddb_util.scan_all.assert_not_called()
+
+        # A replaced snapshot is remapped on the next check
+        write_snapshot(self.path + ".new", {12345678912: ["e"]})
+        os.replace(self.path + ".new", self.path)
+        self.assertTrue(cache.contains(to_gtin("012345678912"), ddb_util))
+        self.assertFalse(cache.contains(to_gtin("012345678905"), ddb_util))
+
+    def test_recall_cache_snapshot_missing(self):
+        cache = RecallCache(mode="snapshot", snapshot_path=os.path.join(self.tmp_dir.name, "missing"))
+
+        self.assertIsNone(cache.contains(to_gtin("012345678905"), MagicMock()))
+
+
+if __name__ == "__main__":
+    unittest.main()
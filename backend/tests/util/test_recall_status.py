@@ -0,0 +1,84 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.app.util import barcode_scanner
+from backend.app.util.barcode_scanner import get_products_info
+from backend.app.util.models import Base, Product
+from backend.app.util.recall_cache import RecallCache
+from backend.app.util.schemas import Barcode
+
+
+class TestStoredRecallStatus(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # The session is used from the threadpool, so share one connection across threads
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add_all([
+            Product(product_id=1, code="012345678905", gtin=12345678905, name="Fresh", brand="brand",
+                    recall=True, recall_checked_at=200),
+            Product(product_id=2, code="036000291452", gtin=36000291452, name="Stale", brand="brand",
+                    recall=False, recall_checked_at=100),
+            Product(product_id=3, code="4006381333931", gtin=4006381333931, name="Unchecked", brand="brand",
+                    recall=False, recall_checked_at=None),
+        ])
+        self.db.commit()
+
+        self.check_recalls = MagicMock(side_effect=lambda barcodes, ddb_util: {barcode.code: True for barcode in barcodes})
+        patches = [
+            patch.object(barcode_scanner, "check_recalls", self.check_recalls),
+            patch.object(barcode_scanner.recall_cache, "latest_run_time", return_value=200),
+            patch.object(barcode_scanner, "RECALL_DB_DISABLED", False),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_fresh_rows_skip_recall_check(self):
+        products, errors = await get_products_info([Barcode(code="0012345678905")], MagicMock(), self.db)
+
+        self.assertEqual([(product.code, product.recall) for product in products], [("012345678905", True)])
+        self.assertEqual(self.check_recalls.call_args.args[0], [])
+
+    async def test_stale_rows_are_rechecked_and_stored(self):
+        barcodes = [Barcode(code=code) for code in ("012345678905", "036000291452", "4006381333931")]
+
+        products, errors = await get_products_info(barcodes, MagicMock(), self.db)
+
+        self.assertTrue(all(product.recall for product in products))
+        self.assertEqual([barcode.code for barcode in self.check_recalls.call_args.args[0]], ["036000291452", "4006381333931"])
+
+        self.db.expire_all()
+        stored = {product.gtin: (product.recall, product.recall_checked_at) for product in self.db.query(Product)}
+        self.assertEqual(stored, {12345678905: (True, 200), 36000291452: (True, 200), 4006381333931: (True, 200)})
+
+        # Every row is fresh now
+        self.check_recalls.reset_mock()
+        await get_products_info(barcodes, MagicMock(), self.db)
+        self.assertEqual(self.check_recalls.call_args.args[0], [])
+
+    async def test_fractional_run_time_is_stored_fresh(self):
+        """
+        The recall processor logs run times with a fractional part, rows checked against a run stay fresh for it
+        """
+        ddb_util = MagicMock()
+        ddb_util.scan_table.return_value = [{"InvocationId": "1", "StatusCode": Decimal("200"),
+                                             "LogTimestamp": Decimal("1792314049807.26")}]
+        barcodes = [Barcode(code="4006381333931")]
+        with patch.object(barcode_scanner, "recall_cache", RecallCache(mode="off")):
+            await get_products_info(barcodes, ddb_util, self.db)
+            self.db.expire_all()
+            self.assertEqual(self.db.get(Product, 3).recall_checked_at, 1792314049807)
+
+            self.check_recalls.reset_mock()
+            await get_products_info(barcodes, ddb_util, self.db)
+        self.assertEqual(self.check_recalls.call_args.args[0], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
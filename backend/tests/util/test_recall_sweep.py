@@ -0,0 +1,101 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from backend.app.util.models import Base, PantryChange, Product, RecallAlert, User, user_product_association
+from backend.app.util.recall_sweep import sweep_recalls
+from backend.app.dao import pantry_dao
+from backend.app.dao.recall_sweep_dao import RecallSweepDao
+from backend.app.util.barcode_scanner import update_recall_status
+
+
+class TestRecallSweep(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+
+        self.db.add_all([
+            User(user_id=1, first_name="a", last_name="b", zip_code="1", email="a@b.c", password="x", pantry_version=3),
+            User(user_id=2, first_name="c", last_name="d", zip_code="1", email="c@d.e", password="x", pantry_version=0),
+            User(user_id=3, first_name="e", last_name="f", zip_code="1", email="e@f.g", password="x", pantry_version=5),
+            Product(product_id=1, code="012345678905", gtin=12345678905, name="Recalled", brand="brand", recall=False),
+            Product(product_id=2, code="036000291452", gtin=36000291452, name="Safe", brand="brand", recall=False),
+            Product(product_id=3, code="4006381333931", gtin=4006381333931, name="Known", brand="brand", recall=True),
+        ])
+        self.db.flush()
+        self.db.execute(user_product_association.insert(), [
+            {"user_id": 1, "product_id": 1}, {"user_id": 2, "product_id": 1},
+            {"user_id": 1, "product_id": 2}, {"user_id": 3, "product_id": 3},
+        ])
+        self.db.commit()
+
+        self.ddb_util = MagicMock()
+        self.ddb_util.query_after.return_value = [
+            {"PK": "GPK", "StatusCode": 200, "LogTimestamp": Decimal("1000"),
+             "RecallGTINs": [Decimal("12345678905"), Decimal("4006381333931")]},
+            {"PK": "GPK", "StatusCode": 204, "LogTimestamp": Decimal("1500")},
+            # Logged before runs recorded their GTINs
+            {"PK": "GPK", "StatusCode": 200, "LogTimestamp": Decimal("2000")},
+        ]
+
+    def test_flags_matching_products_and_affected_users(self):
+        sweeps = sweep_recalls(self.ddb_util, self.db)
+
+        self.assertEqual([(sweep.run_time, sweep.products_flagged, sweep.users_affected) for sweep in sweeps],
+                         [(1000, 1, 3), (2000, 0, 0)])
+        recalls = dict(self.db.execute(select(Product.product_id, Product.recall)).all())
+        self.assertEqual(recalls, {1: True, 2: False, 3: True})
+        self.assertEqual(self.db.get(Product, 1).recall_checked_at, 1000)
+
+        # Holders of every matching product are alerted, only those of the newly flagged one see a new pantry version
+        alerts = self.db.execute(select(RecallAlert.user_id, RecallAlert.product_id, RecallAlert.run_time)).all()
+        self.assertCountEqual(alerts, [(1, 1, 1000), (2, 1, 1000), (3, 3, 1000)])
+        versions = dict(self.db.execute(select(User.user_id, User.pantry_version)).all())
+        self.assertEqual(versions, {1: 4, 2: 1, 3: 5})
+        changes = self.db.execute(select(PantryChange.user_id, PantryChange.version, PantryChange.product_id)).all()
+        self.assertCountEqual(changes, [(1, 4, 1), (2, 1, 1)])
+
+    def test_runs_are_swept_once(self):
+        sweep_recalls(self.ddb_util, self.db)
+        self.assertEqual(RecallSweepDao.get_last_swept_run(self.db), 2000)
+
+        # The log is read after the last swept run, and a replayed run is skipped
+        self.assertEqual(sweep_recalls(self.ddb_util, self.db), [])
+        self.assertEqual(self.ddb_util.query_after.call_args.args[-1], Decimal("2000"))
+        self.assertEqual(self.db.execute(select(User.pantry_version).where(User.user_id == 1)).scalar(), 4)
+
+    def test_product_flagged_on_scan_before_sweep(self):
+        # A scan finds the recall first and stores the flag
+        update_recall_status({12345678905: True, 36000291452: False}, 1000, self.db)
+        versions = dict(self.db.execute(select(User.user_id, User.pantry_version)).all())
+        self.assertEqual(versions, {1: 4, 2: 1, 3: 5})
+        changes = self.db.execute(select(PantryChange.user_id, PantryChange.version, PantryChange.product_id)).all()
+        self.assertCountEqual(changes, [(1, 4, 1), (2, 1, 1)])
+
+        # The sweep still alerts the holders, without bumping their pantries again
+        sweeps = sweep_recalls(self.ddb_util, self.db)
+        self.assertEqual((sweeps[0].products_flagged, sweeps[0].users_affected), (0, 3))
+        alerts = self.db.execute(select(RecallAlert.user_id, RecallAlert.product_id)).all()
+        self.assertCountEqual(alerts, [(1, 1), (2, 1), (3, 3)])
+        versions = dict(self.db.execute(select(User.user_id, User.pantry_version)).all())
+        self.assertEqual(versions, {1: 4, 2: 1, 3: 5})
+
+    def test_change_log_trimmed(self):
+        # User 1 is at version 3 with a change logged at each version
+        self.db.execute(PantryChange.__table__.insert(), [
+            {"user_id": 1, "version": version, "product_id": 2, "added": True} for version in (1, 2, 3)])
+        self.db.commit()
+
+        with patch.object(pantry_dao, "PANTRY_CHANGE_LOG_VERSIONS", 2):
+            sweep_recalls(self.ddb_util, self.db)
+
+        # Only the versions a delta can still be served from are kept
+        versions = self.db.execute(select(PantryChange.version).where(PantryChange.user_id == 1)).scalars().all()
+        self.assertCountEqual(versions, [3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
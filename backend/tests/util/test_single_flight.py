@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from backend.app.util.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        executions = []
+
+        async def work(key):
+            executions.append(key)
+            await asyncio.sleep(0.01)
+            return f"result-{key}"
+
+        results = await asyncio.gather(*(flight.do(key, lambda key=key: work(key)) for key in ["a", "a", "a", "b"]))
+
+        self.assertEqual([result for result, _ in results], ["result-a", "result-a", "result-a", "result-b"])
+        self.assertEqual([shared for _, shared in results], [False, True, True, False])
+        self.assertEqual(executions, ["a", "b"])
+        self.assertEqual(flight.stats(), {"calls": 4, "executions": 2, "coalesced": 2, "in_flight": 0})
+
+    async def test_sequential_calls_run_again(self):
+        flight = SingleFlight()
+
+        async def work():
+            return 1
+
+        await flight.do("a", work)
+        await flight.do("a", work)
+
+        self.assertEqual(flight.executions, 2)
+
+    async def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("a", work), flight.do("a", work), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flight.in_flight, 0)
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flight.do("a", work))
+        second = asyncio.create_task(flight.do("a", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        self.assertEqual(await second, ("done", True))
+
+
+if __name__ == "__main__":
+    unittest.main()
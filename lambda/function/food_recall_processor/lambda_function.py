@@ -5,7 +5,7 @@ import os
 from food_recall_processor.utils.logging_util import Logger
 from food_recall_processor.utils.dynamo_util import DynamoUtil
 from food_recall_processor.src.recall_processor import RecallProcessor
-from food_recall_processor.utils.config import DYNAMODB_ENDPOINT, DYNAMODB_REGION, DYNAMODB_LAMBDA_LOGS_TABLE, DYNAMODB_RECALL_TABLE, RECALL_TIMESPAN
+from food_recall_processor.utils.config import DYNAMODB_ENDPOINT, DYNAMODB_REGION, DYNAMODB_LAMBDA_LOGS_TABLE, DYNAMODB_RECALL_TABLE, DYNAMODB_RECALL_INDEX_TABLE, RECALL_TIMESPAN, RECALL_SNAPSHOT_PATH
 
 
 def create_table_helper(database: DynamoUtil, table_name: str, key_schema:list, attribute_definitions:list) -> None:
@@ -32,6 +32,14 @@ def init_tables(ddb_util):
                         attribute_definitions = [{"AttributeName": "RecallID", "AttributeType": "S"}]
                         )
 
+    # Create GTIN -> RecallID index table
+    if DYNAMODB_RECALL_INDEX_TABLE:
+        create_table_helper(ddb_util,
+                            DYNAMODB_RECALL_INDEX_TABLE,
+                            key_schema = [{"AttributeName": "GTIN", "KeyType": "HASH"}],
+                            attribute_definitions = [{"AttributeName": "GTIN", "AttributeType": "N"}]
+                            )
+
     # Create Lambda logs table
     create_table_helper(ddb_util,
                         DYNAMODB_LAMBDA_LOGS_TABLE,
@@ -70,8 +78,11 @@ def lambda_handler(event, context):
     # Get recalls
     recalls = processor.get_recall_data()
     if recalls:
-        processor.store_recall_data(DYNAMODB_RECALL_TABLE, recalls)
-        processor.store_log(DYNAMODB_LAMBDA_LOGS_TABLE, 200)
+        new_recalls = processor.store_recall_data(DYNAMODB_RECALL_TABLE, recalls, index_table_name=DYNAMODB_RECALL_INDEX_TABLE)
+        if RECALL_SNAPSHOT_PATH:
+            processor.store_recall_snapshot(DYNAMODB_RECALL_TABLE, RECALL_SNAPSHOT_PATH)
+        # The backend recall sweep flags pantry products matching the recalls new in this run
+        processor.store_log(DYNAMODB_LAMBDA_LOGS_TABLE, 200, recall_gtins=processor.recall_gtins(new_recalls))
         return {
             "statusCode": 200,
             "body": f"Stored {len(recalls)} recalls successfully.",
@@ -0,0 +1,40 @@
+import sys
+
+sys.path.append("/opt/python")  # Ensures Lambda layer dependencies are accessible
+from food_recall_processor.utils.logging_util import Logger
+from food_recall_processor.utils.dynamo_util import DynamoUtil
+from food_recall_processor.src.recall_processor import RecallProcessor
+from food_recall_processor.lambda_function import init_tables
+from food_recall_processor.utils.config import DYNAMODB_ENDPOINT, DYNAMODB_REGION, DYNAMODB_RECALL_TABLE, DYNAMODB_RECALL_INDEX_TABLE
+
+
+def backfill_recall_index(ddb_util: DynamoUtil, logger: Logger) -> int:
+    """
+    Build the GTIN -> RecallID index table from every recall already in the recalls table
+    :param ddb_util: DynamoDB utility instance
+    :param logger: Logger instance
+    :return: number of recalls indexed
+    """
+    if not DYNAMODB_RECALL_INDEX_TABLE:
+        raise ValueError("DYNAMODB_RECALL_INDEX_TABLE must be set to backfill the recall index")
+
+    init_tables(ddb_util)
+
+    recalls = ddb_util.scan_all(DYNAMODB_RECALL_TABLE, projection="RecallID, UPCs")
+    logger.log("info", f"Backfilling recall index from {len(recalls)} recalls in '{DYNAMODB_RECALL_TABLE}'.")
+
+    processor = RecallProcessor(ddb_util, logger)
+    processor.store_recall_index(DYNAMODB_RECALL_INDEX_TABLE, recalls)
+    return len(recalls)
+
+
+if __name__ == "__main__":
+    # One-shot backfill: python -m food_recall_processor.src.backfill_recall_index
+    if DYNAMODB_ENDPOINT:
+        database = DynamoUtil(endpoint=DYNAMODB_ENDPOINT, region='us-east-2')
+    else:
+        database = DynamoUtil(region=DYNAMODB_REGION)
+
+    backfill_logger = Logger(name="recall_index_backfill", to_file=False)
+    count = backfill_recall_index(database, backfill_logger)
+    backfill_logger.log("info", f"Indexed GTINs for {count} recalls.")
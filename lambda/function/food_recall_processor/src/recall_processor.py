@@ -2,12 +2,14 @@ import time
 import uuid
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import List, Dict
+from typing import List, Dict, Optional
 import hashlib
 from botocore.exceptions import ClientError
 from food_recall_processor.src.fetch_food_recalls import fetch_food_recalls
 from food_recall_processor.utils.logging_util import Logger
 from food_recall_processor.utils.dynamo_util import DynamoUtil
+from food_recall_processor.utils.gtin import to_gtin
+from food_recall_processor.utils.recall_snapshot import write_recall_snapshot
 
 class RecallProcessor:
     def __init__(self, database: DynamoUtil, logger: Logger, delta_days: int = 7):
@@ -58,13 +60,14 @@ class RecallProcessor:
 
         return recalls
 
-    def store_recall_data(self, table_name: str, recall_data: List[Dict], key_attribute: str = "RecallID") -> None:
+    def store_recall_data(self, table_name: str, recall_data: List[Dict], key_attribute: str = "RecallID", index_table_name: Optional[str] = None) -> List[Dict]:
         """
         Store recall data into DynamoDB table
         :param table_name: DynamoDB table name
         :param recall_data: List of formatted recall data
         :param key_attribute: Key attribute to check for duplicates
-        :return: None
+        :param index_table_name: Optional GTIN -> RecallID index table to maintain alongside the recalls
+        :return: Recalls stored by this run, without those stored by an earlier run
         """
         try:
             self.logger.log("info", f"Storing {len(recall_data)} recall data to table '{table_name}'.")
@@ -74,9 +77,13 @@ class RecallProcessor:
                 recall["RecallID"] = self.generate_recall_id(recall)
 
             # Batch write into table
-            self.database.insert_to_table(table_name, recall_data, key_attribute)
+            new_recalls = self.database.insert_to_table(table_name, recall_data, key_attribute)
             self.logger.log("info", f"Successfully store {len(recall_data)} recall data.")
 
+            if index_table_name:
+                self.store_recall_index(index_table_name, recall_data)
+            return new_recalls
+
         except ClientError as e:
             self.logger.log("error", f"Error storing recall data: {e}")
             raise
@@ -85,12 +92,66 @@ class RecallProcessor:
             self.logger.log("error", f"Error storing recall data: {e}")
             raise
 
-    def store_log(self, table_name:str, status_code):
+    @staticmethod
+    def build_recall_index(recall_data: List[Dict]) -> List[Dict]:
+        """
+        Build GTIN -> RecallID index items from recall data
+        Each UPC is keyed by its canonical GTIN-14 integer so EAN-13 and UPC-A forms share one item
+        :param recall_data: List of recall data with RecallID and UPCs attributes
+        :return: List of index items
+        """
+        index_items = {}
+        for recall in recall_data:
+            for upc in recall.get("UPCs") or []:
+                gtin = to_gtin(upc)
+                if gtin is not None:
+                    index_items[gtin] = {"GTIN": gtin, "RecallID": recall["RecallID"]}
+        return list(index_items.values())
+
+    @staticmethod
+    def recall_gtins(recall_data: List[Dict]) -> List[int]:
+        """
+        Canonical GTIN-14 integers of every UPC in the given recalls
+        :param recall_data: List of recall data with UPCs attributes
+        :return: Sorted unique GTINs
+        """
+        return sorted({gtin for recall in recall_data for gtin in map(to_gtin, recall.get("UPCs") or []) if gtin is not None})
+
+    def store_recall_index(self, index_table_name: str, recall_data: List[Dict]) -> None:
+        """
+        Store the GTIN -> RecallID index for the given recalls
+        :param index_table_name: DynamoDB index table name
+        :param recall_data: List of recall data with RecallID and UPCs attributes
+        :return: None
+        """
+        index_items = self.build_recall_index(recall_data)
+        self.logger.log("info", f"Storing {len(index_items)} GTIN index entries to table '{index_table_name}'.")
+        self.database.batch_put(index_table_name, index_items)
+
+    def store_recall_snapshot(self, table_name: str, snapshot_path: str) -> None:
+        """
+        Write the binary recall snapshot covering every recall in the table
+        :param table_name: DynamoDB recalls table name
+        :param snapshot_path: destination path of the snapshot
+        :return: None
+        """
+        recalls = self.database.scan_all(table_name, projection="RecallID, UPCs")
+        write_recall_snapshot(snapshot_path, recalls)
+        self.logger.log("info", f"Wrote recall snapshot of {len(recalls)} recalls to '{snapshot_path}'.")
 
+    def store_log(self, table_name:str, status_code, recall_gtins: Optional[List[int]] = None):
+        """
+        Log this run, with the GTINs of the recalls it added so the backend can flag matching products
+        :param table_name: DynamoDB lambda logs table name
+        :param status_code: run status code
+        :param recall_gtins: GTINs of the recalls new in this run
+        :return: None
+        """
         self.database.insert_to_table(table_name= table_name,items = [{
             "PK": "GPK", # Single uniform partition key
             "StatusCode": status_code,
             "LogTimestamp": Decimal(time.time() * 1000), # GPK coupled with timestamp act as a composite key
-            "InvocationId": str(uuid.uuid4())
+            "InvocationId": str(uuid.uuid4()),
+            "RecallGTINs": recall_gtins or []
         }], key_attribute="InvocationId")
         return
\ No newline at end of file
@@ -0,0 +1,27 @@
+import unittest
+from food_recall_processor.utils.lambda_utils import parse_upc
+from food_recall_processor.utils.gtin import to_gtin, format_gtin
+
+
+class TestLambdaUtils(unittest.TestCase):
+    def test_parse_upc(self):
+        description = "Peanut Butter 16 oz UPC 0 12345 67890 5, UPC# 4006381333931, UPC: 012345678906"
+
+        # The last code fails its check digit
+        self.assertEqual(parse_upc(description), {"012345678905", "4006381333931"})
+
+    def test_to_gtin(self):
+        self.assertEqual(to_gtin("0012345678905"), to_gtin("012345678905"))
+        self.assertEqual(to_gtin("96385074"), 96385074)  # EAN-8
+        self.assertIsNone(to_gtin("012345678906"))
+        self.assertIsNone(to_gtin("12345"))
+        self.assertEqual(format_gtin(12345678905), "00012345678905")
+
+    def test_to_gtin_upc_e(self):
+        # UPC-E codes expand to their UPC-A form
+        self.assertEqual(to_gtin("04252614"), to_gtin("042100005264"))
+        self.assertEqual(to_gtin("04963406"), to_gtin("049000006346"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -78,3 +78,45 @@ class TestRecallProcessor(unittest.TestCase):
         # Assert logger logs the error
         self.mock_logger.log.assert_any_call("info", "Storing 2 recall data to table 'TestTable'.")
         self.mock_logger.log.assert_any_call("error", "Error storing recall data: Insert failed")
+
+    def test_build_recall_index(self):
+        mock_recalls = [
+            {"RecallID": "1", "UPCs": ["012345678905"]},
+            {"RecallID": "2", "UPCs": ["0012345678905", "4006381333931", "012345678906"]},
+            {"RecallID": "3", "UPCs": []},
+        ]
+
+        index_items = RecallProcessor.build_recall_index(mock_recalls)
+        index = {item["GTIN"]: item["RecallID"] for item in index_items}
+
+        # UPC-A and EAN-13 forms share one GTIN key, invalid check digits are skipped
+        self.assertEqual(index, {
+            12345678905: "2",
+            4006381333931: "2",
+        })
+
+    def test_store_recall_data_with_index(self):
+        mock_recalls = [{"Name": "Recall1", "UPCs": ["012345678905"]}]
+
+        self.processor.store_recall_data("TestTable", mock_recalls, index_table_name="IndexTable")
+
+        self.mock_db.insert_to_table.assert_called_once_with("TestTable", mock_recalls, "RecallID")
+        recall_id = mock_recalls[0]["RecallID"]
+        self.mock_db.batch_put.assert_called_once_with("IndexTable", [{"GTIN": 12345678905, "RecallID": recall_id}])
+
+    def test_store_recall_data_returns_new_recalls(self):
+        mock_recalls = [{"Name": "Recall1", "UPCs": ["012345678905"]}, {"Name": "Recall2", "UPCs": ["4006381333931"]}]
+        # The second recall was stored by an earlier run
+        self.mock_db.insert_to_table.side_effect = lambda table_name, items, key_attribute: items[:1]
+
+        new_recalls = self.processor.store_recall_data("TestTable", mock_recalls)
+
+        self.assertEqual(new_recalls, mock_recalls[:1])
+        self.assertEqual(RecallProcessor.recall_gtins(new_recalls), [12345678905])
+
+    def test_store_log_with_recall_gtins(self):
+        self.processor.store_log("LogsTable", 200, recall_gtins=[12345678905])
+
+        items = self.mock_db.insert_to_table.call_args.kwargs["items"]
+        self.assertEqual(items[0]["StatusCode"], 200)
+        self.assertEqual(items[0]["RecallGTINs"], [12345678905])
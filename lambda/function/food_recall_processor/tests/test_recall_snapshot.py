@@ -0,0 +1,42 @@
+import os
+import struct
+import tempfile
+import unittest
+from food_recall_processor.utils.recall_snapshot import build_recall_snapshot, write_recall_snapshot, SNAPSHOT_HEADER
+
+
+class TestRecallSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.recalls = [
+            {"RecallID": "b", "UPCs": ["0012345678905", "4006381333931"]},
+            {"RecallID": "a", "UPCs": ["012345678905"]},
+            {"RecallID": "c", "UPCs": ["not a upc", "012345678906"]},
+        ]
+
+    def test_build_recall_snapshot(self):
+        snapshot = build_recall_snapshot(self.recalls)
+
+        magic, version, _, count = SNAPSHOT_HEADER.unpack_from(snapshot, 0)
+        self.assertEqual((magic, version, count), (b"FSRS", 1, 2))
+
+        keys = struct.unpack_from(f"<{count}Q", snapshot, SNAPSHOT_HEADER.size)
+        self.assertEqual(keys, (12345678905, 4006381333931))
+
+        offsets_start = SNAPSHOT_HEADER.size + count * 8
+        offsets = struct.unpack_from(f"<{count + 1}Q", snapshot, offsets_start)
+        records = snapshot[offsets_start + (count + 1) * 8:]
+        self.assertEqual(records[offsets[0]:offsets[1]], b'{"RecallIDs": ["a", "b"]}')
+        self.assertEqual(records[offsets[1]:offsets[2]], b'{"RecallIDs": ["b"]}')
+
+    def test_write_recall_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "snapshots", "recalls.snapshot")
+            write_recall_snapshot(path, self.recalls)
+
+            with open(path, "rb") as snapshot_file:
+                self.assertEqual(snapshot_file.read(), build_recall_snapshot(self.recalls))
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["recalls.snapshot"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,4 +13,8 @@ DYNAMODB_REGION = os.getenv("DYNAMODB_REGION")
 
 # DynamoDB Table Names
 DYNAMODB_RECALL_TABLE = os.getenv("DYNAMODB_RECALL_TABLE")
-DYNAMODB_LAMBDA_LOGS_TABLE = os.getenv("DYNAMODB_LAMBDA_LOGS_TABLE")
\ No newline at end of file
+DYNAMODB_LAMBDA_LOGS_TABLE = os.getenv("DYNAMODB_LAMBDA_LOGS_TABLE")
+DYNAMODB_RECALL_INDEX_TABLE = os.getenv("DYNAMODB_RECALL_INDEX_TABLE")
+
+# Recall Snapshot Path (shared with the backend, skipped if unset)
+RECALL_SNAPSHOT_PATH = os.getenv("RECALL_SNAPSHOT_PATH")
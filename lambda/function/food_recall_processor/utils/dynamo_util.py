@@ -100,15 +100,16 @@ class DynamoUtil:
             self.logger.log("error", f"Failed to delete table '{table_name}': {e}")
             raise
 
-    def insert_to_table(self, table_name: str, items: List[Dict], key_attribute: str = "RecallID") -> None:
+    def insert_to_table(self, table_name: str, items: List[Dict], key_attribute: str = "RecallID") -> List[Dict]:
         """
         Batch writing data into table
         :param table_name: Name of the table to write to.
         :param items: List of items to write to the table.
         :param key_attribute: Key attribute to check for duplicates
-        :return: None
+        :return: Items written, without those that already existed
         """
         table = self.ddb.Table(table_name)
+        written = []
         for item in items:
             # Check if the item already exists
             try:
@@ -116,6 +117,7 @@ class DynamoUtil:
                     Item=item,
                     ConditionExpression=f"attribute_not_exists({key_attribute})"
                 )
+                written.append(item)
 
             except ClientError as e:
                 if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
@@ -125,4 +127,41 @@ class DynamoUtil:
                     # Log and re-raise other errors
                     self.logger.log("error", f"Error writing item {item[key_attribute]}: {e}")
                     raise
+        return written
 
+    def batch_put(self, table_name: str, items: List[Dict]) -> None:
+        """
+        Batch writing data into table, overwriting items with the same key
+        :param table_name: Name of the table to write to.
+        :param items: List of items to write to the table.
+        :return: None
+        """
+        try:
+            table = self.ddb.Table(table_name)
+            # batch_writer groups puts into 25 item requests and retries unprocessed items
+            with table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+
+        except ClientError as e:
+            self.logger.log("error", f"Failed to batch write to table '{table_name}': {e}")
+            raise
+
+    def scan_all(self, table_name: str, projection: Optional[str] = None) -> List[Dict]:
+        """
+        Scan the entire table, following pagination past the 1 MB page limit
+        :param table_name: Name of the table to scan.
+        :param projection: Optional projection expression to limit the returned attributes
+        :return: List of all items in the table
+        """
+        table = self.ddb.Table(table_name)
+        scan_kwargs = {"ProjectionExpression": projection} if projection else {}
+
+        items = []
+        while True:
+            response = table.scan(**scan_kwargs)
+            items.extend(response.get("Items", []))
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return items
+            scan_kwargs["ExclusiveStartKey"] = last_key
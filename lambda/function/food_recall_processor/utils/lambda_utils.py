@@ -1,8 +1,10 @@
 import re
+from food_recall_processor.utils.gtin import to_gtin
 
 def parse_upc(description: str) -> set:
     upc_pattern = r"UPC\s*#?\s*[A-Za-z]*\s*:?\s*([\d\s-]{10,})"
     upc_matches = re.findall(upc_pattern, description)  # Find all UPC occurrences
 
     upc_codes = [re.sub(r"[\s-]+", "", upc_match) for upc_match in upc_matches]  # Remove spaces from UPCs
-    return set(upc_codes)  # Remove duplicates
\ No newline at end of file
+    # Drop codes with a bad length or check digit, no scanned barcode can ever match them
+    return {upc_code for upc_code in upc_codes if to_gtin(upc_code) is not None}  # Remove duplicates
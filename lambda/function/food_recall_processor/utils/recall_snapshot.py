@@ -0,0 +1,66 @@
+import os
+import json
+import struct
+import tempfile
+from typing import List, Dict
+from food_recall_processor.utils.gtin import to_gtin
+
+# Snapshot layout (little-endian):
+#   header  : magic "FSRS", format version (uint16), reserved (uint16), key count N (uint32)
+#   keys    : N sorted uint64 GTIN-14 integers
+#   offsets : N + 1 uint64 offsets into the records section, record i spans offsets[i]:offsets[i + 1]
+#   records : UTF-8 JSON object per key
+SNAPSHOT_MAGIC = b"FSRS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHHI")
+
+
+def build_recall_snapshot(recall_data: List[Dict]) -> bytes:
+    """
+    Build the binary recall snapshot from recall data
+    :param recall_data: List of recall data with RecallID and UPCs attributes
+    :return: snapshot bytes
+    """
+    recall_ids: Dict[int, List[str]] = {}
+    for recall in recall_data:
+        for upc in recall.get("UPCs") or []:
+            key = to_gtin(upc)
+            if key is not None:
+                recall_ids.setdefault(key, []).append(recall["RecallID"])
+
+    keys = sorted(recall_ids)
+    records = [json.dumps({"RecallIDs": sorted(set(recall_ids[key]))}).encode("utf-8") for key in keys]
+
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    return b"".join([
+        SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(keys)),
+        struct.pack(f"<{len(keys)}Q", *keys),
+        struct.pack(f"<{len(offsets)}Q", *offsets),
+        *records,
+    ])
+
+
+def write_recall_snapshot(path: str, recall_data: List[Dict]) -> None:
+    """
+    Atomically write the binary recall snapshot so readers never see a partial file
+    :param path: destination path of the snapshot
+    :param recall_data: List of recall data with RecallID and UPCs attributes
+    :return: None
+    """
+    snapshot = build_recall_snapshot(recall_data)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".recall_snapshot.")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(snapshot)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise